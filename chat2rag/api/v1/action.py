@@ -172,6 +172,7 @@ async def import_actions(file: UploadFile = File(...)):
                 logger.error(f"Failed to import action row: {e}")
                 error_count += 1
 
+        robot_action_service.invalidate_cache()
         return BaseResponse.success(
             msg=f"导入完成: 新增 {created_count} 条, 更新 {updated_count} 条, 失败 {error_count} 条"
         )
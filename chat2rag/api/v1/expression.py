@@ -174,6 +174,7 @@ async def import_expressions(file: UploadFile = File(...)):
                 logger.error(f"Failed to import expression row: {e}")
                 error_count += 1
 
+        robot_expression_service.invalidate_cache()
         return BaseResponse.success(
             msg=f"导入完成: 新增 {created_count} 条, 更新 {updated_count} 条, 失败 {error_count} 条"
         )
@@ -1,17 +1,20 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List
 
 from fastapi import APIRouter, HTTPException, Query
 from tortoise.expressions import Q
 
+from chat2rag.core.enums import RollupGranularity
 from chat2rag.schemas.base import BaseResponse, PaginatedResponse
 from chat2rag.schemas.common import Current
 from chat2rag.schemas.metric import (
     ChatSessionData,
     HotQuestionData,
     MetricData,
+    MetricRollupData,
     SessionStatsData,
 )
+from chat2rag.services.metric_rollup_service import ROLLUP_DIMENSIONS, ROLLUP_NO_GROUP, metric_rollup_service
 from chat2rag.services.metric_service import metric_service
 from chat2rag.services.question_analyzer import QuestionAnalyzer
 
@@ -27,6 +30,7 @@ async def get_metrics_list(
     end_time: str = Query("2099-01-01", description="结束时间", alias="endTime"),
     collection: str | None = Query(None, description="知识库"),
     chat_id: str | None = Query(None, description="聊天会话ID", alias="chatId"),
+    cursor: str | None = Query(None, description="游标（上一页返回的 nextCursor）"),
 ):
     q = Q()
     if start_time:
@@ -49,14 +53,62 @@ async def get_metrics_list(
     if chat_id:
         q &= Q(chat_id=chat_id)
 
-    total, metrics = await metric_service.get_list(page=current, page_size=size, search=q, order=["-create_time"])
+    page = await metric_service.get_page(
+        page=current, page_size=size, search=q, order=["-create_time"], cursor=cursor
+    )
 
     return PaginatedResponse.create(
-        items=[MetricData.model_validate(metric) for metric in metrics],
-        total=total,
+        items=[MetricData.model_validate(metric) for metric in page.items],
+        total=page.total,
         current=current,
         size=size,
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get(
+    "/aggregate",
+    response_model=BaseResponse[List[MetricRollupData]],
+    summary="获取指标聚合统计",
+)
+async def get_metrics_aggregate(
+    granularity: RollupGranularity = Query(RollupGranularity.HOUR, description="时间粒度"),
+    start_time: str = Query(..., description="开始时间", alias="startTime"),
+    end_time: str = Query(..., description="结束时间", alias="endTime"),
+    collection: str | None = Query(None, description="知识库"),
+    model: str | None = Query(None, description="模型"),
+    group_by: List[str] = Query(
+        ["bucket"], description=f"分组维度：bucket/collections/model，{ROLLUP_NO_GROUP} 表示整个区间汇总", alias="groupBy"
+    ),
+):
+    if group_by == [ROLLUP_NO_GROUP]:
+        group_by = []
+    invalid = set(group_by) - set(ROLLUP_DIMENSIONS)
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"不支持的分组维度: {', '.join(sorted(invalid))}")
+
+    start_datetime = datetime.strptime(start_time, "%Y-%m-%d")
+    end_datetime = datetime.strptime(end_time, "%Y-%m-%d") + timedelta(days=1)
+    data = await metric_rollup_service.aggregate(
+        granularity,
+        start_datetime,
+        end_datetime,
+        collection=collection,
+        model=model,
+        group_by=group_by,
+    )
+    return BaseResponse(data=data)
+
+
+@router.post("/rollups/rebuild", response_model=BaseResponse[int], summary="重建指标聚合")
+async def rebuild_metrics_rollups(
+    start_time: str = Query(..., description="开始时间", alias="startTime"),
+    end_time: str = Query(..., description="结束时间", alias="endTime"),
+):
+    processed = await metric_rollup_service.rebuild(
+        datetime.strptime(start_time, "%Y-%m-%d"), datetime.strptime(end_time, "%Y-%m-%d")
     )
+    return BaseResponse(data=processed)
 
 
 @router.get(
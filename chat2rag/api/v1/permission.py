@@ -2,6 +2,7 @@ from typing import List
 
 from fastapi import APIRouter, Depends
 
+from chat2rag.core.crud import paginate
 from chat2rag.core.deps import (
     get_current_user,
     get_current_tenant_id,
@@ -15,6 +16,7 @@ from chat2rag.schemas.permission import (
     PermissionTreeResponse,
     PermissionUpdate,
 )
+from chat2rag.services.rbac_service import rbac_service
 
 router = APIRouter()
 
@@ -22,18 +24,15 @@ router = APIRouter()
 @router.get("", response_model=PaginatedResponse[PermissionResponse])
 async def get_permissions(pagination: PaginationParams = Depends()):
     """获取权限列表"""
-    total = await Permission.all().count()
-    permissions = (
-        await Permission.all()
-        .offset(pagination.offset)
-        .limit(pagination.limit)
-        .order_by("sort")
+    page = await paginate(
+        Permission.all(), pagination.current, pagination.size, order=["sort"], cursor=pagination.cursor
     )
     return PaginatedResponse.create(
-        items=[await p.to_dict() for p in permissions],
-        total=total,
+        items=[await p.to_dict() for p in page.items],
+        total=page.total,
         current=pagination.current,
         size=pagination.size,
+        next_cursor=page.next_cursor,
     )
 
 
@@ -102,6 +101,7 @@ async def update_permission(permission_id: int, data: PermissionUpdate):
         setattr(permission, field, value)
 
     await permission.save()
+    rbac_service.invalidate()
     return BaseResponse(data=await permission.to_dict())
 
 
@@ -119,4 +119,5 @@ async def delete_permission(permission_id: int):
         )
 
     await permission.delete()
+    rbac_service.invalidate()
     return BaseResponse(msg="删除成功")
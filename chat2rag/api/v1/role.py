@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from tortoise.expressions import Q
 
+from chat2rag.core.crud import paginate
 from chat2rag.core.deps import get_current_user, get_current_tenant_id
 from chat2rag.models import Permission, Role, RolePermission
 from chat2rag.schemas.base import BaseResponse, PaginatedResponse, PaginationParams
@@ -21,14 +22,19 @@ async def get_roles(
     tenant_id: int = Depends(get_current_tenant_id),
 ):
     """获取角色列表"""
-    query = Role.filter(Q(tenant_id=tenant_id) | Q(tenant_id__isnull=True))
-    total = await query.count()
-    roles = await query.offset(pagination.offset).limit(pagination.limit).all()
+    page = await paginate(
+        Role.filter(Q(tenant_id=tenant_id) | Q(tenant_id__isnull=True)),
+        pagination.current,
+        pagination.size,
+        order=["id"],
+        cursor=pagination.cursor,
+    )
     return PaginatedResponse.create(
-        items=[await r.to_dict() for r in roles],
-        total=total,
+        items=[await r.to_dict() for r in page.items],
+        total=page.total,
         current=pagination.current,
         size=pagination.size,
+        next_cursor=page.next_cursor,
     )
 
 
@@ -106,6 +112,7 @@ async def update_role(
         role.sort = data.sort
 
     await role.save()
+    rbac_service.invalidate()
 
     if data.permission_ids is not None:
         await rbac_service.assign_permissions(role, data.permission_ids)
@@ -127,4 +134,5 @@ async def delete_role(role_id: int, tenant_id: int = Depends(get_current_tenant_
         return BaseResponse.error(msg="系统角色不能删除", code="4003", http_status=403)
 
     await role.delete()
+    rbac_service.invalidate()
     return BaseResponse(msg="删除成功")
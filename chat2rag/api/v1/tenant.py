@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends
 
+from chat2rag.core.crud import paginate
 from chat2rag.core.deps import get_current_user, require_permissions
 from chat2rag.models import Tenant
 from chat2rag.schemas.base import BaseResponse, PaginatedResponse, PaginationParams
 from chat2rag.schemas.tenant import TenantCreate, TenantResponse, TenantUpdate
+from chat2rag.services.auth_service import auth_service
 
 router = APIRouter()
 
@@ -11,18 +13,15 @@ router = APIRouter()
 @router.get("", response_model=PaginatedResponse[TenantResponse])
 async def get_tenants(pagination: PaginationParams = Depends()):
     """获取租户列表"""
-    total = await Tenant.all().count()
-    tenants = (
-        await Tenant.all()
-        .offset(pagination.offset)
-        .limit(pagination.limit)
-        .order_by("-id")
+    page = await paginate(
+        Tenant.all(), pagination.current, pagination.size, order=["-id"], cursor=pagination.cursor
     )
     return PaginatedResponse.create(
-        items=[await t.to_dict() for t in tenants],
-        total=total,
+        items=[await t.to_dict() for t in page.items],
+        total=page.total,
         current=pagination.current,
         size=pagination.size,
+        next_cursor=page.next_cursor,
     )
 
 
@@ -75,6 +74,7 @@ async def update_tenant(tenant_id: int, data: TenantUpdate):
         setattr(tenant, field, value)
 
     await tenant.save()
+    auth_service.invalidate()
     return BaseResponse(data=await tenant.to_dict())
 
 
@@ -98,4 +98,5 @@ async def delete_tenant(tenant_id: int):
         )
 
     await tenant.delete()
+    auth_service.invalidate()
     return BaseResponse(msg="删除成功")
@@ -11,6 +11,7 @@ from fastapi import APIRouter, File, HTTPException, UploadFile
 from chat2rag.core.logger import get_logger
 from chat2rag.schemas.base import BaseResponse
 from chat2rag.services.excel_schema_service import recognize_and_save_schema
+from chat2rag.services.timetable_service import timetable_service
 
 router = APIRouter()
 
@@ -154,6 +155,9 @@ async def upload_ticket_file(file: UploadFile = File(...)):
         schema = await recognize_and_save_schema(target_file)
         logger.info(f"Schema recognized: {schema}")
 
+        # 预先建立时刻表索引，首次查询无需解析 Excel
+        await timetable_service.get_async()
+
         return BaseResponse.success(msg="文件上传成功")
 
     except HTTPException:
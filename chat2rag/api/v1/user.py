@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
 
+from chat2rag.core.crud import paginate
 from chat2rag.core.deps import get_current_user, get_current_tenant_id
 from chat2rag.core.security import get_password_hash
 from chat2rag.models import User
@@ -10,6 +11,7 @@ from chat2rag.schemas.user import (
     UserUpdate,
     UserDetailResponse,
 )
+from chat2rag.services.auth_service import auth_service
 from chat2rag.services.rbac_service import rbac_service
 
 router = APIRouter()
@@ -21,18 +23,19 @@ async def get_users(
     tenant_id: int = Depends(get_current_tenant_id),
 ):
     """获取用户列表"""
-    total = await User.filter(tenant_id=tenant_id).count()
-    users = (
-        await User.filter(tenant_id=tenant_id)
-        .offset(pagination.offset)
-        .limit(pagination.limit)
-        .all()
+    page = await paginate(
+        User.filter(tenant_id=tenant_id),
+        pagination.current,
+        pagination.size,
+        order=["id"],
+        cursor=pagination.cursor,
     )
     return PaginatedResponse.create(
-        items=[await u.to_dict() for u in users],
-        total=total,
+        items=[await u.to_dict() for u in page.items],
+        total=page.total,
         current=pagination.current,
         size=pagination.size,
+        next_cursor=page.next_cursor,
     )
 
 
@@ -105,6 +108,7 @@ async def update_user(
         user.status = data.status
 
     await user.save()
+    auth_service.invalidate_user(user.id, tenant_id)
 
     if data.role_ids is not None:
         await rbac_service.assign_roles(user, data.role_ids)
@@ -125,4 +129,5 @@ async def delete_user(user_id: int, tenant_id: int = Depends(get_current_tenant_
         )
 
     await user.delete()
+    auth_service.invalidate_user(user_id, tenant_id)
     return BaseResponse(msg="删除成功")
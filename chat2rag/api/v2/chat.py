@@ -1,27 +1,115 @@
-from fastapi import APIRouter
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
 from chat2rag.core.logger import get_logger
-from chat2rag.schemas.chat import ChatRequest
+from chat2rag.schemas.chat import ChatRequest, VoiceSessionRequest
 from chat2rag.services.chat_service import ChatProcessor
+from chat2rag.services.voice_service import VoiceSession
+from chat2rag.streaming import Transport
 
 logger = get_logger(__name__)
 router = APIRouter()
 
+CHAT_TOOLS = [
+    "maps_weather",
+    "maps_geo",
+    "maps_direction_transit_integrated",
+    "web_search",
+    "cart_manage",
+    "checkout",
+    "get_train_info",
+    "search_entities",
+    "confirm_navigate",
+]
+
 
 @router.post("/chat")
 async def chat(chat_request: ChatRequest):
     """聊天接口"""
-    chat_request.tools = [
-        "maps_weather",
-        "maps_geo",
-        "maps_direction_transit_integrated",
-        "web_search",
-        "cart_manage",
-        "checkout",
-        "get_train_info",
-        "search_entities",
-        "confirm_navigate",
-    ]
+    chat_request.tools = list(CHAT_TOOLS)
     processor = ChatProcessor(chat_request)
     return StreamingResponse(processor.process(), media_type="text/event-stream")
+
+
+@router.websocket("/chat/ws")
+async def chat_ws(websocket: WebSocket):
+    """
+    WebSocket 聊天接口
+
+    客户端每发送一个 ChatRequest JSON，服务端依次返回：
+    - 文本帧：与 /chat 相同的 StreamChunkV2 消息（紧凑 JSON，无 SSE 前缀）
+    - 二进制帧：音频原始字节，帧头为 b"AU" + 版本(1B) + 保留(1B) + 句子序号(uint32 大端)，
+      紧跟在对应的音频消息（audioBase64 为空）之后
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("text") is None:
+                await websocket.send_json({"object": "error", "message": "Expected JSON text frame"})
+                continue
+            try:
+                chat_request = ChatRequest.model_validate(json.loads(message["text"]))
+            except (json.JSONDecodeError, ValidationError) as e:
+                await websocket.send_json({"object": "error", "message": str(e)})
+                continue
+
+            chat_request.tools = list(CHAT_TOOLS)
+            processor = ChatProcessor(chat_request, transport=Transport.WEBSOCKET)
+            async for frame in processor.process():
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+    except WebSocketDisconnect:
+        logger.debug("Chat websocket disconnected")
+
+
+@router.websocket("/chat/voice")
+async def chat_voice(websocket: WebSocket):
+    """
+    全双工语音聊天接口
+
+    - 首条消息为 JSON 会话配置，字段同 ChatRequest，无需 content
+    - 之后客户端持续发送 16kHz 单声道 PCM16 二进制帧
+    - 服务端返回：
+      - {"object": "transcript", "text": ..., "final": bool}：识别结果
+      - {"object": "interrupt"}：用户插话，客户端应立即停止播放
+      - 与 /chat/ws 相同的回复文本帧和音频二进制帧
+    """
+    await websocket.accept()
+
+    async def send(frame: str | bytes):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+    try:
+        try:
+            voice_request = VoiceSessionRequest.model_validate(await websocket.receive_json())
+        except (json.JSONDecodeError, ValidationError) as e:
+            await websocket.send_json({"object": "error", "message": str(e)})
+            await websocket.close()
+            return
+
+        voice_request.tools = list(CHAT_TOOLS)
+        session = VoiceSession(voice_request, send)
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if message.get("bytes") is None:
+                    await session.send_error("Expected binary PCM16 audio frame")
+                    continue
+                await session.feed(message["bytes"])
+        finally:
+            await session.close()
+    except WebSocketDisconnect:
+        logger.debug("Voice websocket disconnected")
@@ -7,15 +7,22 @@ from pathlib import Path
 import uvicorn
 from fastapi import FastAPI
 from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from chat2rag.api.routes import router
 from chat2rag.config import CONFIG
 from chat2rag.core.init_app import modify_db
 from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
+from chat2rag.core.spans import install_stage_tracer
 from chat2rag.middleware import ExceptionHandlerMiddleware, LoggingMiddleware
 from chat2rag.services.model_service import ModelSourceService, periodic_latency_update
+from chat2rag.services.metric_rollup_service import metric_rollup_service
 from chat2rag.services.prompt_service import prompt_service
+from chat2rag.services.tts_cache_service import tts_cache_warmer
+from chat2rag.services.warmup_service import periodic_warmup, warmup_service
+from chat2rag.utils.monitoring import monitor_event_loop_lag
 from chat2rag.utils.qdrant_store import get_client
 
 logger = get_logger(__name__)
@@ -32,6 +39,9 @@ async def lifespan(app: FastAPI):
         setup_telemetry()
         logger.info("Telemetry initialized")
 
+    # 在 Telemetry 之后安装，包住其 Tracer
+    install_stage_tracer()
+
     await prompt_service.ensure_default_prompt()
 
     from chat2rag.services.question_analyzer import QuestionAnalyzer
@@ -44,6 +54,21 @@ async def lifespan(app: FastAPI):
         periodic_latency_update(ModelSourceService(), interval_sec=3600)
     )
 
+    if CONFIG.ROLLUP_ENABLED:
+        asyncio.create_task(metric_rollup_service.run_periodic(interval_sec=CONFIG.ROLLUP_FLUSH_INTERVAL))
+
+    if CONFIG.WARMUP_ENABLED:
+        asyncio.create_task(periodic_warmup(warmup_service, interval_sec=CONFIG.WARMUP_INTERVAL))
+        tts_cache_warmer.schedule(tts_cache_warmer.warm_all())
+
+    if CONFIG.RUNTIME_METRICS_ENABLED:
+        asyncio.create_task(
+            monitor_event_loop_lag(
+                interval_sec=CONFIG.LOOP_LAG_INTERVAL,
+                block_threshold_ms=CONFIG.LOOP_BLOCK_THRESHOLD_MS,
+            )
+        )
+
     if not os.environ.get("DEPLOY_ENV"):
         docs_dir = Path(__file__).parent.parent / "docs"
         docs_dir.mkdir(exist_ok=True)
@@ -55,6 +80,12 @@ async def lifespan(app: FastAPI):
     yield
     # 关闭时执行
     # await FastAPICache.clear()
+    if CONFIG.ROLLUP_ENABLED:
+        await metric_rollup_service.flush()
+    if CONFIG.TELEMETRY_ENABLED:
+        from chat2rag.core.telemetry import shutdown_telemetry
+
+        shutdown_telemetry()
     await qdrant_client.close()
     logger.info("Stopping Chat2RAG application")
 
@@ -95,6 +126,14 @@ async def custom_swagger_ui_html():
     )
 
 
+# 运行时指标（Prometheus 文本格式）
+if CONFIG.RUNTIME_METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def runtime_metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # 自定义 OpenAPI 文档路由
 @app.get("/openapi.json", include_in_schema=False)
 async def get_openapi_json():
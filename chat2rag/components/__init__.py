@@ -1,4 +1,5 @@
+from chat2rag.components.multi_query_retriever import MultiQueryRetriever
 from chat2rag.components.multimodal_prompt_builder import MultimodalChatPromptBuilder
 from chat2rag.components.ranker import OpenRanker
 
-__all__ = ["MultimodalChatPromptBuilder", "OpenRanker"]
+__all__ = ["MultiQueryRetriever", "MultimodalChatPromptBuilder", "OpenRanker"]
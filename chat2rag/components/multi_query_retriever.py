@@ -0,0 +1,134 @@
+from typing import Any, Dict, List
+
+from haystack import component, default_from_dict, default_to_dict
+from haystack.dataclasses import Document
+from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
+from haystack_integrations.document_stores.qdrant.converters import (
+    DENSE_VECTORS_NAME,
+    convert_qdrant_point_to_haystack_document,
+)
+from haystack_integrations.document_stores.qdrant.filters import convert_filters_to_qdrant
+from qdrant_client.http import models as rest
+
+from chat2rag.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@component
+class MultiQueryRetriever:
+    """
+    多向量检索：同一问题的多个扩写变体在一次 Qdrant 批量请求中检索，按文档取最高分合并
+
+    分数阈值对每个变体分别生效，合并后的分数是某个变体的真实相似度，与单向量检索的阈值含义一致。
+    """
+
+    def __init__(
+        self,
+        document_store: QdrantDocumentStore,
+        filters: Dict[str, Any] | rest.Filter | None = None,
+        top_k: int = 10,
+        score_threshold: float | None = None,
+    ):
+        self.document_store = document_store
+        self.filters = filters
+        self.top_k = top_k
+        self.score_threshold = score_threshold
+
+    def to_dict(self) -> dict[str, Any]:
+        return default_to_dict(
+            self,
+            document_store=self.document_store.to_dict(),
+            filters=self.filters,
+            top_k=self.top_k,
+            score_threshold=self.score_threshold,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "MultiQueryRetriever":
+        init_params = data["init_parameters"]
+        init_params["document_store"] = QdrantDocumentStore.from_dict(init_params["document_store"])
+        return default_from_dict(cls, data)
+
+    def _requests(
+        self,
+        query_embeddings: List[List[float]],
+        filters: Dict[str, Any] | rest.Filter | None,
+        top_k: int,
+        score_threshold: float | None,
+    ) -> List[rest.QueryRequest]:
+        qdrant_filter = convert_filters_to_qdrant(filters)
+        using = DENSE_VECTORS_NAME if self.document_store.use_sparse_embeddings else None
+        return [
+            rest.QueryRequest(
+                query=embedding,
+                using=using,
+                filter=qdrant_filter,
+                limit=top_k,
+                score_threshold=score_threshold,
+                with_payload=True,
+                with_vector=False,
+            )
+            for embedding in query_embeddings
+        ]
+
+    def _fuse(self, responses: List[rest.QueryResponse], top_k: int) -> List[Document]:
+        best: Dict[str, Document] = {}
+        for response in responses:
+            for point in response.points:
+                document = convert_qdrant_point_to_haystack_document(
+                    point, use_sparse_embeddings=self.document_store.use_sparse_embeddings
+                )
+                current = best.get(document.id)
+                if current is None or document.score > current.score:
+                    best[document.id] = document
+        return sorted(best.values(), key=lambda document: document.score, reverse=True)[:top_k]
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embeddings: List[List[float]],
+        filters: Dict[str, Any] | rest.Filter | None = None,
+        top_k: int | None = None,
+        score_threshold: float | None = None,
+    ) -> Dict[str, List[Document]]:
+        if not query_embeddings:
+            return {"documents": []}
+
+        top_k = top_k or self.top_k
+        requests = self._requests(
+            query_embeddings,
+            filters if filters is not None else self.filters,
+            top_k,
+            score_threshold if score_threshold is not None else self.score_threshold,
+        )
+        self.document_store._initialize_client()
+        responses = self.document_store._client.query_batch_points(
+            collection_name=self.document_store.index, requests=requests
+        )
+        return {"documents": self._fuse(responses, top_k)}
+
+    @component.output_types(documents=List[Document])
+    async def run_async(
+        self,
+        query_embeddings: List[List[float]],
+        filters: Dict[str, Any] | rest.Filter | None = None,
+        top_k: int | None = None,
+        score_threshold: float | None = None,
+    ) -> Dict[str, List[Document]]:
+        if not query_embeddings:
+            return {"documents": []}
+
+        top_k = top_k or self.top_k
+        requests = self._requests(
+            query_embeddings,
+            filters if filters is not None else self.filters,
+            top_k,
+            score_threshold if score_threshold is not None else self.score_threshold,
+        )
+        await self.document_store._initialize_async_client()
+        responses = await self.document_store._async_client.query_batch_points(
+            collection_name=self.document_store.index, requests=requests
+        )
+        logger.debug(f"Multi-query retrieval: {len(requests)} queries on '{self.document_store.index}'")
+        return {"documents": self._fuse(responses, top_k)}
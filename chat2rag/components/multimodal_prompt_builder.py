@@ -1,4 +1,5 @@
 from dataclasses import replace
+from functools import lru_cache
 from typing import Any, Literal
 
 from haystack import component, default_from_dict, default_to_dict, logging
@@ -6,6 +7,7 @@ from haystack.dataclasses import ChatMessage, ChatRole, TextContent
 from haystack.utils import Jinja2TimeExtension
 from haystack.utils.jinja2_chat_extension import ChatMessageExtension, templatize_part
 from haystack.utils.jinja2_extensions import _extract_template_variables_and_assignments
+from jinja2 import Template
 from jinja2.sandbox import SandboxedEnvironment
 
 logger = logging.getLogger(__name__)
@@ -18,6 +20,26 @@ FILTER_NOT_ALLOWED_ERROR_MESSAGE = (
 )
 
 
+@lru_cache(maxsize=1)
+def _shared_environment() -> SandboxedEnvironment:
+    """所有实例共用同一个 Jinja 环境，编译结果可跨流水线复用"""
+    env = SandboxedEnvironment(extensions=[ChatMessageExtension])
+    env.filters["templatize_part"] = templatize_part
+    try:
+        import arrow
+
+        env.add_extension(Jinja2TimeExtension)
+    except ImportError:
+        pass
+    return env
+
+
+@lru_cache(maxsize=512)
+def _compile_template(text: str) -> Template:
+    """相同的模板文本只编译一次"""
+    return _shared_environment().from_string(text)
+
+
 @component
 class MultimodalChatPromptBuilder:
     def __init__(
@@ -30,14 +52,7 @@ class MultimodalChatPromptBuilder:
         self._required_variables = required_variables
         self.template = template
 
-        self._env = SandboxedEnvironment(extensions=[ChatMessageExtension])
-        self._env.filters["templatize_part"] = templatize_part
-        try:
-            import arrow
-
-            self._env.add_extension(Jinja2TimeExtension)
-        except ImportError:
-            pass
+        self._env = _shared_environment()
 
         extracted_variables = []
         if template and not variables:
@@ -131,7 +146,7 @@ class MultimodalChatPromptBuilder:
                         )
                     if message.text and "templatize_part" in message.text:
                         raise ValueError(FILTER_NOT_ALLOWED_ERROR_MESSAGE)
-                    compiled_template = self._env.from_string(message.text)
+                    compiled_template = _compile_template(message.text)
                     rendered_text = compiled_template.render(
                         template_variables_combined
                     )
@@ -31,6 +31,12 @@ def _load_bool_env(name: str, default: bool = False) -> bool:
     return value.lower() in ["true", "1", "yes"]
 
 
+def _load_rate_env(name: str, default: float) -> float:
+    """0 是有效取值，不能用 or 回退默认值"""
+    value = _load_float_env(name)
+    return default if value is None else value
+
+
 def load_prompt(file_name: str, required: bool = False) -> str:
     file_path = PROMPT_PATH / file_name
     if file_path.exists():
@@ -98,8 +104,70 @@ class Config:
     BACKEND_PORT = _load_int_env("BACKEND_PORT") or 8000
 
     TELEMETRY_ENABLED = _load_bool_env("TELEMETRY_ENABLED")
+    # 导出方式：otlp 或 memory（进程内，测试用）
+    TELEMETRY_EXPORTER = _load_str_env("TELEMETRY_EXPORTER") or "otlp"
+    TELEMETRY_ENDPOINT = _load_str_env("TELEMETRY_ENDPOINT") or "http://localhost:6006/v1/traces"
+    # 未监听时自动启动本地 Phoenix，仅用于开发环境
+    TELEMETRY_LAUNCH_PHOENIX = _load_bool_env("TELEMETRY_LAUNCH_PHOENIX")
+    # 按比例采样整条链路；根 span 超过 TELEMETRY_SLOW_MS 或出错的链路总是导出
+    # 设为 0 时只导出慢请求和出错的链路
+    TELEMETRY_SAMPLE_RATE = _load_rate_env("TELEMETRY_SAMPLE_RATE", 0.1)
+    TELEMETRY_SLOW_MS = _load_int_env("TELEMETRY_SLOW_MS") or 3000
+    # 导出队列上限，队列满时直接丢弃
+    TELEMETRY_QUEUE_SIZE = _load_int_env("TELEMETRY_QUEUE_SIZE") or 2048
+    TELEMETRY_BATCH_SIZE = _load_int_env("TELEMETRY_BATCH_SIZE") or 256
+    TELEMETRY_EXPORT_INTERVAL_MS = _load_int_env("TELEMETRY_EXPORT_INTERVAL_MS") or 5000
+    # 等待根 span 结束的链路数上限，超出时丢弃最早的链路
+    TELEMETRY_MAX_PENDING_TRACES = _load_int_env("TELEMETRY_MAX_PENDING_TRACES") or 1024
+
+    # 运行时指标：/metrics 以 Prometheus 文本格式输出队列、缓存、连接池、事件循环延迟等
+    RUNTIME_METRICS_ENABLED = _load_bool_env("RUNTIME_METRICS_ENABLED", default=True)
+    LOOP_LAG_INTERVAL = _load_float_env("LOOP_LAG_INTERVAL") or 0.5
+    # 事件循环被单次回调占用超过该值时记录调用栈，并按模块计入 event_loop_blocks_total
+    LOOP_BLOCK_THRESHOLD_MS = _load_int_env("LOOP_BLOCK_THRESHOLD_MS") or 100
+    # 测试用：大于 0 时 API 测试期间事件循环被阻塞超过该值即失败
+    LOOP_BLOCK_FAIL_MS = _load_int_env("LOOP_BLOCK_FAIL_MS") or 0
 
     IS_FLOW = _load_bool_env("IS_FLOW")
+    # 流程本地预匹配：高于 HIGH 直接命中，低于 LOW 直接判定不命中，其余交给 LLM
+    FLOW_FUZZY_THRESHOLD = _load_float_env("FLOW_FUZZY_THRESHOLD") or 0.85
+    FLOW_EMBEDDING_MATCH = _load_bool_env("FLOW_EMBEDDING_MATCH", default=True)
+    FLOW_EMBEDDING_HIGH = _load_float_env("FLOW_EMBEDDING_HIGH") or 0.82
+    FLOW_EMBEDDING_LOW = _load_float_env("FLOW_EMBEDDING_LOW") or 0.35
+
+    # 会话存储：memory（单进程）或 sqlite（同一主机多 worker 共享）
+    SESSION_STORE = _load_str_env("SESSION_STORE") or "memory"
+    SESSION_TTL = _load_int_env("SESSION_TTL") or 300
+    SESSION_MAX_ITEMS = _load_int_env("SESSION_MAX_ITEMS") or 10000
+    SESSION_SQLITE_PATH = Path(_load_str_env("SESSION_SQLITE_PATH") or SQLITE_DIR / "sessions.db")
+
+    # 历史消息：按 token 预算选取最近的轮次，滑出窗口的消息在后台滚动摘要
+    HISTORY_MAX_TOKENS = _load_int_env("HISTORY_MAX_TOKENS") or 3000
+    HISTORY_TOOL_RESULT_MAX_TOKENS = _load_int_env("HISTORY_TOOL_RESULT_MAX_TOKENS") or 500
+    HISTORY_SUMMARY_ENABLED = _load_bool_env("HISTORY_SUMMARY_ENABLED", default=True)
+    HISTORY_SUMMARY_TRIGGER_TOKENS = _load_int_env("HISTORY_SUMMARY_TRIGGER_TOKENS") or 800
+    HISTORY_SUMMARY_MAX_TOKENS = _load_int_env("HISTORY_SUMMARY_MAX_TOKENS") or 300
+
+    # 提示词、动作、表情的进程内缓存时间（秒），本进程内的增删改会立即失效
+    PROMPT_CACHE_TTL = _load_int_env("PROMPT_CACHE_TTL") or 60
+    # 提示词布局：default 或 prefix_stable（静态内容在前，便于上游前缀缓存）
+    PROMPT_LAYOUT = _load_str_env("PROMPT_LAYOUT") or "default"
+
+    # 当前用户及其角色权限的进程内缓存时间（秒），本进程内的角色/权限/用户变更会立即失效
+    RBAC_CACHE_TTL = _load_int_env("RBAC_CACHE_TTL") or 300
+    RBAC_CACHE_SIZE = _load_int_env("RBAC_CACHE_SIZE") or 10000
+
+    # Pipeline 预热：启动及定时按近期最常用的 (模型, 知识库, 工具) 组合预先构建
+    WARMUP_ENABLED = _load_bool_env("WARMUP_ENABLED", default=True)
+    WARMUP_TOP_N = _load_int_env("WARMUP_TOP_N") or 5
+    WARMUP_LOOKBACK_DAYS = _load_int_env("WARMUP_LOOKBACK_DAYS") or 7
+    WARMUP_INTERVAL = _load_int_env("WARMUP_INTERVAL") or 1800
+
+    # 指标预聚合：写入时在进程内累加，定时批量合并到 metric_rollups
+    ROLLUP_ENABLED = _load_bool_env("ROLLUP_ENABLED", default=True)
+    ROLLUP_FLUSH_INTERVAL = _load_int_env("ROLLUP_FLUSH_INTERVAL") or 10
+    ROLLUP_MINUTE_RETENTION_DAYS = _load_int_env("ROLLUP_MINUTE_RETENTION_DAYS") or 7
+    ROLLUP_BACKFILL_DAYS = _load_int_env("ROLLUP_BACKFILL_DAYS") or 30
 
     COMMAND_LLM_FALLBACK = _load_bool_env("COMMAND_LLM_FALLBACK", default=True)
     COMMAND_FUZZY_THRESHOLD = _load_float_env("COMMAND_FUZZY_THRESHOLD") or 0.7
@@ -189,6 +257,10 @@ class Config:
     EMBEDDING_DIMENSIONS = _load_int_env("EMBEDDING_DIMENSIONS") or 1024
     EMBEDDING_API_KEY = _load_str_env("EMBEDDING_API_KEY")
 
+    # OpenAI 兼容客户端（按端点复用）
+    OPENAI_TIMEOUT = _load_float_env("OPENAI_TIMEOUT") or 30.0
+    OPENAI_MAX_RETRIES = _load_int_env("OPENAI_MAX_RETRIES") or 5
+
     # Qdrant 配置
     QDRANT_LOCATION = _load_str_env("QDRANT_LOCATION") or "http://localhost/6333"
 
@@ -199,6 +271,19 @@ class Config:
     PRECISION_THRESHOLD = _load_float_env("PRECISION_THRESHOLD") or 0.88
     DENSE_TOP_K = _load_int_env("DENSE_TOP_K") or 25
 
+    # 问题扩写：本地规则生成问题变体，一次批量编码，按归一化后的问题缓存，检索时按文档取各变体最高分
+    QUERY_REWRITE_ENABLED = _load_bool_env("QUERY_REWRITE_ENABLED", default=True)
+    QUERY_REWRITE_MAX_VARIANTS = _load_int_env("QUERY_REWRITE_MAX_VARIANTS") or 4
+    # 同义词表：每行一组，空格或逗号分隔，# 开头为注释
+    QUERY_REWRITE_SYNONYMS_PATH = Path(
+        _load_str_env("QUERY_REWRITE_SYNONYMS_PATH") or DATA_DIR / "query_rewrite" / "synonyms.txt"
+    )
+    # 本地规则没有产生变体时，在后台调用 LLM 改写，结果供之后的相同问题使用
+    QUERY_REWRITE_LLM = _load_bool_env("QUERY_REWRITE_LLM")
+    QUERY_REWRITE_LLM_TIMEOUT = _load_float_env("QUERY_REWRITE_LLM_TIMEOUT") or 5.0
+    QUERY_REWRITE_CACHE_TTL = _load_int_env("QUERY_REWRITE_CACHE_TTL") or 3600
+    QUERY_REWRITE_CACHE_SIZE = _load_int_env("QUERY_REWRITE_CACHE_SIZE") or 10000
+
     # Rerank 配置
     RERANK_ENABLED = _load_bool_env("RERANK_ENABLED", default=True)
     RERANK_API_KEY = _load_str_env("RERANK_API_KEY")
@@ -209,6 +294,35 @@ class Config:
     MULTIMODAL_API_URL = _load_str_env("MULTIMODAL_API_URL") or "https://dashscope.aliyuncs.com/compatible-mode/v1"
     MULTIMODAL_API_KEY = _load_str_env("MULTIMODAL_API_KEY")
     MULTIMODAL_MODEL = _load_str_env("MULTIMODAL_MODEL") or "qwen3-vl-235b-a22b-instruct"
+    # 图片预处理：按 detail=low 的分辨率缩放后重新编码
+    IMAGE_MAX_SIDE = _load_int_env("IMAGE_MAX_SIDE") or 512
+    IMAGE_FORMAT = _load_str_env("IMAGE_FORMAT") or "JPEG"
+    IMAGE_QUALITY = _load_int_env("IMAGE_QUALITY") or 85
+
+    # TTS 配置
+    TTS_POOL_SIZE = _load_int_env("TTS_POOL_SIZE") or 2
+    TTS_MAX_CONCURRENCY = _load_int_env("TTS_MAX_CONCURRENCY") or 3
+    # 空闲超过该时长的预连接会话不再复用，与 dashscope 对象池的重连间隔一致
+    TTS_POOL_MAX_IDLE_SEC = _load_int_env("TTS_POOL_MAX_IDLE_SEC") or 30
+    TTS_CACHE_MEMORY_MB = _load_int_env("TTS_CACHE_MEMORY_MB") or 64
+    TTS_CACHE_DIR = Path(_load_str_env("TTS_CACHE_DIR") or DATA_DIR / "tts_cache")
+    # 固定话术预合成的音色，逗号分隔，与请求中的 audio.voice 对应
+    TTS_WARM_VOICES = _load_list_env("TTS_WARM_VOICES") or ["Cherry"]
+
+    # 语音识别配置：ASR/VAD 模型每进程一份，推理在独立线程池中执行
+    SPEECH_WORKERS = _load_int_env("SPEECH_WORKERS") or 2
+    # 在途（执行中 + 排队）的推理任务上限，超出时调用方等待
+    SPEECH_QUEUE_SIZE = _load_int_env("SPEECH_QUEUE_SIZE") or 32
+    # 多路连接的 VAD 帧合并推理：凑满 BATCH_SIZE 或等待 BATCH_WAIT_MS 后执行
+    SPEECH_VAD_BATCH_SIZE = _load_int_env("SPEECH_VAD_BATCH_SIZE") or 32
+    SPEECH_VAD_BATCH_WAIT_MS = _load_float_env("SPEECH_VAD_BATCH_WAIT_MS") or 5
+    SPEECH_VAD_THRESHOLD = _load_float_env("SPEECH_VAD_THRESHOLD") or 0.5
+    SPEECH_VAD_MIN_SILENCE_MS = _load_int_env("SPEECH_VAD_MIN_SILENCE_MS") or 400
+    # 语音会话：增量识别结果达到该字数后提前送入策略链推测执行，整句结果一致时直接放出
+    VOICE_SPECULATIVE = _load_bool_env("VOICE_SPECULATIVE", default=True)
+    VOICE_SPECULATE_MIN_CHARS = _load_int_env("VOICE_SPECULATE_MIN_CHARS") or 4
+    # 增量识别结果保持不变超过该时长后才开始推测，避免每个增量结果都重跑一次
+    VOICE_SPECULATE_DEBOUNCE_MS = _load_int_env("VOICE_SPECULATE_DEBOUNCE_MS") or 300
 
     RAG_PROMPT_TEMPLATE = RAG_PROMPT_TEMPLATE
     FUNCTION_PROMPT_TEMPLATE = ""
@@ -1,18 +1,191 @@
-from typing import Generic, List, Optional, TypeVar
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 from pydantic.main import IncEx
-from tortoise.expressions import Q
+from tortoise import fields
+from tortoise.expressions import Q, Subquery
 from tortoise.models import Model
+from tortoise.queryset import QuerySet
 
-from chat2rag.core.exceptions import ValueNoExist
+from chat2rag.core.exceptions import ParameterException, ValueNoExist
+from chat2rag.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 ModelType = TypeVar("ModelType", bound=Model)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# 估算行数低于该值时仍使用精确 COUNT(*)
+ESTIMATE_COUNT_THRESHOLD = 100_000
+
+
+# =====================================================================
+#                           分页引擎
+# =====================================================================
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    """
+    分页结果
+
+    Attributes:
+        total: 总数（estimate=True 且数据量很大时为估算值）
+        items: 当前页数据
+        next_cursor: 下一页游标，没有更多数据时为 None
+    """
+
+    total: int
+    items: List[ModelType] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def _order_fields(model: type[Model], order: List[str] | None) -> List[tuple[str, bool]]:
+    """排序字段 -> [(字段名, 是否降序)]，末尾补主键保证顺序唯一"""
+    pk = model._meta.pk_attr
+    result = [(item.lstrip("-"), item.startswith("-")) for item in order or []]
+    if pk not in {name for name, _ in result}:
+        result.append((pk, result[-1][1] if result else False))
+    return result
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _decode_value(model: type[Model], name: str, value: Any) -> Any:
+    model_field = model._meta.fields_map.get(name)
+    if value is not None and isinstance(model_field, fields.DatetimeField):
+        return datetime.fromisoformat(value)
+    if value is not None and isinstance(model_field, fields.DateField):
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(obj: Model, order_fields: List[tuple[str, bool]]) -> str:
+    values = [_encode_value(getattr(obj, name)) for name, _ in order_fields]
+    return base64.urlsafe_b64encode(json.dumps(values, ensure_ascii=False).encode()).decode()
+
+
+def decode_cursor(model: type[Model], cursor: str, order_fields: List[tuple[str, bool]]) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ParameterException("无效的分页游标")
+    if not isinstance(values, list) or len(values) != len(order_fields):
+        raise ParameterException("分页游标与排序字段不匹配")
+    return [_decode_value(model, name, value) for (name, _), value in zip(order_fields, values)]
+
+
+def _keyset_filter(order_fields: List[tuple[str, bool]], values: list) -> Q:
+    """
+    游标之后的数据：(a, b, id) > (va, vb, vid)，按各字段方向展开为
+    a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND id > vid)
+    """
+    equals: dict = {}
+    branches = []
+    for (name, desc), value in zip(order_fields, values):
+        branches.append(Q(**equals, **{f"{name}__{'lt' if desc else 'gt'}": value}))
+        equals[name] = value
+
+    condition = branches[0]
+    for branch in branches[1:]:
+        condition |= branch
+    return condition
+
+
+async def _estimate_count(query: QuerySet) -> int | None:
+    """PostgreSQL 查询计划中的估算行数，其他数据库返回 None"""
+    try:
+        if query.model._meta.db.capabilities.dialect != "postgres":
+            return None
+        rows = await query.explain()
+        plan = rows[0]["QUERY PLAN"]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.debug(f"Failed to estimate count: {e}")
+        return None
+
+
+async def count_rows(query: QuerySet, distinct: bool = False, estimate: bool = False) -> int:
+    """
+    统计总数：SQL COUNT(*)
+
+    estimate=True 时先读取查询计划的估算行数，超过 ESTIMATE_COUNT_THRESHOLD 直接返回估算值
+    """
+    if distinct:
+        pk = query.model._meta.pk_attr
+        query = query.model.filter(**{f"{pk}__in": Subquery(query.distinct().values(pk))})
+
+    if estimate:
+        estimated = await _estimate_count(query)
+        if estimated is not None and estimated >= ESTIMATE_COUNT_THRESHOLD:
+            return estimated
+    return await query.count()
+
+
+async def paginate(
+    query: QuerySet,
+    page: int = 1,
+    page_size: int = 10,
+    order: List[str] | None = None,
+    cursor: str | None = None,
+    prefetch: Optional[List[str]] = None,
+    distinct: bool = False,
+    estimate: bool = False,
+    with_total: bool = True,
+) -> Page:
+    """
+    通用分页
+
+    - 未传 cursor：按 page 偏移分页
+    - 传入 cursor：键集分页，从游标之后取 page_size 条，忽略 page；
+      排序字段应为非空且有索引的列，主键会自动追加为最后一个排序字段
+
+    每页都会返回 next_cursor，前端可在任意一页之后切换为游标翻页
+    """
+    model = query.model
+    order_fields = _order_fields(model, order)
+
+    total = await count_rows(query, distinct=distinct, estimate=estimate) if with_total else 0
+    if with_total and total == 0:
+        return Page(total=0)
+
+    if distinct:
+        query = query.distinct()
+    if cursor:
+        query = query.filter(_keyset_filter(order_fields, decode_cursor(model, cursor, order_fields)))
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    query = query.order_by(*[f"-{name}" if desc else name for name, desc in order_fields])
+    query = query.limit(page_size + 1)
+    if prefetch:
+        query = query.prefetch_related(*prefetch)
+
+    items = await query
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1], order_fields)
+    return Page(total=total, items=items, next_cursor=next_cursor)
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # 大表可开启估算总数
+    estimate_count: bool = False
+
     def __init__(self, model: type[ModelType]):
         self.model = model
 
@@ -49,48 +222,41 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             总数, 列表数据
         """
+        result = await self.get_page(page, page_size, search, order, prefetch=prefetch, distinct=distinct)
+        return result.total, result.items
 
-        # 过滤
-        query = self.model.filter(search)
-
-        # 去重
-        if distinct:
-            query = query.distinct()
-
-        # 查询总数 - 先获取所有 ID，然后计数
-        # 这样确保 count 和 all() 的逻辑一致
-        try:
-            ids = await query.values_list("id", flat=True)
-        except Exception:
-            # 如果没有id字段，则查找包含"id"字符的第一个字段
-            field_names = list(self.model._meta.fields_map.keys())
-            id_field = next(
-                (field for field in field_names if "id" in field.lower()),
-                field_names[0] if field_names else "id",
-            )
-            ids = await query.values_list(id_field, flat=True)
-        total = len(ids)
-
-        # 去重（用于后续的 all() 查询）
-        if distinct:
-            query = query.distinct()
-
-        if total == 0:
-            return total, []
-
-        # 分页查询
-        query = query.limit(page_size).offset((page - 1) * page_size)
-
-        # 关联预加载
-        if prefetch:
-            query = query.prefetch_related(*prefetch)
-
-        # 排序
-        order = order or []
-        if order:
-            query = query.order_by(*order)
-
-        return total, await query.all()
+    async def get_page(
+        self,
+        page: int,
+        page_size: int,
+        search: Q = Q(),
+        order: list[str] | None = None,
+        cursor: str | None = None,
+        prefetch: Optional[List[str]] = None,
+        distinct: bool = False,
+    ) -> Page[ModelType]:
+        """
+        获取分页数据，支持游标分页
+        Args:
+            page: 页码（传入 cursor 时忽略）
+            page_size: 每页数量
+            search: 查询条件
+            order: 排序
+            cursor: 上一页返回的 next_cursor
+            prefetch: 预加载
+        Returns:
+            Page
+        """
+        return await paginate(
+            self.model.filter(search),
+            page,
+            page_size,
+            order=order,
+            cursor=cursor,
+            prefetch=prefetch,
+            distinct=distinct,
+            estimate=self.estimate_count,
+        )
 
     async def create(
         self,
@@ -88,3 +88,38 @@ class ModelCapability(str, Enum):
     IMAGE = "image"
     VIDEO = "video"
     AUDIO = "audio"
+
+
+class RollupGranularity(str, Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+
+class ChatStage(str, Enum):
+    """聊天请求的处理阶段"""
+
+    SENSITIVE = "sensitive"
+    COMMAND = "command"
+    FLOW = "flow"
+    EXACT_MATCH = "exact_match"
+    PIPELINE = "pipeline"
+    EMBEDDING = "embedding"
+    RETRIEVAL = "retrieval"
+    RERANK = "rerank"
+    LLM = "llm"
+    TOOL = "tool"
+    METRICS_SAVE = "metrics_save"
+    # 以下为距请求开始的时间点，而非阶段耗时
+    LLM_FIRST_TOKEN = "llm_first_token"
+    TTS_FIRST_AUDIO = "tts_first_audio"
+
+
+class SpeechEventType(str, Enum):
+    """语音识别事件"""
+
+    SPEECH_START = "speech_start"
+    # 说话过程中的增量识别结果
+    PARTIAL = "partial"
+    # 一句话结束时的完整识别结果
+    FINAL = "final"
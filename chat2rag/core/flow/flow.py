@@ -2,14 +2,12 @@ import asyncio
 import uuid
 from typing import List, Optional
 
-from cachetools import TTLCache
-
+from chat2rag.core.flow.matcher import flow_matcher
+from chat2rag.core.flow.registry import CompiledFlow, flow_registry
 from chat2rag.core.init_app import modify_db
 from chat2rag.core.logger import get_logger
+from chat2rag.core.session_store import session_store
 from chat2rag.dataclass.flow_node import Node
-from chat2rag.models import FlowData
-from chat2rag.services.flow_service import flow_service
-from chat2rag.utils.flow_json_parse import dict_to_flow_nodes
 from chat2rag.utils.llm_client import LLMClient
 
 logger = get_logger(__name__)
@@ -18,21 +16,57 @@ logger = get_logger(__name__)
 class UserFlowState:
     """用户流程状态"""
 
-    def __init__(self, flow: FlowData, current_state: str = "start"):
+    def __init__(self, flow: CompiledFlow, current_state: str = "start"):
         self.flow = flow
         self.current_state = current_state
-        self.flow_nodes = dict_to_flow_nodes(flow.flow_json)
+        self.exited = False
+
+    @property
+    def flow_nodes(self) -> List[Node]:
+        return self.flow.nodes
+
+
+class FlowStateStore:
+    """用户流程状态，存放在会话存储中，只保存 (flow_id, current_state)"""
+
+    NAMESPACE = "flow_state"
+
+    async def get(self, chat_id: str) -> Optional[UserFlowState]:
+        record = await session_store.get(self.NAMESPACE, chat_id)
+        if not record:
+            return None
+
+        flow = await flow_registry.get(record["flow_id"])
+        if not flow:
+            # 流程已被删除
+            await self.clear(chat_id)
+            return None
+        return UserFlowState(flow, record["state"])
+
+    async def save(self, chat_id: str, state: UserFlowState):
+        if state.exited:
+            await self.clear(chat_id)
+            return
+        await session_store.set(self.NAMESPACE, chat_id, {"flow_id": state.flow.id, "state": state.current_state})
+
+    async def clear(self, chat_id: str):
+        await session_store.delete(self.NAMESPACE, chat_id)
 
 
-user_states: TTLCache = TTLCache(maxsize=100, ttl=300)  # 用户状态缓存（TTL: 5分钟）
+user_states = FlowStateStore()
 llm_client = LLMClient()
 
 
-async def match_flow_by_query(query: str, flows: list[FlowData]) -> Optional[str]:
+async def match_flow_by_query(query: str, flows: list[CompiledFlow]) -> Optional[str]:
     """根据用户查询匹配合适的流程"""
     if not flows:
         return None
 
+    decision = await flow_matcher.match_flow(query, flows)
+    if decision.confident:
+        logger.info(f"Flow local match: {decision.value} ({decision.reason})")
+        return decision.value
+
     flow_names = {flow.name for flow in flows}
     flows_description = "\n".join(
         [f"{idx + 1}. {flow.name} - {flow.desc}" for idx, flow in enumerate(flows)]
@@ -63,6 +97,11 @@ async def match_state_by_query(query: str, current_node: Node) -> Optional[str]:
     """根据用户输入和当前节点的条件，匹配状态"""
     conditions = current_node.conditions
 
+    decision = await flow_matcher.match_state(query, current_node)
+    if decision.confident:
+        logger.info(f"State local match: {decision.value} ({decision.reason})")
+        return decision.value
+
     if not conditions:
         return None
 
@@ -100,7 +139,7 @@ async def match_state_by_query(query: str, current_node: Node) -> Optional[str]:
 
 
 def _handle_state_response(
-    flow_nodes: List[Node],
+    flow_state: UserFlowState,
     state_name: str,
     chat_id: str,
     _flags: dict = None,
@@ -111,9 +150,8 @@ def _handle_state_response(
         _flags = {"emoji_found": False, "action_found": False}
 
     responses = []
-    current_node: Node = next(
-        (n for n in flow_nodes if n.state_name == state_name), None
-    )
+    flow = flow_state.flow
+    current_node = flow.get_node(state_name)
 
     if not current_node:
         logger.warning(f"State '{state_name}' not found in flow")
@@ -133,25 +171,27 @@ def _handle_state_response(
     # 处理 end 节点
     if current_node.state_name == "end":
         responses.append("已退出流程")
-        user_states.pop(chat_id, None)
+        flow_state.exited = True
         logger.info(f"Flow exited: chat_id={chat_id}")
         return responses
 
     # 处理自动转移
     if current_node.is_auto:
         next_node_id = current_node.conditions[0].transition_node_id
-        next_node = next((n for n in flow_nodes if n.id == next_node_id), None)
+        next_node = flow.get_node_by_id(next_node_id)
+        if not next_node:
+            logger.warning(f"Auto transition target '{next_node_id}' not found in flow")
+            return responses
 
         logger.info(f"Auto transition: {state_name} -> {next_node.state_name}")
-        if chat_id in user_states:
-            user_states[chat_id].current_state = next_node.state_name
-
-            # 递归收集下一个节点的响应
-            responses.extend(
-                _handle_state_response(
-                    flow_nodes, next_node.state_name, chat_id, _flags, False
-                )
+        flow_state.current_state = next_node.state_name
+
+        # 递归收集下一个节点的响应
+        responses.extend(
+            _handle_state_response(
+                flow_state, next_node.state_name, chat_id, _flags, False
             )
+        )
     if _log:
         logger.debug(f"LLM responses: {''.join(responses)}")
 
@@ -160,35 +200,33 @@ def _handle_state_response(
 
 async def handle_flow(chat_id: str, query: str):
     """处理用户流程交互"""
-    flow_state = user_states.get(chat_id)
+    flow_state = await user_states.get(chat_id)
 
     # 场景1: 用户未在任何流程中，尝试匹配并初始化流程
     if not flow_state:
-        _, available_flows = await flow_service.get_list(1, 999)
+        available_flows = await flow_registry.list_flows()
         target_flow_name = await match_flow_by_query(query, available_flows)
         if not target_flow_name:
             logger.info(f"No matching flow found: chat_id={chat_id}")
             return
 
         logger.info(f"Flow entered: chat_id={chat_id}, flow={target_flow_name}")
-        flow = await flow_service.get_flow_by_name(target_flow_name)
+        flow = await flow_registry.get_by_name(target_flow_name)
         if not flow:
             logger.error(f"Flow '{target_flow_name}' not found")
+            return
 
         # 用户状态初始化
-        user_states[chat_id] = UserFlowState(flow, "start")
-        responses = _handle_state_response(
-            user_states[chat_id].flow_nodes, "start", chat_id
-        )
+        flow_state = UserFlowState(flow, "start")
+        responses = _handle_state_response(flow_state, "start", chat_id)
+        await user_states.save(chat_id, flow_state)
 
         for response in responses:
             yield response
         return
 
     # 场景2: 用户在流程中，处理状态转移
-    current_node: Node = next(
-        n for n in flow_state.flow_nodes if n.state_name == flow_state.current_state
-    )
+    current_node = flow_state.flow.get_node(flow_state.current_state)
     if not current_node:
         logger.error(f"Current state node not found: state={flow_state.current_state}")
         return
@@ -200,14 +238,13 @@ async def handle_flow(chat_id: str, query: str):
 
     if transition_result == "quit":
         logger.info(f"Flow exited: chat_id={chat_id}")
-        user_states.pop(chat_id, None)
+        await user_states.clear(chat_id)
         yield "已退出流程"
         return
 
-    user_states[chat_id].current_state = transition_result
-    responses = _handle_state_response(
-        user_states[chat_id].flow_nodes, transition_result, chat_id
-    )
+    flow_state.current_state = transition_result
+    responses = _handle_state_response(flow_state, transition_result, chat_id)
+    await user_states.save(chat_id, flow_state)
     for response in responses:
         yield response
     return
@@ -232,8 +269,8 @@ async def example_usage():
             print(f"Bot: {response}")
 
         # 显示当前状态（调试用）
-        if chat_id in user_states:
-            state = user_states[chat_id]
+        state = await user_states.get(chat_id)
+        if state:
             print(f"[当前流程: {state.flow.name}, 状态: {state.current_state}]")
 
 
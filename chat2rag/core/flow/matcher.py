@@ -0,0 +1,208 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from cachetools import LRUCache
+from haystack import Document
+from haystack.components.embedders import OpenAIDocumentEmbedder, OpenAITextEmbedder
+from haystack.utils import Secret
+
+from chat2rag.config import CONFIG
+from chat2rag.core.flow.registry import CompiledFlow
+from chat2rag.core.logger import get_logger
+from chat2rag.dataclass.flow_node import Node
+from chat2rag.utils.intent_recognizer import calculate_similarity
+
+logger = get_logger(__name__)
+
+# 明确的退出表达（整句），与 match_state_by_query 的 'quit' 语义一致
+QUIT_PHRASES = frozenset({"退出", "取消", "退出流程", "取消流程", "不办了", "算了", "不用了", "quit", "exit", "cancel"})
+
+_NORMALIZE_PATTERN = re.compile(r"[\s，。！？、,.!?;；:：~～\"'“”‘’]+")
+
+# 流程名称之外只允许出现的意图用语，如 "我要办理失物招领"、"帮我预约一下"
+_INTENT_FILLER_PATTERN = re.compile(
+    r"(?:我们|我|想要|想|需要|要|帮我|帮忙|请|麻烦|给我|可以|能|开始|办理|进行|申请|一下|下|吧|呢|啊|呀|了)*"
+)
+_NEGATION_PATTERN = re.compile(r"不|没|别|甭|无需|取消")
+
+
+def normalize(text: str) -> str:
+    return _NORMALIZE_PATTERN.sub("", text or "").lower()
+
+
+@dataclass
+class MatchDecision:
+    """
+    本地匹配结论
+
+    - confident=True, value 非空：确定命中
+    - confident=True, value 为 None：确定不命中
+    - confident=False：无法判断，交给 LLM
+    """
+
+    confident: bool
+    value: Optional[str] = None
+    reason: str = ""
+
+    @classmethod
+    def hit(cls, value: str, reason: str) -> "MatchDecision":
+        return cls(confident=True, value=value, reason=reason)
+
+    @classmethod
+    def miss(cls, reason: str) -> "MatchDecision":
+        return cls(confident=True, value=None, reason=reason)
+
+    @classmethod
+    def ambiguous(cls, reason: str = "") -> "MatchDecision":
+        return cls(confident=False, reason=reason)
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class CandidateEmbedder:
+    """候选文本向量缓存：流程描述和转移条件只在首次出现时批量编码"""
+
+    def __init__(self, maxsize: int = 2048):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._text_embedder: OpenAITextEmbedder | None = None
+        self._document_embedder: OpenAIDocumentEmbedder | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(CONFIG.FLOW_EMBEDDING_MATCH and CONFIG.EMBEDDING_OPENAI_URL and CONFIG.EMBEDDING_API_KEY)
+
+    def _embedder_kwargs(self) -> dict:
+        return {
+            "api_base_url": CONFIG.EMBEDDING_OPENAI_URL,
+            "api_key": Secret.from_token(CONFIG.EMBEDDING_API_KEY),
+            "model": CONFIG.EMBEDDING_MODEL,
+            "dimensions": CONFIG.EMBEDDING_DIMENSIONS,
+        }
+
+    async def embed_query(self, text: str) -> List[float]:
+        if self._text_embedder is None:
+            self._text_embedder = OpenAITextEmbedder(**self._embedder_kwargs())
+        result = await self._text_embedder.run_async(text=text)
+        return result["embedding"]
+
+    async def embed_candidates(self, texts: List[str]) -> List[List[float]]:
+        missing = list(dict.fromkeys(t for t in texts if t not in self._cache))
+        if missing:
+            if self._document_embedder is None:
+                self._document_embedder = OpenAIDocumentEmbedder(**self._embedder_kwargs(), progress_bar=False)
+            result = await self._document_embedder.run_async(documents=[Document(content=t) for t in missing])
+            for doc in result["documents"]:
+                self._cache[doc.content] = doc.embedding
+        return [self._cache[t] for t in texts]
+
+    async def nearest(self, query: str, texts: List[str]) -> tuple[int, float]:
+        """返回最相似候选的下标和余弦相似度"""
+        query_embedding = await self.embed_query(query)
+        candidate_embeddings = await self.embed_candidates(texts)
+        scores = [_cosine(query_embedding, emb) for emb in candidate_embeddings]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return best, scores[best]
+
+
+class FlowMatcher:
+    """
+    流程入口与状态转移的本地预匹配：关键词 -> 模糊匹配 -> 向量近邻
+
+    只有三层都无法给出确定结论时才需要调用 LLM。状态转移只在命中时短路，
+    不命中的判断交给 LLM，以便识别 QUIT_PHRASES 之外的退出表达。
+    """
+
+    def __init__(self, embedder: CandidateEmbedder | None = None):
+        self.embedder = embedder or CandidateEmbedder()
+
+    async def match_flow(self, query: str, flows: List[CompiledFlow]) -> MatchDecision:
+        normalized = normalize(query)
+        if not normalized or not flows:
+            return MatchDecision.miss("empty")
+
+        # 第一层：问题只由流程名称和意图用语组成，"我不想预约"、"预约电话是多少" 不在此命中
+        for flow in flows:
+            name = normalize(flow.name)
+            if name and name in normalized and _INTENT_FILLER_PATTERN.fullmatch(normalized.replace(name, "", 1)):
+                return MatchDecision.hit(flow.name, "keyword")
+
+        # 否定表达只由向量和 LLM 判断，且向量不直接命中
+        negated = bool(_NEGATION_PATTERN.search(normalized))
+
+        # 第二层：与流程名称的整句相似度，不使用包含关系，避免 "预约" 命中 "预约轮椅"；过短的问题不参与
+        if len(normalized) >= 2 and not negated:
+            best_flow, best_score = None, 0.0
+            for flow in flows:
+                score = calculate_similarity(normalized, normalize(flow.name))
+                if score > best_score:
+                    best_flow, best_score = flow, score
+            if best_flow and best_score >= CONFIG.FLOW_FUZZY_THRESHOLD:
+                return MatchDecision.hit(best_flow.name, f"fuzzy:{best_score:.2f}")
+
+        # 第三层：流程名称 + 描述的向量近邻
+        texts = [f"{flow.name} {flow.desc or ''}".strip() for flow in flows]
+        decision = await self._embedding_decision(query, texts, [flow.name for flow in flows])
+        if negated and decision.value:
+            return MatchDecision.ambiguous(f"negated {decision.reason}")
+        return decision
+
+    async def match_state(self, query: str, node: Node) -> MatchDecision:
+        conditions = [c for c in node.conditions if c.transition_node_state_name]
+        normalized = normalize(query)
+        if not normalized:
+            return MatchDecision.miss("empty")
+
+        # 第一层：与转移条件逐字一致（如 "是"、"确认"）
+        for condition in conditions:
+            if normalize(condition.trigger) == normalized:
+                return MatchDecision.hit(condition.transition_node_state_name, "keyword")
+
+        if normalized in QUIT_PHRASES:
+            return MatchDecision.hit("quit", "quit")
+
+        if not conditions:
+            return MatchDecision.miss("no conditions")
+
+        # 第二层：整句相似度，不使用包含关系，避免 "不是" 命中 "是"
+        best_condition, best_score = None, 0.0
+        for condition in conditions:
+            score = calculate_similarity(normalized, normalize(condition.trigger))
+            if score > best_score:
+                best_condition, best_score = condition, score
+        if best_condition and best_score >= CONFIG.FLOW_FUZZY_THRESHOLD:
+            return MatchDecision.hit(best_condition.transition_node_state_name, f"fuzzy:{best_score:.2f}")
+
+        # 第三层：转移条件的向量近邻；相似度低时仍交给 LLM，自由表达的退出意图只有 LLM 能识别
+        return await self._embedding_decision(
+            query,
+            [c.trigger for c in conditions],
+            [c.transition_node_state_name for c in conditions],
+            allow_miss=False,
+        )
+
+    async def _embedding_decision(
+        self, query: str, texts: List[str], values: List[str], allow_miss: bool = True
+    ) -> MatchDecision:
+        if not self.embedder.enabled or not texts:
+            return MatchDecision.ambiguous("embedding disabled")
+
+        try:
+            index, score = await self.embedder.nearest(query, texts)
+        except Exception as e:
+            logger.warning(f"Flow embedding match failed: {e}")
+            return MatchDecision.ambiguous("embedding error")
+
+        if score >= CONFIG.FLOW_EMBEDDING_HIGH:
+            return MatchDecision.hit(values[index], f"embedding:{score:.2f}")
+        if allow_miss and score < CONFIG.FLOW_EMBEDDING_LOW:
+            return MatchDecision.miss(f"embedding:{score:.2f}")
+        return MatchDecision.ambiguous(f"embedding:{score:.2f}")
+
+
+flow_matcher = FlowMatcher()
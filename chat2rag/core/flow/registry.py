@@ -0,0 +1,108 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic
+from typing import Dict, List, Optional
+
+from chat2rag.core.logger import get_logger
+from chat2rag.dataclass.flow_node import Node
+from chat2rag.models import FlowData
+from chat2rag.utils.flow_json_parse import dict_to_flow_nodes
+
+logger = get_logger(__name__)
+
+# 与数据库比对版本的最小间隔（秒），本进程内的增删改会立即失效
+FLOW_REGISTRY_REVALIDATE_SECONDS = 30
+
+
+@dataclass
+class CompiledFlow:
+    """解析后的流程图，按节点 id 和状态名建立索引"""
+
+    id: int
+    name: str
+    desc: str | None
+    version: datetime | None
+    nodes: List[Node] = field(default_factory=list)
+    nodes_by_id: Dict[str, Node] = field(default_factory=dict)
+    nodes_by_state: Dict[str, Node] = field(default_factory=dict)
+
+    @classmethod
+    def compile(cls, flow: FlowData) -> "CompiledFlow":
+        nodes = dict_to_flow_nodes(flow.flow_json or {})
+        compiled = cls(id=flow.id, name=flow.name, desc=flow.desc, version=flow.update_time, nodes=nodes)
+        for node in nodes:
+            # 与原先的线性查找保持一致：重复时取第一个
+            compiled.nodes_by_id.setdefault(node.id, node)
+            compiled.nodes_by_state.setdefault(node.state_name, node)
+        return compiled
+
+    def get_node(self, state_name: str) -> Optional[Node]:
+        return self.nodes_by_state.get(state_name)
+
+    def get_node_by_id(self, node_id: str) -> Optional[Node]:
+        return self.nodes_by_id.get(node_id)
+
+
+class FlowRegistry:
+    """
+    流程注册表
+
+    每个流程只解析一次，以 FlowData.update_time 作为版本号；
+    定期只查询 (id, update_time) 比对版本，仅重新编译有变化的流程。
+    """
+
+    def __init__(self, revalidate_seconds: float = FLOW_REGISTRY_REVALIDATE_SECONDS):
+        self.revalidate_seconds = revalidate_seconds
+        self._flows: Dict[int, CompiledFlow] = {}
+        self._by_name: Dict[str, CompiledFlow] = {}
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_fresh(self):
+        if self._checked_at is not None and monotonic() - self._checked_at < self.revalidate_seconds:
+            return
+
+        async with self._lock:
+            if self._checked_at is not None and monotonic() - self._checked_at < self.revalidate_seconds:
+                return
+
+            versions = dict(await FlowData.all().values_list("id", "update_time"))
+            changed = [
+                flow_id
+                for flow_id, version in versions.items()
+                if flow_id not in self._flows or self._flows[flow_id].version != version
+            ]
+
+            flows = dict(self._flows)
+            for flow_id in set(flows) - set(versions):
+                flows.pop(flow_id)
+            if changed:
+                for flow in await FlowData.filter(id__in=changed):
+                    flows[flow.id] = CompiledFlow.compile(flow)
+                logger.info(f"Flow registry compiled {len(changed)} flow(s)")
+
+            self._flows = flows
+            self._by_name = {}
+            for flow in sorted(flows.values(), key=lambda f: f.id):
+                self._by_name.setdefault(flow.name, flow)
+            self._checked_at = monotonic()
+
+    async def list_flows(self) -> List[CompiledFlow]:
+        await self._ensure_fresh()
+        return list(self._flows.values())
+
+    async def get_by_name(self, name: str) -> Optional[CompiledFlow]:
+        await self._ensure_fresh()
+        return self._by_name.get(name)
+
+    async def get(self, flow_id: int) -> Optional[CompiledFlow]:
+        await self._ensure_fresh()
+        return self._flows.get(flow_id)
+
+    def invalidate(self):
+        """流程增删改后调用，下次访问时重新比对版本"""
+        self._checked_at = None
+
+
+flow_registry = FlowRegistry()
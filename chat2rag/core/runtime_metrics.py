@@ -0,0 +1,215 @@
+"""
+进程内运行时指标
+
+Counter / Gauge / Histogram，按 Prometheus 文本格式由 /metrics 输出。
+队列长度、缓存大小等状态通过回调在抓取时读取，不在热路径上额外维护。
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+# 回调返回单个值，或 {标签值元组: 值}
+MetricCallback = Callable[[], float | Dict[Labels, float]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: MetricCallback | None = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _collect(self) -> Dict[Labels, float]:
+        if self.callback is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.callback()
+        if isinstance(value, dict):
+            return value
+        return {(): float(value)}
+
+    def get(self, **labels) -> float:
+        return self._collect().get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for labels, value in sorted(self._collect().items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> (各桶计数, 总和, 总数)
+        self._observations: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._observations.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            if index < len(self.buckets):
+                counts[index] += 1
+            self._observations[key] = (counts, total + value, count + 1)
+
+    def get(self, **labels) -> float:
+        """观测次数"""
+        with self._lock:
+            observation = self._observations.get(self._key(labels))
+        return observation[2] if observation else 0
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            observations = {key: (list(counts), total, count) for key, (counts, total, count) in self._observations.items()}
+
+        for labels, (counts, total, count) in sorted(observations.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),)),
+                    cumulative,
+                )
+            yield f"{self.name}_bucket", _format_labels(self.labelnames + ("le",), labels + ("+Inf",)), count
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), count
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "chat2rag"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        full_name = f"{self.prefix}_{name}" if self.prefix else name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = cls(full_name, *args, **kwargs)
+                self._metrics[full_name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {full_name} already registered as {metric.type}")
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: MetricCallback | None = None,
+    ) -> Counter:
+        return self._register(Counter, name, documentation, labelnames, callback)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: MetricCallback | None = None,
+    ) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames, callback)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        """Prometheus 文本格式；单个回调失败不影响其他指标"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                lines.append(f"# {metric.name} collection failed: {_escape(str(e))}")
+                continue
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,188 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, List
+
+import orjson
+from cachetools import TTLCache
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SessionStore(ABC):
+    """
+    会话存储接口
+
+    按 (namespace, key) 保存两类数据：
+    - 键值：如流程状态，set 会整体覆盖
+    - 追加列表：如聊天记录，append 追加并刷新过期时间
+    所有值都是可被 orjson 序列化的对象。
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, namespace: str, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str) -> None: ...
+
+    @abstractmethod
+    async def append(self, namespace: str, key: str, items: List[Any]) -> None: ...
+
+    @abstractmethod
+    async def get_list(self, namespace: str, key: str) -> List[Any]: ...
+
+
+class MemorySessionStore(SessionStore):
+    """进程内存储，适用于单 worker 部署"""
+
+    def __init__(self, ttl: int, maxsize: int):
+        super().__init__(ttl)
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, namespace: str, key: str) -> Any | None:
+        return self._cache.get((namespace, key))
+
+    async def set(self, namespace: str, key: str, value: Any) -> None:
+        self._cache[(namespace, key)] = value
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._cache.pop((namespace, key), None)
+
+    async def append(self, namespace: str, key: str, items: List[Any]) -> None:
+        # 重新赋值以刷新 TTL
+        self._cache[(namespace, key)] = self._cache.get((namespace, key), []) + list(items)
+
+    async def get_list(self, namespace: str, key: str) -> List[Any]:
+        return list(self._cache.get((namespace, key), []))
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    嵌入式 SQLite 存储，同一主机的多个 worker 共享一个数据库文件
+
+    列表的每个元素单独一行（seq 递增），追加不需要读出整段历史。
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS session_items (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        value BLOB NOT NULL,
+        expire_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key, seq)
+    ) WITHOUT ROWID
+    """
+
+    def __init__(self, path: Path, ttl: int, cleanup_interval: float = 60.0):
+        super().__init__(ttl)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.cleanup_interval = cleanup_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+        self._last_cleanup = 0.0
+
+    def _execute(self, fn):
+        with self._lock:
+            now = time.time()
+            if now - self._last_cleanup > self.cleanup_interval:
+                self._conn.execute("DELETE FROM session_items WHERE expire_at <= ?", (now,))
+                self._last_cleanup = now
+            return fn(self._conn, now)
+
+    async def _run(self, fn):
+        return await asyncio.to_thread(self._execute, fn)
+
+    async def get(self, namespace: str, key: str) -> Any | None:
+        def _get(conn, now):
+            row = conn.execute(
+                "SELECT value FROM session_items WHERE namespace=? AND key=? AND seq=0 AND expire_at>?",
+                (namespace, key, now),
+            ).fetchone()
+            return orjson.loads(row[0]) if row else None
+
+        return await self._run(_get)
+
+    async def set(self, namespace: str, key: str, value: Any) -> None:
+        payload = orjson.dumps(value)
+
+        def _set(conn, now):
+            conn.execute(
+                "INSERT OR REPLACE INTO session_items (namespace, key, seq, value, expire_at) VALUES (?, ?, 0, ?, ?)",
+                (namespace, key, payload, now + self.ttl),
+            )
+
+        await self._run(_set)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        await self._run(lambda conn, now: conn.execute("DELETE FROM session_items WHERE namespace=? AND key=?", (namespace, key)))
+
+    async def append(self, namespace: str, key: str, items: List[Any]) -> None:
+        payloads = [orjson.dumps(item) for item in items]
+
+        def _append(conn, now):
+            expire_at = now + self.ttl
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 已过期的旧记录先清掉，避免和新会话拼接
+                conn.execute(
+                    "DELETE FROM session_items WHERE namespace=? AND key=? AND expire_at<=?",
+                    (namespace, key, now),
+                )
+                (last_seq,) = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM session_items WHERE namespace=? AND key=?",
+                    (namespace, key),
+                ).fetchone()
+                conn.executemany(
+                    "INSERT INTO session_items (namespace, key, seq, value, expire_at) VALUES (?, ?, ?, ?, ?)",
+                    [(namespace, key, last_seq + i, payload, expire_at) for i, payload in enumerate(payloads, 1)],
+                )
+                conn.execute(
+                    "UPDATE session_items SET expire_at=? WHERE namespace=? AND key=?",
+                    (expire_at, namespace, key),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        await self._run(_append)
+
+    async def get_list(self, namespace: str, key: str) -> List[Any]:
+        def _get_list(conn, now):
+            rows = conn.execute(
+                "SELECT value FROM session_items WHERE namespace=? AND key=? AND seq>0 AND expire_at>? ORDER BY seq",
+                (namespace, key, now),
+            ).fetchall()
+            return [orjson.loads(row[0]) for row in rows]
+
+        return await self._run(_get_list)
+
+
+def create_session_store() -> SessionStore:
+    backend = CONFIG.SESSION_STORE.lower()
+    if backend == "sqlite":
+        logger.info(f"Session store: sqlite ({CONFIG.SESSION_SQLITE_PATH})")
+        return SQLiteSessionStore(CONFIG.SESSION_SQLITE_PATH, ttl=CONFIG.SESSION_TTL)
+    if backend != "memory":
+        logger.warning(f"Unknown session store '{backend}', falling back to memory")
+    return MemorySessionStore(ttl=CONFIG.SESSION_TTL, maxsize=CONFIG.SESSION_MAX_ITEMS)
+
+
+session_store = create_session_store()
@@ -0,0 +1,172 @@
+"""
+聊天请求分阶段耗时
+
+每个请求一个 SpanRecorder（由 MetricsCollector 持有），ChatProcessor 通过 contextvar
+绑定后，策略链、AgentPipeline 内的 Haystack 组件、StreamHandler 都记录到同一个对象。
+只在内存中追加 (阶段, 开始, 结束)，随 Metric 一起保存为 stage_timings，不做额外 IO。
+"""
+
+import contextlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter_ns
+from typing import Any, Dict, Iterator, List, Optional
+
+from haystack import tracing
+from haystack.tracing import Span, Tracer
+
+from chat2rag.core.enums import ChatStage
+from chat2rag.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_current_recorder: ContextVar[Optional["SpanRecorder"]] = ContextVar("span_recorder", default=None)
+
+
+@dataclass
+class StageSpan:
+    name: str
+    start_ns: int
+    end_ns: int = 0
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round((self.end_ns - self.start_ns) / 1_000_000, 2)
+
+
+def _union_ms(spans: List[StageSpan]) -> float:
+    """同一阶段多个区间的并集时长：并发的检索器不重复计算，多轮工具调用累加"""
+    total = 0
+    current_start = current_end = None
+    for span in sorted(spans, key=lambda item: item.start_ns):
+        if current_end is None or span.start_ns > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = span.start_ns, span.end_ns
+        else:
+            current_end = max(current_end, span.end_ns)
+    if current_end is not None:
+        total += current_end - current_start
+    return round(total / 1_000_000, 2)
+
+
+class SpanRecorder:
+    def __init__(self, trace_id: str, start_ns: int | None = None):
+        self.trace_id = trace_id
+        self.start_ns = start_ns or perf_counter_ns()
+        # perf_counter 与墙上时间的差值，导出 OTLP 时换算
+        self._epoch_offset_ns = time.time_ns() - perf_counter_ns()
+        self.spans: List[StageSpan] = []
+        self.marks: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[StageSpan]:
+        span = StageSpan(name=name, start_ns=perf_counter_ns())
+        try:
+            yield span
+        finally:
+            span.end_ns = perf_counter_ns()
+            self.spans.append(span)
+
+    def record(self, name: str, start_ns: int, end_ns: int | None = None):
+        self.spans.append(StageSpan(name=name, start_ns=start_ns, end_ns=end_ns or perf_counter_ns()))
+
+    def mark(self, name: str) -> bool:
+        """记录距请求开始的时间点，只记第一次"""
+        if name in self.marks:
+            return False
+        self.marks[name] = round((perf_counter_ns() - self.start_ns) / 1_000_000, 2)
+        return True
+
+    def elapsed_ms(self, *names: str) -> float | None:
+        """若干阶段合并后的耗时，没有记录时返回 None"""
+        spans = [span for span in self.spans if span.name in names]
+        return _union_ms(spans) if spans else None
+
+    def timings(self) -> Dict[str, float]:
+        """阶段 -> 耗时(毫秒)，时间点类阶段为距请求开始的毫秒数"""
+        grouped: Dict[str, List[StageSpan]] = {}
+        for span in self.spans:
+            grouped.setdefault(span.name, []).append(span)
+        result = {name: _union_ms(spans) for name, spans in grouped.items()}
+        result.update(self.marks)
+        return result
+
+    def to_epoch_ns(self, value: int) -> int:
+        return value + self._epoch_offset_ns
+
+
+def bind_recorder(recorder: SpanRecorder):
+    """绑定到当前上下文，之后创建的 Task 都会继承"""
+    return _current_recorder.set(recorder)
+
+
+def reset_recorder(token):
+    """恢复 bind_recorder 之前的绑定"""
+    _current_recorder.reset(token)
+
+
+def current_recorder() -> SpanRecorder | None:
+    return _current_recorder.get()
+
+
+# =====================================================================
+#                     Haystack 组件 -> 阶段
+# =====================================================================
+
+_COMPONENT_NAME_TAG = "haystack.component.name"
+_COMPONENT_STAGES = {
+    "embedder": ChatStage.EMBEDDING,
+    "ranker": ChatStage.RERANK,
+    "chat_generator": ChatStage.LLM,
+    "tool_invoker": ChatStage.TOOL,
+}
+
+
+def component_stage(component_name: str) -> str | None:
+    if component_name.startswith("retriever_"):
+        return ChatStage.RETRIEVAL.value
+    stage = _COMPONENT_STAGES.get(component_name)
+    return stage.value if stage else None
+
+
+class StageTracer(Tracer):
+    """
+    Haystack Tracer：把 Pipeline / Agent 内组件的运行时间记录到当前请求的 SpanRecorder，
+    其余调用原样交给原有 Tracer（如已启用的 OpenTelemetry）
+    """
+
+    def __init__(self, inner: Tracer):
+        self.inner = inner
+
+    @contextlib.contextmanager
+    def trace(
+        self,
+        operation_name: str,
+        tags: Optional[Dict[str, Any]] = None,
+        parent_span: Optional[Span] = None,
+    ) -> Iterator[Span]:
+        recorder = current_recorder()
+        stage = None
+        if recorder is not None and operation_name.startswith("haystack.component.run"):
+            stage = component_stage(str((tags or {}).get(_COMPONENT_NAME_TAG, "")))
+
+        if stage is None:
+            with self.inner.trace(operation_name, tags=tags, parent_span=parent_span) as span:
+                yield span
+            return
+
+        with recorder.span(stage), self.inner.trace(operation_name, tags=tags, parent_span=parent_span) as span:
+            yield span
+
+    def current_span(self) -> Optional[Span]:
+        return self.inner.current_span()
+
+
+def install_stage_tracer():
+    """在已有 Tracer 外包一层 StageTracer，重复调用无副作用"""
+    actual = tracing.tracer.actual_tracer
+    if not isinstance(actual, StageTracer):
+        tracing.enable_tracing(StageTracer(actual))
+        logger.info("Stage tracer installed")
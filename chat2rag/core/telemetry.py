@@ -1,11 +1,140 @@
+"""
+链路追踪
+
+- Haystack 组件由 OpenInference 自动埋点，聊天请求的分阶段耗时在请求结束后导出
+- SamplingSpanProcessor 在根 span 结束时决定整条链路是否导出：按 trace_id 比例采样，
+  慢请求和出错的请求总是导出
+- 导出走 BatchSpanProcessor：有界队列、后台线程批量发送，队列满时丢弃，不阻塞请求
+"""
+
 import socket
 import subprocess
 import sys
+import threading
+from collections import OrderedDict
+from typing import List
 
-from openinference.instrumentation.haystack import HaystackInstrumentor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry import trace
 from opentelemetry.sdk import trace as trace_sdk
-from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+from chat2rag.core.spans import SpanRecorder
+
+logger = get_logger(__name__)
+
+_TRACE_ID_LOW_BITS = (1 << 64) - 1
+
+_tracer_provider: trace_sdk.TracerProvider | None = None
+_sampling_processor: "SamplingSpanProcessor | None" = None
+_memory_exporter: InMemorySpanExporter | None = None
+
+
+class SamplingSpanProcessor(SpanProcessor):
+    """
+    按 trace 缓冲已结束的 span，根 span 结束时决定整条链路是否交给下游导出
+
+    Args:
+        next_processor: 下游处理器（通常是 BatchSpanProcessor）
+        sample_rate: 按 trace_id 采样的比例，同一 trace 的结论一致
+        slow_ms: 根 span 耗时不低于该值时总是导出
+        max_pending_traces: 等待根 span 的链路数上限，超出时丢弃最早的链路
+        max_spans_per_trace: 单条链路缓冲的 span 上限
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        sample_rate: float = 0.1,
+        slow_ms: float = 3000,
+        max_pending_traces: int = 1024,
+        max_spans_per_trace: int = 256,
+    ):
+        self._next = next_processor
+        self._rate_bound = int(min(max(sample_rate, 0.0), 1.0) * _TRACE_ID_LOW_BITS)
+        self._slow_ns = int(slow_ms * 1_000_000)
+        self._max_pending = max_pending_traces
+        self._max_spans = max_spans_per_trace
+        self._pending: OrderedDict[int, List[ReadableSpan]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.sampled_traces = 0
+        self.discarded_traces = 0
+        self.dropped_spans = 0
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+
+        with self._lock:
+            if not is_root:
+                spans = self._pending.setdefault(trace_id, [])
+                if len(spans) < self._max_spans:
+                    spans.append(span)
+                else:
+                    self.dropped_spans += 1
+                while len(self._pending) > self._max_pending:
+                    _, evicted = self._pending.popitem(last=False)
+                    self.dropped_spans += len(evicted)
+                return
+            spans = self._pending.pop(trace_id, [])
+            export = self.should_export(span)
+            if export:
+                self.sampled_traces += 1
+            else:
+                self.discarded_traces += 1
+
+        if not export:
+            return
+        for item in spans:
+            self._next.on_end(item)
+        self._next.on_end(span)
+
+    def should_export(self, root: ReadableSpan) -> bool:
+        if (root.context.trace_id & _TRACE_ID_LOW_BITS) < self._rate_bound:
+            return True
+        if root.status.status_code == StatusCode.ERROR:
+            return True
+        return (root.end_time or 0) - (root.start_time or 0) >= self._slow_ns
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._pending.clear()
+        self._next.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+
+def create_tracer_provider(
+    exporter: SpanExporter,
+    sample_rate: float | None = None,
+    slow_ms: float | None = None,
+) -> trace_sdk.TracerProvider:
+    """采样 -> 有界批量导出 -> exporter"""
+    global _sampling_processor
+
+    batch_processor = BatchSpanProcessor(
+        exporter,
+        max_queue_size=CONFIG.TELEMETRY_QUEUE_SIZE,
+        max_export_batch_size=min(CONFIG.TELEMETRY_BATCH_SIZE, CONFIG.TELEMETRY_QUEUE_SIZE),
+        schedule_delay_millis=CONFIG.TELEMETRY_EXPORT_INTERVAL_MS,
+    )
+    _sampling_processor = SamplingSpanProcessor(
+        batch_processor,
+        sample_rate=CONFIG.TELEMETRY_SAMPLE_RATE if sample_rate is None else sample_rate,
+        slow_ms=CONFIG.TELEMETRY_SLOW_MS if slow_ms is None else slow_ms,
+        max_pending_traces=CONFIG.TELEMETRY_MAX_PENDING_TRACES,
+    )
+    tracer_provider = trace_sdk.TracerProvider()
+    tracer_provider.add_span_processor(_sampling_processor)
+    return tracer_provider
 
 
 def is_port_in_use(port):
@@ -23,14 +152,81 @@ def ensure_telemetry_server():
 
 def setup_telemetry():
     """
-    Setup Phoenix telemetry.
+    初始化链路追踪
 
-    Prerequisites:
-        Phoenix server must be running:
-        $ python -m phoenix.server.main serve
+    默认导出到 TELEMETRY_ENDPOINT（如 Phoenix: python -m phoenix.server.main serve），
+    TELEMETRY_EXPORTER=memory 时导出到进程内，供测试读取
     """
-    ensure_telemetry_server()
-    endpoint = "http://localhost:6006/v1/traces"
-    tracer_provider = trace_sdk.TracerProvider()
-    tracer_provider.add_span_processor(SimpleSpanProcessor(OTLPSpanExporter(endpoint)))
+    global _tracer_provider, _memory_exporter
+
+    if _tracer_provider is not None:
+        return _tracer_provider
+
+    if CONFIG.TELEMETRY_EXPORTER == "memory":
+        _memory_exporter = InMemorySpanExporter()
+        exporter = _memory_exporter
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        if CONFIG.TELEMETRY_LAUNCH_PHOENIX:
+            ensure_telemetry_server()
+        exporter = OTLPSpanExporter(CONFIG.TELEMETRY_ENDPOINT)
+
+    tracer_provider = create_tracer_provider(exporter)
+
+    from openinference.instrumentation.haystack import HaystackInstrumentor
+
     HaystackInstrumentor().instrument(tracer_provider=tracer_provider)
+    _tracer_provider = tracer_provider
+    logger.info(
+        f"Telemetry exporter={CONFIG.TELEMETRY_EXPORTER}, sample_rate={CONFIG.TELEMETRY_SAMPLE_RATE}, "
+        f"slow_ms={CONFIG.TELEMETRY_SLOW_MS}"
+    )
+    return tracer_provider
+
+
+def shutdown_telemetry():
+    """导出队列中剩余的 span"""
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+
+
+def get_memory_exporter() -> InMemorySpanExporter | None:
+    return _memory_exporter
+
+
+def get_telemetry_stats() -> dict:
+    if _sampling_processor is None:
+        return {}
+    return {
+        "sampled_traces": _sampling_processor.sampled_traces,
+        "discarded_traces": _sampling_processor.discarded_traces,
+        "dropped_spans": _sampling_processor.dropped_spans,
+    }
+
+
+def export_spans(
+    recorder: SpanRecorder,
+    error: str | None = None,
+    tracer_provider: trace_sdk.TracerProvider | None = None,
+):
+    """请求结束后把分阶段耗时作为一条链路导出，只写入内存队列"""
+    tracer_provider = tracer_provider or _tracer_provider
+    if tracer_provider is None:
+        return
+
+    tracer = tracer_provider.get_tracer("chat2rag.chat")
+    root = tracer.start_span(
+        "chat.request",
+        start_time=recorder.to_epoch_ns(recorder.start_ns),
+        attributes={"chat2rag.message_id": recorder.trace_id},
+    )
+    context = trace.set_span_in_context(root)
+    for span in recorder.spans:
+        child = tracer.start_span(span.name, context=context, start_time=recorder.to_epoch_ns(span.start_ns))
+        child.end(end_time=recorder.to_epoch_ns(span.end_ns))
+    for name, offset_ms in recorder.marks.items():
+        root.add_event(name, timestamp=recorder.to_epoch_ns(recorder.start_ns + int(offset_ms * 1_000_000)))
+    if error:
+        root.set_status(Status(StatusCode.ERROR, error))
+    root.end()
@@ -4,7 +4,7 @@ from .command import Command, CommandCategory, CommandVariant
 from .expression import RobotExpression
 from .file import File, FileVersion
 from .flow import FlowData
-from .metric import Metric
+from .metric import Metric, MetricRollup
 from .models import ModelLatency, ModelProvider, ModelSource
 from .permission import Permission, PermissionType
 from .prompt import Prompt, PromptVersion
@@ -19,6 +19,7 @@ __all__ = [
     "SensitiveWords",
     "FlowData",
     "Metric",
+    "MetricRollup",
     "Command",
     "CommandCategory",
     "CommandVariant",
@@ -59,12 +59,18 @@ class Metric(BaseModel, TimestampMixin):
     document_count = fields.IntField(default=0, description="检索的文档数量")
     document_ms = fields.FloatField(default=0.0, description="文档检索耗时(毫秒)")
     tool_ms = fields.FloatField(default=0.0, description="工具调用耗时(毫秒)")
+    pipeline_ms = fields.FloatField(null=True, description="Pipeline 获取/构建耗时(毫秒)")
     first_response_ms = fields.FloatField(null=True, description="首次响应耗时(毫秒)")
+    first_audio_ms = fields.FloatField(null=True, description="首段音频耗时(毫秒)")
     total_ms = fields.FloatField(null=True, description="总响应耗时(毫秒)")
+    stage_timings = fields.JSONField(null=True, description="各阶段耗时(毫秒)，见 ChatStage")
 
     # Token计数
     input_tokens = fields.IntField(default=0, description="输入token数量")
     output_tokens = fields.IntField(default=0, description="输出token数量")
+    cached_tokens = fields.IntField(default=0, description="命中上游前缀缓存的输入token数量")
+    prompt_prefix_hash = fields.CharField(max_length=16, null=True, description="静态提示词前缀哈希")
+    prompt_prefix_tokens = fields.IntField(null=True, description="静态提示词前缀估算token数量")
 
     # 结果和错误信息
     tool_arguments = fields.JSONField(null=True, description="工具调用参数")
@@ -90,3 +96,35 @@ class Metric(BaseModel, TimestampMixin):
         table = "metrics"
         # Tortoise ORM 中的索引需要在数据库层面单独处理
         # 或者使用 raw SQL 创建 TimescaleDB hypertable
+
+
+class MetricRollup(BaseModel):
+    """聊天指标按时间桶的预聚合表，按 (粒度, 时间桶, 知识库, 模型) 维护"""
+
+    id = fields.IntField(primary_key=True)
+    granularity = fields.CharField(max_length=8, description="时间粒度：minute/hour/day")
+    bucket = fields.DatetimeField(description="时间桶起点")
+    collections = fields.CharField(max_length=255, default="", description="使用的知识库名称，逗号分隔")
+    model = fields.CharField(max_length=100, default="", description="使用的模型名称")
+
+    count = fields.IntField(default=0, description="消息数")
+    error_count = fields.IntField(default=0, description="出错的消息数")
+    input_tokens = fields.BigIntField(default=0, description="输入token数量")
+    output_tokens = fields.BigIntField(default=0, description="输出token数量")
+    cached_tokens = fields.BigIntField(default=0, description="命中前缀缓存的输入token数量")
+
+    # 耗时：总和用于平均值，直方图用于估算分位数
+    first_response_count = fields.IntField(default=0, description="有首次响应耗时的消息数")
+    first_response_sum = fields.FloatField(default=0.0, description="首次响应耗时总和(毫秒)")
+    first_response_hist = fields.JSONField(default=dict, description="首次响应耗时直方图")
+    total_count = fields.IntField(default=0, description="有总耗时的消息数")
+    total_sum = fields.FloatField(default=0.0, description="总耗时总和(毫秒)")
+    total_hist = fields.JSONField(default=dict, description="总耗时直方图")
+    stage_hist = fields.JSONField(default=dict, description="各阶段耗时直方图")
+
+    update_time = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "metric_rollups"
+        unique_together = (("granularity", "bucket", "collections", "model"),)
+        indexes = [("granularity", "bucket")]
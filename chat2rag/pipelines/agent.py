@@ -2,21 +2,24 @@ from typing import Any, Callable, Dict, List
 
 from haystack import AsyncPipeline
 from haystack.components.agents import Agent
-from haystack.components.embedders import OpenAITextEmbedder
-from haystack.components.generators.chat import OpenAIChatGenerator
 from haystack.components.joiners import DocumentJoiner
 from haystack.dataclasses import ChatMessage
 from haystack.utils import Secret
-from haystack_integrations.components.retrievers.qdrant import QdrantEmbeddingRetriever
-from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
 from qdrant_client.models import Filter
 
-from chat2rag.components import MultimodalChatPromptBuilder, OpenRanker
+from chat2rag.components import MultimodalChatPromptBuilder, MultiQueryRetriever, OpenRanker
 from chat2rag.config import CONFIG
+from chat2rag.core.enums import ModelCapability
 from chat2rag.core.logger import get_logger
+from chat2rag.models.models import ModelProvider, ModelSource
 from chat2rag.pipelines.base import BasePipeline
+from chat2rag.services.model_service import model_source_service
+from chat2rag.services.query_rewrite_service import query_rewrite_service
 from chat2rag.services.tool_service import mcp_service
-from chat2rag.utils.merge_kwargs import recursive_tuple_to_dict
+from chat2rag.utils.client_pool import client_pool
+from chat2rag.utils.merge_kwargs import merge_generation_kwargs, recursive_tuple_to_dict
+from chat2rag.utils.pipeline_cache import create_pipeline
+from chat2rag.utils.prompt_layout import PromptLayout
 from chat2rag.utils.qdrant_store import detect_vector_mode, get_client
 
 logger = get_logger(__name__)
@@ -57,6 +60,9 @@ class AgentPipeline(BasePipeline[AsyncPipeline]):
             loaded_tools, tool_sources = await mcp_service.get_by_names(self._tool_list)
             if loaded_tools:
                 self._tools.extend(loaded_tools)
+                if CONFIG.PROMPT_LAYOUT == PromptLayout.PREFIX_STABLE:
+                    # 工具定义的顺序与请求中的顺序无关，保证前缀一致
+                    self._tools.sort(key=lambda tool: getattr(tool, "name", ""))
                 self._tool_sources = tool_sources
             else:
                 logger.warning(f"Failed to load tools: {self._tool_list}")
@@ -70,36 +76,20 @@ class AgentPipeline(BasePipeline[AsyncPipeline]):
     def _initialize_pipeline(self) -> AsyncPipeline:
         try:
             pipeline = AsyncPipeline()
-            pipeline.add_component(
-                "embedder",
-                OpenAITextEmbedder(
-                    api_base_url=CONFIG.EMBEDDING_OPENAI_URL,
-                    api_key=Secret.from_token(CONFIG.EMBEDDING_API_KEY),
-                    model=CONFIG.EMBEDDING_MODEL,
-                    dimensions=CONFIG.EMBEDDING_DIMENSIONS,
-                ),
-            )
+            # 组件不能跨 Pipeline 共享，检索器每个 Pipeline 单独创建，文档存储从 client_pool 复用；
+            # 问题在 Pipeline 外由 query_rewrite_service 扩写并批量编码，各知识库共用同一组查询向量
             for idx, collection in enumerate(self._collections):
                 retriever_name = f"retriever_{idx}"
                 vector_mode = self._vector_modes.get(collection)
                 use_sparse = vector_mode in ("hybrid", "dense")
 
-                document_store = QdrantDocumentStore(
-                    location=CONFIG.QDRANT_LOCATION,
-                    embedding_dim=CONFIG.EMBEDDING_DIMENSIONS,
-                    index=collection,
-                    use_sparse_embeddings=use_sparse,
-                )
-                document_store._async_client = get_client()
+                document_store = client_pool.get_document_store(collection, use_sparse)
                 pipeline.add_component(
                     retriever_name,
-                    QdrantEmbeddingRetriever(
+                    MultiQueryRetriever(
                         document_store=document_store, score_threshold=0.55
                     ),
                 )
-                pipeline.connect(
-                    "embedder.embedding", f"{retriever_name}.query_embedding"
-                )
 
             pipeline.add_component("doc_joiner", DocumentJoiner())
 
@@ -130,10 +120,10 @@ class AgentPipeline(BasePipeline[AsyncPipeline]):
             pipeline.add_component(
                 "agent",
                 Agent(
-                    chat_generator=OpenAIChatGenerator(
-                        api_key=Secret.from_token(self._api_key),
+                    chat_generator=client_pool.get_chat_generator(
                         model=self._model,
                         api_base_url=self._api_base_url,
+                        api_key=self._api_key,
                         generation_kwargs=self._generation_kwargs,
                     ),
                     raise_on_tool_invocation_failure=False,
@@ -164,16 +154,19 @@ class AgentPipeline(BasePipeline[AsyncPipeline]):
         extra_params: Dict[str, Any] = {},
         streaming_callback: Callable | None = None,
     ):
+        # 不检索知识库时不需要编码问题
+        query_embeddings = (await query_rewrite_service.expand(query)).embeddings if self._collections else []
+
         retriever_params = {}
         for idx in range(len(self._collections)):
             retriever_params[f"retriever_{idx}"] = {
+                "query_embeddings": query_embeddings,
                 "top_k": CONFIG.DENSE_TOP_K if CONFIG.RERANK_ENABLED else top_k,
                 "filters": filters,
                 "score_threshold": 0.55 if CONFIG.RERANK_ENABLED else score_threshold,
             }
 
         run_data = {
-            "embedder": {"text": query},
             **retriever_params,
             "builder": {
                 "template": messages,
@@ -192,12 +185,46 @@ class AgentPipeline(BasePipeline[AsyncPipeline]):
         logger.debug(f"Starting pipeline.run_async for query: {query[:50]}...")
         result = await self.pipeline.run_async(
             run_data,
-            include_outputs_from={"ranker"}
-            if CONFIG.RERANK_ENABLED
-            else {"doc_joiner"},
+            include_outputs_from={"builder", "ranker" if CONFIG.RERANK_ENABLED else "doc_joiner"},
         )
         logger.debug("pipeline.run_async completed")
         return result
 
     def get_tool_sources(self) -> Dict[str, str]:
         return self._tool_sources
+
+    def get_tools(self) -> List:
+        return self._tools
+
+
+async def create_agent_pipeline(
+    model: str,
+    collections: List[str],
+    tools: List[str],
+    generation_kwargs: Dict[str, Any] | str | None = None,
+    capability: ModelCapability = ModelCapability.TEXT,
+    extra_log: str = "Agent Stage",
+) -> AgentPipeline:
+    """
+    解析模型来源并获取缓存的 AgentPipeline
+
+    请求与预热共用，保证同一配置得到同一个缓存键
+    """
+    model_source: ModelSource = await model_source_service.get_best_source(
+        model, capability=capability, extra_log=extra_log
+    )
+    model_provider: ModelProvider = await model_source.provider
+    generation_kwargs = merge_generation_kwargs(
+        generation_kwargs,
+        model_source.generation_kwargs,
+        CONFIG.GENERATION_KWARGS,
+    )
+    return await create_pipeline(
+        AgentPipeline,
+        collections=collections,
+        model=model_source.name,
+        tools=tools if capability == ModelCapability.TEXT else [],
+        api_base_url=model_provider.base_url,
+        api_key=model_provider.api_key,
+        generation_kwargs=generation_kwargs,
+    )
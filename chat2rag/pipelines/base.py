@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Generic, Type, TypeVar
 
@@ -12,15 +13,19 @@ T = TypeVar("T")
 class BasePipeline(Generic[T], ABC):
     def __init__(self):
         self._initialized = False
+        self._init_lock = asyncio.Lock()
         self.pipeline: Type[T] = None
 
     async def initialize(self):
-        """异步初始化方法"""
-        if not self._initialized:
-            await self._prepare_async_resources()
-            self.pipeline = self._initialize_pipeline()
-            self.warm_up()
-            self._initialized = True
+        """异步初始化方法；预热与请求可能同时初始化同一个缓存实例，需加锁"""
+        if self._initialized:
+            return self
+        async with self._init_lock:
+            if not self._initialized:
+                await self._prepare_async_resources()
+                self.pipeline = self._initialize_pipeline()
+                self.warm_up()
+                self._initialized = True
         return self
 
     async def _prepare_async_resources(self):
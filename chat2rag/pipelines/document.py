@@ -2,18 +2,17 @@ import time
 from typing import Any, Dict, List
 
 from haystack import AsyncPipeline
-from haystack.components.embedders import OpenAIDocumentEmbedder, OpenAITextEmbedder
 from haystack.components.writers import DocumentWriter
 from haystack.dataclasses import Document
 from haystack.utils import Secret
-from haystack_integrations.components.retrievers.qdrant import QdrantEmbeddingRetriever
-from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
 from qdrant_client.models import Filter
 
-from chat2rag.components import OpenRanker
+from chat2rag.components import MultiQueryRetriever, OpenRanker
 from chat2rag.config import CONFIG
 from chat2rag.core.logger import get_logger
 from chat2rag.pipelines.base import BasePipeline
+from chat2rag.services.query_rewrite_service import query_rewrite_service
+from chat2rag.utils.client_pool import client_pool
 from chat2rag.utils.qdrant_store import detect_vector_mode, get_client
 
 logger = get_logger(__name__)
@@ -33,29 +32,12 @@ class DocumentSearchPipeline(BasePipeline):
     def _initialize_pipeline(self) -> AsyncPipeline:
         try:
             pipeline = AsyncPipeline()
-            embedder = OpenAITextEmbedder(
-                api_base_url=CONFIG.EMBEDDING_OPENAI_URL,
-                api_key=Secret.from_token(CONFIG.EMBEDDING_API_KEY),
-                model=CONFIG.EMBEDDING_MODEL,
-                dimensions=CONFIG.EMBEDDING_DIMENSIONS,
-            )
 
             use_sparse = self._vector_mode in ("hybrid", "dense")
+            document_store = client_pool.get_document_store(self._qdrant_index, use_sparse)
 
-            document_store = QdrantDocumentStore(
-                location=CONFIG.QDRANT_LOCATION,
-                embedding_dim=CONFIG.EMBEDDING_DIMENSIONS,
-                index=self._qdrant_index,
-                use_sparse_embeddings=use_sparse,
-            )
-
-            document_store._async_client = get_client()
-
-            retriever = QdrantEmbeddingRetriever(document_store=document_store)
-
-            pipeline.add_component("embedder", embedder)
+            retriever = MultiQueryRetriever(document_store=document_store)
             pipeline.add_component("retriever", retriever)
-            pipeline.connect("embedder.embedding", "retriever.query_embedding")
 
             if CONFIG.RERANK_ENABLED:
                 ranker = OpenRanker(
@@ -79,6 +61,7 @@ class DocumentSearchPipeline(BasePipeline):
         top_k: int = 5,
         score_threshold: float = CONFIG.SCORE_THRESHOLD,
         filters: Dict[str, Any] | Filter | None = None,
+        rewrite: bool = False,
     ) -> dict:
         """
         Run the Document search pipeline
@@ -88,6 +71,7 @@ class DocumentSearchPipeline(BasePipeline):
             top_k (int): The number of documents to be returned (after rerank)
             score_threshold (float): The minimum similarity score for a document to be retrieved
             filters (Dict[str, Any]): The type of documents to be retrieved.
+            rewrite (bool): Whether to search with the rewritten query variants as well
 
         Returns:
             dict: The search results
@@ -97,9 +81,10 @@ class DocumentSearchPipeline(BasePipeline):
         )
         start_time = time.time()
         try:
+            expansion = await query_rewrite_service.expand(query, rewrite=rewrite)
             run_data = {
-                "embedder": {"text": query},
                 "retriever": {
+                    "query_embeddings": expansion.embeddings,
                     "top_k": CONFIG.DENSE_TOP_K if CONFIG.RERANK_ENABLED else top_k,
                     "score_threshold": score_threshold,
                     "filters": filters,
@@ -139,21 +124,10 @@ class DocumentWriterPipeline(BasePipeline):
         try:
             pipeline = AsyncPipeline()
 
-            embedder = OpenAIDocumentEmbedder(
-                api_base_url=CONFIG.EMBEDDING_OPENAI_URL,
-                api_key=Secret.from_token(CONFIG.EMBEDDING_API_KEY),
-                model=CONFIG.EMBEDDING_MODEL,
-                dimensions=CONFIG.EMBEDDING_DIMENSIONS,
-            )
+            embedder = client_pool.create_document_embedder()
 
             use_sparse = self._vector_mode in ("hybrid", "dense")
-            document_store = QdrantDocumentStore(
-                location=CONFIG.QDRANT_LOCATION,
-                embedding_dim=CONFIG.EMBEDDING_DIMENSIONS,
-                use_sparse_embeddings=use_sparse,
-                index=self._qdrant_index,
-            )
-            document_store._async_client = get_client()
+            document_store = client_pool.get_document_store(self._qdrant_index, use_sparse)
             writer = DocumentWriter(document_store=document_store)
 
             pipeline.add_component("embedder", embedder)
@@ -24,6 +24,13 @@ class BaseASR(ABC):
         """
         pass
 
+    @abstractmethod
+    def stream_chunk(self, speech_chunk, cache: dict, is_final: bool = False) -> str:
+        """
+        增量识别一个音频块，cache 在同一路音频的多次调用间共享
+        """
+        pass
+
     @abstractmethod
     async def stream_transcribe(self, audio_file: str) -> AsyncGenerator[str, None]:
         """
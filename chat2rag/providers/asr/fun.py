@@ -1,6 +1,7 @@
 import time
 from typing import AsyncGenerator
 
+import numpy as np
 import soundfile as sf
 import torch
 from funasr import AutoModel
@@ -44,11 +45,16 @@ class FunASR(BaseASR):
             logger.error("初始化ASR流式模型失败: %s", e)
             raise e
 
-    def transcribe(self, audio_file: str) -> str:
+    @property
+    def stream_chunk_samples(self) -> int:
+        """流式模型每次送入的采样点数（16kHz 下 600ms）"""
+        return self.chunk_size[1] * 960
+
+    def transcribe(self, audio_file: str | np.ndarray) -> str:
         """
         使用ASR识别音频文件
         Args:
-            audio_file (str): 音频文件路径
+            audio_file (str | np.ndarray): 音频文件路径，或 16kHz float32 采样
         Returns:
             str: 识别结果
         """
@@ -73,27 +79,38 @@ class FunASR(BaseASR):
             logger.error("ASR识别失败: %s", e)
             raise e
 
+    def stream_chunk(self, speech_chunk: np.ndarray, cache: dict, is_final: bool = False) -> str:
+        """
+        增量识别一个音频块
+        Args:
+            speech_chunk: 16kHz float32 采样，通常为 stream_chunk_samples 个
+            cache: 同一路音频在多次调用间共享的识别状态
+            is_final: 是否为最后一块
+        Returns:
+            str: 本块新增的识别文本
+        """
+        res = self.stream_model.generate(
+            input=speech_chunk,
+            cache=cache,
+            is_final=is_final,
+            chunk_size=self.chunk_size,
+            encoder_chunk_look_back=self.encoder_chunk_look_back,
+            decoder_chunk_look_back=self.decoder_chunk_look_back,
+        )
+        return res[0].get("text", "") if res else ""
+
     async def stream_transcribe(self, audio_file: str) -> AsyncGenerator[str, None]:
         logger.info("开始ASR流式识别...")
         try:
             start_time = time.time()
-            speech, _ = sf.read(audio_file)
-            chunk_stride = self.chunk_size[1] * 960
-
             cache = {}
-            total_chunk_num = int(len((speech) - 1) / chunk_stride + 1)
-            for i in range(total_chunk_num):
-                speech_chunk = speech[i * chunk_stride : (i + 1) * chunk_stride]
-                is_final = i == total_chunk_num - 1
-                res = self.stream_model.generate(
-                    input=speech_chunk,
-                    cache=cache,
-                    is_final=is_final,
-                    chunk_size=self.chunk_size,
-                    encoder_chunk_look_back=self.encoder_chunk_look_back,
-                    decoder_chunk_look_back=self.decoder_chunk_look_back,
-                )
-                yield res[0].get("text")
+            # 按块读取，不把整段音频读入内存；多读一块用于判断是否为最后一块
+            blocks = sf.blocks(audio_file, blocksize=self.stream_chunk_samples, dtype="float32")
+            current = next(blocks, None)
+            while current is not None:
+                following = next(blocks, None)
+                yield self.stream_chunk(current, cache, is_final=following is None)
+                current = following
             logger.info("ASR流式识别完成，耗时: %.2f秒", time.time() - start_time)
         except Exception as e:
             logger.error("ASR流式识别失败: %s", e)
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import mmap
+import os
+from pathlib import Path
+
+from cachetools import LRUCache
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+from chat2rag.schemas.chat import Audio
+
+logger = get_logger(__name__)
+
+
+class TTSAudioCache:
+    """
+    内容寻址的 TTS 音频缓存
+
+    键为 (provider, voice, format, sample_rate, speed, 句子文本) 的哈希：
+    - 内存层：按字节数计量的 LRU
+    - 磁盘层：每条音频一个文件，读取时通过 mmap 映射，命中后提升到内存层
+    """
+
+    def __init__(self, cache_dir: Path, memory_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self._memory: LRUCache = LRUCache(maxsize=memory_bytes, getsizeof=len)
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(audio_config: Audio, text: str) -> str:
+        raw = "\x1f".join(
+            (
+                audio_config.provider,
+                audio_config.voice,
+                audio_config.format,
+                str(audio_config.sample_rate),
+                str(audio_config.speed),
+                text.strip(),
+            )
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.audio"
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        try:
+            self._memory[key] = audio
+        except ValueError:
+            # 单条音频超过内存层上限，只保留在磁盘层
+            pass
+
+    def _read_disk(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[:]
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning(f"Failed to read TTS cache file: {path}")
+            return None
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(audio)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"Failed to write TTS cache file: {path}")
+
+    def get_memory(self, audio_config: Audio, text: str) -> bytes | None:
+        """只查内存层，不产生 IO"""
+        audio = self._memory.get(self.make_key(audio_config, text))
+        if audio is not None:
+            self._hits += 1
+        return audio
+
+    async def get(self, audio_config: Audio, text: str) -> bytes | None:
+        key = self.make_key(audio_config, text)
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._hits += 1
+            return audio
+
+        audio = await asyncio.to_thread(self._read_disk, key)
+        if audio is not None:
+            self._disk_hits += 1
+            self._remember(key, audio)
+            return audio
+
+        self._misses += 1
+        return None
+
+    async def put(self, audio_config: Audio, text: str, audio: bytes, persist: bool = False) -> None:
+        """写入内存层；persist=True 时同时落盘（用于固定话术的预合成）"""
+        if not audio:
+            return
+        key = self.make_key(audio_config, text)
+        self._remember(key, audio)
+        if persist:
+            await asyncio.to_thread(self._write_disk, key, audio)
+
+    async def contains(self, audio_config: Audio, text: str) -> bool:
+        key = self.make_key(audio_config, text)
+        if key in self._memory:
+            return True
+        return await asyncio.to_thread(self._path(key).exists)
+
+    def stats(self) -> dict:
+        return {
+            "memory_items": len(self._memory),
+            "memory_bytes": self._memory.currsize,
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+        }
+
+
+tts_audio_cache = TTSAudioCache(
+    cache_dir=CONFIG.TTS_CACHE_DIR,
+    memory_bytes=CONFIG.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+)
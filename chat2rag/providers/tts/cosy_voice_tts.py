@@ -1,17 +1,28 @@
 import asyncio
 import os
 import threading
+from dataclasses import dataclass
+from functools import partial
 from typing import AsyncGenerator
 
 import dashscope
 from dashscope.audio.tts_v2 import AudioFormat, ResultCallback, SpeechSynthesizer
 
+from chat2rag.config import CONFIG
 from chat2rag.core.logger import get_logger
 from chat2rag.providers.tts.base import BaseTTS
+from chat2rag.providers.tts.pool import TTSSessionPool
 from chat2rag.schemas.chat import Audio
 
 logger = get_logger(__name__)
 
+# 进程级句子合成会话池，所有 CosyVoiceTTS 实例共享
+sentence_pool = TTSSessionPool(
+    size=CONFIG.TTS_POOL_SIZE,
+    max_concurrency=CONFIG.TTS_MAX_CONCURRENCY,
+    max_idle_sec=CONFIG.TTS_POOL_MAX_IDLE_SEC,
+)
+
 
 class SentenceTTSCallback(ResultCallback):
     def __init__(self, audio_queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
@@ -46,6 +57,36 @@ class SentenceTTSCallback(ResultCallback):
         logger.debug(f"CosyVoice event: {message}")
 
 
+@dataclass
+class SentenceSession:
+    """
+    句子合成会话：已建立 WebSocket 连接的合成器与其回调队列
+
+    每句仍需一次 run-task 握手，但连接在句子之间复用。dashscope 没有公开建连与重置接口，
+    与其自带的 SpeechSynthesizerObjectPool 一样调用私有方法。
+    """
+
+    synthesizer: SpeechSynthesizer
+    queue: asyncio.Queue
+
+    def is_alive(self) -> bool:
+        return self.synthesizer._SpeechSynthesizer__is_connected()
+
+    def reset(self) -> bool:
+        """等待上一句的任务清理完成后重置状态；任务失败或清理超时时不再复用"""
+        synthesizer = self.synthesizer
+        if not synthesizer._stopped.wait(timeout=1.0) or synthesizer._receiver_error is not None:
+            return False
+        synthesizer._SpeechSynthesizer__reset()
+        return self.is_alive()
+
+    def close(self) -> None:
+        try:
+            self.synthesizer.close()
+        except Exception as e:
+            logger.debug(f"Failed to close CosyVoice sentence session: {e}")
+
+
 class StreamSentenceCallback(ResultCallback):
     def __init__(self, audio_queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
         self.audio_queue = audio_queue
@@ -146,12 +187,6 @@ class CosyVoiceTTS(BaseTTS):
         self._text_buffer = ""
         self._finished_text = False
 
-        self._sentence_queue: asyncio.Queue | None = None
-        self._sentence_loop: asyncio.AbstractEventLoop | None = None
-        self._sentence_callback: SentenceTTSCallback | None = None
-        self._sentence_synthesizer: SpeechSynthesizer | None = None
-        self._sentence_lock: asyncio.Lock | None = None
-
         self._init_dashscope_api_key()
         super().__init__(audio_config)
 
@@ -214,44 +249,38 @@ class CosyVoiceTTS(BaseTTS):
         )
         return AudioFormat.WAV_24000HZ_MONO_16BIT
 
-    async def warm_up(self) -> None:
-        if self._sentence_synthesizer is not None:
-            return
-
-        self._sentence_queue = asyncio.Queue()
-        self._sentence_loop = asyncio.get_running_loop()
-        self._sentence_lock = asyncio.Lock()
-        self._sentence_callback = SentenceTTSCallback(
-            audio_queue=self._sentence_queue,
-            loop=self._sentence_loop,
-        )
+    @property
+    def pool_key(self) -> tuple:
+        return (self.voice, self.format, self.sample_rate, self.speed)
 
-        self._sentence_synthesizer = SpeechSynthesizer(
+    def _build_sentence_session(self, loop: asyncio.AbstractEventLoop) -> SentenceSession:
+        """在线程中执行：创建合成器并建立连接"""
+        queue: asyncio.Queue = asyncio.Queue()
+        callback = SentenceTTSCallback(audio_queue=queue, loop=loop)
+        synthesizer = SpeechSynthesizer(
             model="cosyvoice-v3-flash",
             voice=self.voice,
             format=self._get_audio_format(),
-            callback=self._sentence_callback,
+            callback=callback,
             speech_rate=self.speed,
         )
-        logger.info(
-            f"CosyVoice sentence synthesizer warmed up with voice={self.voice}, format={self.format}, sample_rate={self.sample_rate}"
-        )
+        # 句子结束后保留连接，供下一句复用
+        synthesizer._close_ws_after_use = False
+        try:
+            synthesizer._SpeechSynthesizer__connect()
+        except Exception:
+            synthesizer.close()
+            raise
+        return SentenceSession(synthesizer=synthesizer, queue=queue)
 
-    async def _rebuild_sentence_synthesizer(self) -> None:
-        self._sentence_queue = asyncio.Queue()
-        self._sentence_callback = SentenceTTSCallback(
-            audio_queue=self._sentence_queue,
-            loop=self._sentence_loop,
-        )
+    def _sentence_builder(self):
+        return partial(self._build_sentence_session, asyncio.get_running_loop())
 
-        self._sentence_synthesizer = SpeechSynthesizer(
-            model="cosyvoice-v3-flash",
-            voice=self.voice,
-            format=self._get_audio_format(),
-            callback=self._sentence_callback,
-            speech_rate=self.speed,
+    async def warm_up(self) -> None:
+        await sentence_pool.prefill(self.pool_key, self._sentence_builder())
+        logger.info(
+            f"CosyVoice sentence pool warmed up with voice={self.voice}, format={self.format}, sample_rate={self.sample_rate}"
         )
-        logger.debug("CosyVoice sentence synthesizer rebuilt")
 
     async def connect(self):
         self._audio_queue = asyncio.Queue()
@@ -370,10 +399,6 @@ class CosyVoiceTTS(BaseTTS):
         self._synthesizer = None
         self._callback = None
 
-        self._sentence_synthesizer = None
-        self._sentence_callback = None
-        self._sentence_queue = None
-
         logger.info("CosyVoice connection closed")
 
     def speak(self, text: str, voice: str = None) -> tuple[bytes, int]:
@@ -392,20 +417,21 @@ class CosyVoiceTTS(BaseTTS):
         if not text or not text.strip():
             return None
 
-        async with self._sentence_lock:
-            if self._sentence_synthesizer is None:
-                await self.warm_up()
-
+        # 从进程级池中取已连接的会话，多句可并发在途；正常完成的会话归还复用连接
+        async with sentence_pool.slot(self.pool_key):
+            session = None
+            completed = False
             try:
-                self._sentence_synthesizer.call(text)
+                session = await sentence_pool.acquire(self.pool_key, self._sentence_builder())
+                # dashscope 的 call 为同步调用，握手期间会阻塞，放到线程中执行
+                await asyncio.to_thread(session.synthesizer.call, text)
 
                 audio_chunks = []
                 while True:
                     try:
-                        audio = await asyncio.wait_for(
-                            self._sentence_queue.get(), timeout=timeout
-                        )
+                        audio = await asyncio.wait_for(session.queue.get(), timeout=timeout)
                         if audio is None:
+                            completed = True
                             break
                         audio_chunks.append(audio)
                     except asyncio.TimeoutError:
@@ -414,20 +440,21 @@ class CosyVoiceTTS(BaseTTS):
                         )
                         break
 
-                self._sentence_synthesizer = None
-                self._sentence_queue = asyncio.Queue()
-                asyncio.create_task(self._rebuild_sentence_synthesizer())
-
                 if audio_chunks:
                     return b"".join(audio_chunks)
                 return None
 
             except Exception as e:
                 logger.exception(f"speak_sentence error: {e}")
-                self._sentence_synthesizer = None
-                asyncio.create_task(self._rebuild_sentence_synthesizer())
                 return None
 
+            finally:
+                if session is not None:
+                    if completed:
+                        await sentence_pool.release(self.pool_key, session)
+                    else:
+                        sentence_pool.discard(session)
+
     async def speak_sentence_stream(
         self, text: str, timeout: float = 30.0
     ) -> AsyncGenerator[bytes, None]:
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Hashable
+
+from chat2rag.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TTSSessionPool:
+    """
+    进程级 TTS 会话池
+
+    按 (voice, format, sample_rate, speed) 等参数分组，每组预先建立若干已连接的合成会话，
+    合成完成后归还复用连接，取用后在后台补齐；同时限制每组同时在途的合成数量。
+    builder 为阻塞调用（建立连接），在线程中执行。
+
+    会话需提供 is_alive()、reset() 与 close()。回调绑定在创建时的事件循环上，
+    跨事件循环、连接已断开或空闲超过 max_idle_sec 的会话会被关闭丢弃。
+    """
+
+    def __init__(self, size: int = 2, max_concurrency: int = 3, max_idle_sec: float = 30.0):
+        self.size = size
+        self.max_concurrency = max_concurrency
+        self.max_idle_sec = max_idle_sec
+        self._idle: dict[Hashable, deque[tuple[asyncio.AbstractEventLoop, float, Any]]] = {}
+        self._semaphores: dict[Hashable, asyncio.Semaphore] = {}
+        self._refill_tasks: dict[Hashable, asyncio.Task] = {}
+        self._hits = 0
+        self._misses = 0
+
+    async def prefill(self, key: Hashable, builder: Callable[[], Any]) -> None:
+        """预热指定分组，补齐到池大小"""
+        missing = self.size - len(self._valid_idle(key))
+        if missing <= 0:
+            return
+
+        results = await asyncio.gather(
+            *(asyncio.to_thread(builder) for _ in range(missing)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to build TTS session for {key}: {result}")
+            else:
+                self._put(key, result)
+
+    async def acquire(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """取出一个可用会话，池为空时现场建立，并在后台补齐"""
+        idle = self._valid_idle(key)
+        if idle:
+            self._hits += 1
+            # 最近归还的连接最新鲜
+            _, _, session = idle.pop()
+        else:
+            self._misses += 1
+            session = await asyncio.to_thread(builder)
+
+        self._schedule_refill(key, builder)
+        return session
+
+    async def release(self, key: Hashable, session: Any) -> None:
+        """归还完成合成的会话；重置失败、连接已断开或池已满时关闭"""
+        try:
+            reusable = await asyncio.to_thread(session.reset)
+        except Exception:
+            logger.exception(f"Failed to reset TTS session for {key}")
+            reusable = False
+
+        if reusable:
+            self._put(key, session)
+        else:
+            self.discard(session)
+
+    def discard(self, session: Any) -> None:
+        """关闭会话；关闭连接会等待对端确认，在线程中执行"""
+        asyncio.get_running_loop().run_in_executor(None, session.close)
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        """限制同一分组同时在途的合成请求数"""
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            yield
+
+    def _put(self, key: Hashable, session: Any) -> None:
+        idle = self._valid_idle(key)
+        if len(idle) < self.size and session.is_alive():
+            idle.append((asyncio.get_running_loop(), time.monotonic(), session))
+        else:
+            self.discard(session)
+
+    def _valid_idle(self, key: Hashable) -> deque:
+        """丢弃其他事件循环的、已断开的和空闲过久的会话"""
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        idle = self._idle.setdefault(key, deque())
+        kept = deque()
+        for owner, since, session in idle:
+            if owner is loop and now - since <= self.max_idle_sec and session.is_alive():
+                kept.append((owner, since, session))
+            else:
+                self.discard(session)
+        self._idle[key] = kept
+        return kept
+
+    def _schedule_refill(self, key: Hashable, builder: Callable[[], Any]) -> None:
+        task = self._refill_tasks.get(key)
+        if task is not None and not task.done():
+            return
+        self._refill_tasks[key] = asyncio.create_task(self.prefill(key, builder))
+
+    def clear(self) -> None:
+        self._idle.clear()
+        self._semaphores.clear()
+        self._refill_tasks.clear()
+
+    def stats(self) -> dict:
+        return {
+            "groups": len(self._idle),
+            "idle": sum(len(idle) for idle in self._idle.values()),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
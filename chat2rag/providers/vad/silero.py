@@ -3,7 +3,7 @@ import torch
 from silero_vad import VADIterator, load_silero_vad
 
 from chat2rag.core.logger import get_logger
-from chat2rag.core.vad.base import VAD
+from .base import VAD
 
 logger = get_logger(__name__)
 
@@ -58,3 +58,34 @@ class SileroVAD(VAD):
             logger.debug("VAD states reset.")
         except Exception as e:
             logger.error(f"Error resetting VAD states: {e}")
+
+
+class SileroBatchVAD:
+    """
+    Silero VAD（ONNX）批量推理
+
+    模型隐状态和上下文由调用方按连接保存，多路连接的帧可以合并为一个 batch 推理。
+    每帧固定 512 个采样点（16kHz）。
+    """
+
+    sampling_rate = 16000
+    frame_samples = 512
+    context_samples = 64
+    state_size = 128
+
+    def __init__(self):
+        self.session = load_silero_vad(onnx=True).session
+        self._sr = np.array(self.sampling_rate, dtype=np.int64)
+
+    def infer(self, frames: np.ndarray, states: np.ndarray, contexts: np.ndarray):
+        """
+        Args:
+            frames: [B, 512] float32
+            states: [2, B, 128] float32
+            contexts: [B, 64] float32，上一帧末尾的采样点
+        Returns:
+            (语音概率 [B], 新状态 [2, B, 128], 新上下文 [B, 64])
+        """
+        x = np.concatenate([contexts, frames], axis=1)
+        out, states = self.session.run(None, {"input": x, "state": states, "sr": self._sr})
+        return out[:, 0], states, x[:, -self.context_samples :]
@@ -134,6 +134,7 @@ class PaginationParams(BaseSchema):
     Attributes:
         current: 页码，从 1 开始
         size: 每页条数，默认 20，最大 100
+        cursor: 游标，传入上一页返回的 nextCursor 时按游标翻页，忽略 current
 
     Computed:
         offset: 数据库查询偏移量 = (current - 1) * size
@@ -150,6 +151,7 @@ class PaginationParams(BaseSchema):
 
     current: int = Field(default=1, ge=1, description="页码（从1开始）", examples=[1])
     size: int = Field(default=10, ge=1, le=1000, description="每页条数（最大1000）", examples=[10])
+    cursor: str | None = Field(default=None, description="游标（上一页返回的 nextCursor）")
 
     @computed_field
     @property
@@ -277,6 +279,7 @@ class PaginatedData(BaseSchema, Generic[T]):
         total: 符合条件的总记录数
         current: 当前页码
         size: 每页条数
+        next_cursor: 下一页游标，没有更多数据时为 None
 
     Computed:
         pages: 总页数
@@ -298,6 +301,7 @@ class PaginatedData(BaseSchema, Generic[T]):
     total: int = Field(default=0, ge=0, description="总记录数", examples=[100])
     current: int = Field(default=1, ge=1, description="当前页码", examples=[1])
     size: int = Field(default=10, ge=1, description="每页条数", examples=[10])
+    next_cursor: str | None = Field(default=None, description="下一页游标")
 
     @computed_field
     @property
@@ -319,6 +323,7 @@ class PaginatedData(BaseSchema, Generic[T]):
         total: int,
         current: int = 1,
         size: int = 10,
+        next_cursor: str | None = None,
     ) -> "PaginatedData[T]":
         """
         创建分页数据的工厂方法
@@ -328,11 +333,12 @@ class PaginatedData(BaseSchema, Generic[T]):
             total: 总记录数
             current: 当前页码
             size: 每页条数
+            next_cursor: 下一页游标
 
         Returns:
             PaginatedData 实例
         """
-        return cls(items=items, total=total, current=current, size=size)
+        return cls(items=items, total=total, current=current, size=size, next_cursor=next_cursor)
 
 
 class PaginatedResponse(BaseResponse[PaginatedData[T]], Generic[T]):
@@ -361,6 +367,7 @@ class PaginatedResponse(BaseResponse[PaginatedData[T]], Generic[T]):
         current: int = 1,
         size: int = 10,
         msg: str = "OK",
+        next_cursor: str | None = None,
     ) -> "PaginatedResponse[T]":
         """
         创建分页响应的工厂方法
@@ -371,6 +378,7 @@ class PaginatedResponse(BaseResponse[PaginatedData[T]], Generic[T]):
             current: 当前页码
             size: 每页条数
             msg: 响应消息
+            next_cursor: 下一页游标
 
         Returns:
             PaginatedResponse 实例
@@ -378,7 +386,7 @@ class PaginatedResponse(BaseResponse[PaginatedData[T]], Generic[T]):
         return cls(
             code="0000",
             msg=msg,
-            data=PaginatedData.create(items, total, current, size),
+            data=PaginatedData.create(items, total, current, size, next_cursor),
         )
 
 
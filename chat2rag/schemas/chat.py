@@ -184,6 +184,15 @@ class ChatRequest(BaseSchema):
         return v
 
 
+class VoiceSessionRequest(ChatRequest):
+    """
+    语音会话配置：与 ChatRequest 相同，每句话的文本由语音识别得到
+    """
+
+    content: QueryContent | None = Field(default=None, description="无需填写，由语音识别结果替换")
+    modalities: list = Field(default=["text", "audio"], description='支持输出的模态，默认: ["text","audio"]')
+
+
 class StreamChunkV1(BaseSchema):
     object: str = Field("message", description="数据类型", examples=["message"])
     content: str = Field(
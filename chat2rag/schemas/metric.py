@@ -15,7 +15,10 @@ class MetricBase(BaseSchema):
     answer_image: str | None = None
     answer_video: str | None = None
     first_response_ms: float | None = None
+    first_audio_ms: float | None = None
     total_ms: float | None = None
+    pipeline_ms: float | None = None
+    stage_timings: Dict[str, float] | None = None
     model: str | None = None
     chat_id: str | None = None
     chat_rounds: int | None = None
@@ -26,6 +29,9 @@ class MetricBase(BaseSchema):
     retrieval_documents: Dict[str, List[Dict[str, Any]]] | None = None
     input_tokens: int = 0
     output_tokens: int = 0
+    cached_tokens: int = 0
+    prompt_prefix_hash: str | None = None
+    prompt_prefix_tokens: int | None = None
 
 
 class MetricData(MetricBase):
@@ -63,14 +69,35 @@ class MetricUpdate(BaseSchema):
     document_ms: float | None = None
     tool_ms: float | None = None
     first_response_ms: float | None = None
+    first_audio_ms: float | None = None
     total_ms: float | None = None
     input_tokens: int | None = None
     output_tokens: int | None = None
+    cached_tokens: int | None = None
     tool_result: Dict[str, Any] | None = None
     error_message: str | None = None
     meta_data: Dict[str, Any] | None = None
 
 
+class MetricRollupData(BaseSchema):
+    bucket: datetime | None = Field(None, description="时间桶起点，未按时间分组时为空")
+    collections: str | None = Field(None, description="知识库，未按知识库分组时为空")
+    model: str | None = Field(None, description="模型，未按模型分组时为空")
+    count: int = Field(0, description="消息数")
+    error_count: int = Field(0, description="出错的消息数")
+    input_tokens: int = Field(0, description="输入token数量")
+    output_tokens: int = Field(0, description="输出token数量")
+    cached_tokens: int = Field(0, description="命中前缀缓存的输入token数量")
+    avg_first_response_ms: float | None = Field(None, description="平均首次响应耗时(毫秒)")
+    p50_first_response_ms: float | None = Field(None, description="首次响应耗时 P50(毫秒，估算)")
+    p95_first_response_ms: float | None = Field(None, description="首次响应耗时 P95(毫秒，估算)")
+    avg_total_ms: float | None = Field(None, description="平均总耗时(毫秒)")
+    p50_total_ms: float | None = Field(None, description="总耗时 P50(毫秒，估算)")
+    p95_total_ms: float | None = Field(None, description="总耗时 P95(毫秒，估算)")
+    stage_p50_ms: Dict[str, float | None] = Field(default_factory=dict, description="各阶段耗时 P50(毫秒，估算)")
+    stage_p95_ms: Dict[str, float | None] = Field(default_factory=dict, description="各阶段耗时 P95(毫秒，估算)")
+
+
 class HotQuestionPoint(BaseSchema):
     id: str = Field(..., description="ID", examples=["2edcf681-f8d2-5188-afd6-b94c79b87c41"])
     text: str = Field(..., description="相似问题", examples=["地铁咋走啊"])
@@ -1,3 +1,6 @@
+from cachetools import TTLCache
+
+from chat2rag.config import CONFIG
 from chat2rag.core.crud import CRUDBase
 from chat2rag.core.exceptions import ValueAlreadyExist
 from chat2rag.models import RobotAction
@@ -7,6 +10,10 @@ from chat2rag.schemas.action import RobotActionCreate, RobotActionUpdate
 class RobotActionService(CRUDBase[RobotAction, RobotActionCreate, RobotActionUpdate]):
     def __init__(self):
         super().__init__(RobotAction)
+        self._active_cache: TTLCache = TTLCache(maxsize=1, ttl=CONFIG.PROMPT_CACHE_TTL)
+
+    def invalidate_cache(self):
+        self._active_cache.clear()
 
     async def create(self, obj_in: RobotActionCreate, exclude=None) -> RobotAction:
         if await self.model.filter(name=obj_in.name).exists():
@@ -14,7 +21,9 @@ class RobotActionService(CRUDBase[RobotAction, RobotActionCreate, RobotActionUpd
         if await self.model.filter(code=obj_in.code).exists():
             raise ValueAlreadyExist("该动作代码已存在")
 
-        return await super().create(obj_in, exclude)
+        obj = await super().create(obj_in, exclude)
+        self.invalidate_cache()
+        return obj
 
     async def update(self, id: int, obj_in: RobotActionUpdate, exclude=None) -> RobotAction:
         await self.get(id)
@@ -23,12 +32,20 @@ class RobotActionService(CRUDBase[RobotAction, RobotActionCreate, RobotActionUpd
         if obj_in.code and await self.model.filter(code=obj_in.code).exclude(id=id).exists():
             raise ValueAlreadyExist("该动作代码已存在")
 
-        return await super().update(id, obj_in, exclude)
+        obj = await super().update(id, obj_in, exclude)
+        self.invalidate_cache()
+        return obj
+
+    async def remove(self, id: int) -> None:
+        await super().remove(id)
+        self.invalidate_cache()
 
     async def get_active_action_list(self):
-        """Return CODE list"""
-        actions = await self.model.filter(is_active=True).all()
-        return [action.name for action in actions]
+        """Return name list, cached until actions change"""
+        if "active" not in self._active_cache:
+            actions = await self.model.filter(is_active=True).all()
+            self._active_cache["active"] = [action.name for action in actions]
+        return list(self._active_cache["active"])
 
     async def get_code_by_name(self, name: str = "") -> RobotAction:
         return await self.model.filter(name=name).first()
@@ -1,6 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
+from cachetools import TTLCache
+
+from chat2rag.config import CONFIG
 from chat2rag.core.logger import get_logger
 from chat2rag.core.security import (
     create_access_token,
@@ -9,7 +12,7 @@ from chat2rag.core.security import (
     sms_code_manager,
     verify_password,
 )
-from chat2rag.models import Permission, Role, Tenant, User, UserRole
+from chat2rag.models import Tenant, User
 from chat2rag.schemas.auth import (
     CurrentUserResponse,
     LoginRequest,
@@ -17,6 +20,7 @@ from chat2rag.schemas.auth import (
     SmsLoginRequest,
     TokenResponse,
 )
+from chat2rag.services.rbac_service import rbac_service
 
 logger = get_logger(__name__)
 
@@ -24,6 +28,16 @@ logger = get_logger(__name__)
 class AuthService:
     def __init__(self):
         self.token_expire_seconds = 60 * 60 * 24
+        # (租户, 用户) -> (RBAC 版本, 当前用户信息)，JWT 校验通过后的用户查询走缓存
+        self._user_cache: TTLCache = TTLCache(maxsize=CONFIG.RBAC_CACHE_SIZE, ttl=CONFIG.RBAC_CACHE_TTL)
+
+    def invalidate_user(self, user_id: int, tenant_id: int):
+        """用户信息变更后调用"""
+        self._user_cache.pop((tenant_id, user_id), None)
+
+    def invalidate(self):
+        """租户信息变更后调用"""
+        self._user_cache.clear()
 
     async def login(
         self, request: LoginRequest, client_ip: str = None
@@ -46,6 +60,7 @@ class AuthService:
         user.last_login_time = datetime.now()
         user.last_login_ip = client_ip
         await user.save()
+        self.invalidate_user(user.id, user.tenant_id)
 
         return await self._build_login_response(user, tenant)
 
@@ -70,6 +85,7 @@ class AuthService:
         user.last_login_time = datetime.now()
         user.last_login_ip = client_ip
         await user.save()
+        self.invalidate_user(user.id, user.tenant_id)
 
         return await self._build_login_response(user, tenant)
 
@@ -77,17 +93,23 @@ class AuthService:
         self, user_id: int, tenant_id: int
     ) -> Optional[CurrentUserResponse]:
         """获取当前用户信息"""
-        user = await User.filter(id=user_id, tenant_id=tenant_id).first()
+        key = (tenant_id, user_id)
+        cached = self._user_cache.get(key)
+        if cached is not None and cached[0] == rbac_service.version:
+            return cached[1]
+
+        version = rbac_service.version
+        user = await User.filter(id=user_id, tenant_id=tenant_id).select_related("tenant").first()
         if not user:
             return None
 
-        tenant = await Tenant.filter(id=user.tenant_id).first()
+        tenant = user.tenant
         if not tenant:
             return None
 
         roles, permissions = await self._get_user_roles_and_permissions(user)
 
-        return CurrentUserResponse(
+        current_user = CurrentUserResponse(
             id=user.id,
             username=user.username,
             nickname=user.nickname,
@@ -102,6 +124,9 @@ class AuthService:
             roles=roles,
             permissions=permissions,
         )
+        if version == rbac_service.version:
+            self._user_cache[key] = (version, current_user)
+        return current_user
 
     async def _get_tenant(self, tenant_code: Optional[str]) -> Optional[Tenant]:
         """获取租户"""
@@ -143,28 +168,8 @@ class AuthService:
         self, user: User
     ) -> tuple[list[str], list[str]]:
         """获取用户角色和权限"""
-        if user.is_superuser:
-            roles = ["super_admin"]
-            permissions = ["*"]
-            return roles, permissions
-
-        user_roles = await UserRole.filter(user_id=user.id).prefetch_related("role")
-        roles = []
-        permission_set = set()
-
-        for ur in user_roles:
-            role = await ur.role
-            if role and role.status == 1:
-                roles.append(role.code)
-                role_permissions = await role.role_permissions.all().prefetch_related(
-                    "permission"
-                )
-                for rp in role_permissions:
-                    perm = await rp.permission
-                    if perm and perm.status == 1:
-                        permission_set.add(perm.code)
-
-        return roles, list(permission_set)
+        result = await rbac_service.resolve(user)
+        return list(result.roles), list(result.permissions)
 
 
 auth_service = AuthService()
@@ -1,7 +1,9 @@
+import asyncio
 from time import perf_counter
 from typing import AsyncIterator
 
 from chat2rag.core.enums import ProcessType
+from chat2rag.core.spans import bind_recorder
 from chat2rag.schemas.chat import ChatRequest
 from chat2rag.services.question_analyzer import QuestionAnalyzer
 from chat2rag.strategies import (
@@ -12,22 +14,24 @@ from chat2rag.strategies import (
     SensitiveWordStrategy,
     StrategyChain,
 )
-from chat2rag.streaming import StreamHandler, StreamHandlerV1
+from chat2rag.streaming import StreamHandler, StreamHandlerV1, Transport
 
 
 class ChatProcessor:
     """聊天处理器：封装整个聊天流程"""
 
-    def __init__(self, request: ChatRequest):
+    def __init__(self, request: ChatRequest, transport: str = Transport.SSE):
         self.request = request
         self.start_time = perf_counter()
         self.is_batch = request.batch_or_stream == ProcessType.BATCH
         self.query = self.request.content.text
         enable_tts = "audio" in (request.modalities or [])
-        self.handler = StreamHandler(enable_tts=enable_tts, audio_config=request.audio)
+        self.handler = StreamHandler(enable_tts=enable_tts, audio_config=request.audio, transport=transport)
 
-    async def process(self) -> AsyncIterator[str]:
+    async def process(self) -> AsyncIterator[str | bytes]:
         """处理聊天请求"""
+        # 之后创建的 Task（策略、Pipeline）都继承该请求的耗时记录
+        bind_recorder(self.handler.spans)
 
         await self.handler.start()
         self._record_info()
@@ -42,7 +46,8 @@ class ChatProcessor:
         await question_analyzer.add_or_update_question(
             ",".join(self.request.collections), question_text=self.query
         )
-        question_analyzer._save_checkpoint()
+        # 文件写入放到线程中，避免阻塞事件循环
+        await asyncio.to_thread(question_analyzer._save_checkpoint)
 
     def _build_strategy_chain(self) -> StrategyChain:
         return StrategyChain(
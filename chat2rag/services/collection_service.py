@@ -39,6 +39,7 @@ from chat2rag.schemas.document import (
     SourceLocation,
 )
 from chat2rag.services.contextual_retrieval import ContextualRetrieval
+from chat2rag.utils.client_pool import client_pool
 from chat2rag.utils.pipeline_cache import create_pipeline
 from chat2rag.utils.qdrant_store import detect_vector_mode, get_client
 
@@ -67,6 +68,7 @@ class CollectionService:
     async def remove(self, collection_name: str):
         if not await self.client.collection_exists(collection_name):
             raise ValueNoExist(f"知识库<{collection_name}>不存在")
+        client_pool.invalidate_document_store(collection_name)
         return await self.client.delete_collection(collection_name)
 
     async def reindex(
@@ -118,6 +120,7 @@ class CollectionService:
             logger.info(f"Synced {len(file_id_map)} files to database")
 
         await self.client.delete_collection(collection_name)
+        client_pool.invalidate_document_store(collection_name)
         logger.info(f"Deleted collection: {collection_name}")
 
         await self.create(collection_name)
@@ -683,6 +686,7 @@ class DocumentService:
             top_k=1,
             score_threshold=CONFIG.PRECISION_THRESHOLD,
             filters={"field": "meta.doc_type", "operator": "==", "value": "question"},
+            rewrite=True,
         )
 
         output_key = "ranker" if CONFIG.RERANK_ENABLED else "retriever"
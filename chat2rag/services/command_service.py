@@ -10,6 +10,7 @@ from chat2rag.schemas.command import (
     CommandCreate,
     CommandUpdate,
 )
+from chat2rag.services.tts_cache_service import tts_cache_warmer
 
 
 class CommandCategoryService(
@@ -65,6 +66,7 @@ class CommandService(CRUDBase[Command, CommandCreate, CommandUpdate]):
         command = await super().create(obj_in, exclude=exclude)
 
         await self._create_variants(command, obj_in)
+        tts_cache_warmer.schedule(tts_cache_warmer.warm_command(command))
 
         return command
 
@@ -95,6 +97,7 @@ class CommandService(CRUDBase[Command, CommandCreate, CommandUpdate]):
             await CommandVariant.filter(command_id=id).delete()
             await self._create_variants(command, obj_in, is_update=True)
 
+        tts_cache_warmer.schedule(tts_cache_warmer.warm_command(command))
         return command
 
     def _should_update_variants(self, obj_in) -> bool:
@@ -1,3 +1,6 @@
+from cachetools import TTLCache
+
+from chat2rag.config import CONFIG
 from chat2rag.core.crud import CRUDBase
 from chat2rag.core.exceptions import ValueAlreadyExist
 from chat2rag.models import RobotExpression
@@ -7,6 +10,10 @@ from chat2rag.schemas.expression import RobotExpressionCreate, RobotExpressionUp
 class RobotExpressionService(CRUDBase[RobotExpression, RobotExpressionCreate, RobotExpressionUpdate]):
     def __init__(self):
         super().__init__(RobotExpression)
+        self._active_cache: TTLCache = TTLCache(maxsize=1, ttl=CONFIG.PROMPT_CACHE_TTL)
+
+    def invalidate_cache(self):
+        self._active_cache.clear()
 
     async def create(self, obj_in: RobotExpressionCreate, exclude=None) -> RobotExpression:
         if await self.model.filter(name=obj_in.name).exists():
@@ -14,7 +21,9 @@ class RobotExpressionService(CRUDBase[RobotExpression, RobotExpressionCreate, Ro
         if await self.model.filter(code=obj_in.code).exists():
             raise ValueAlreadyExist("该表情代码已存在")
 
-        return await super().create(obj_in, exclude)
+        obj = await super().create(obj_in, exclude)
+        self.invalidate_cache()
+        return obj
 
     async def update(self, id: int, obj_in: RobotExpressionUpdate, exclude=None) -> RobotExpression:
         await self.get(id)
@@ -23,12 +32,20 @@ class RobotExpressionService(CRUDBase[RobotExpression, RobotExpressionCreate, Ro
         if obj_in.code and await self.model.filter(code=obj_in.code).exclude(id=id).exists():
             raise ValueAlreadyExist("该表情代码已存在")
 
-        return await super().update(id, obj_in, exclude)
+        obj = await super().update(id, obj_in, exclude)
+        self.invalidate_cache()
+        return obj
+
+    async def remove(self, id: int) -> None:
+        await super().remove(id)
+        self.invalidate_cache()
 
     async def get_active_expression_list(self):
-        """Return CODE list"""
-        expressions = await self.model.filter(is_active=True).all()
-        return [expression.name for expression in expressions]
+        """Return name list, cached until expressions change"""
+        if "active" not in self._active_cache:
+            expressions = await self.model.filter(is_active=True).all()
+            self._active_cache["active"] = [expression.name for expression in expressions]
+        return list(self._active_cache["active"])
 
     async def get_code_by_name(self, name: str = "") -> RobotExpression:
         return await self.model.filter(name=name).first()
@@ -1,7 +1,9 @@
 from chat2rag.core.crud import CRUDBase
+from chat2rag.core.flow.registry import flow_registry
 from chat2rag.core.exceptions import ValueAlreadyExist, ValueNoExist
 from chat2rag.models import FlowData
 from chat2rag.schemas.flow_data import FlowCreate, FlowUpdate
+from chat2rag.services.tts_cache_service import tts_cache_warmer
 
 
 class FlowDataService(CRUDBase[FlowData, FlowCreate, FlowUpdate]):
@@ -11,12 +13,23 @@ class FlowDataService(CRUDBase[FlowData, FlowCreate, FlowUpdate]):
     async def create(self, obj_in: FlowCreate, exclude=None):
         if await self.model.filter(name=obj_in.name).exists():
             raise ValueAlreadyExist("该流程已存在")
-        return await super().create(obj_in, exclude)
+        flow = await super().create(obj_in, exclude)
+        flow_registry.invalidate()
+        tts_cache_warmer.schedule(tts_cache_warmer.warm_flow(flow))
+        return flow
 
-    async def update(self, obj_in: FlowUpdate, exclude=None):
-        if await self.model.filter(name=obj_in.name).exists():
+    async def update(self, id: int, obj_in: FlowUpdate, exclude=None):
+        if obj_in.name and await self.model.filter(name=obj_in.name).exclude(id=id).exists():
             raise ValueAlreadyExist("该流程已存在")
-        return await super().update(id, obj_in, exclude)
+        flow = await super().update(id, obj_in, exclude)
+        flow_registry.invalidate()
+        tts_cache_warmer.schedule(tts_cache_warmer.warm_flow(flow))
+        return flow
+
+    async def remove(self, id: int):
+        result = await super().remove(id)
+        flow_registry.invalidate()
+        return result
 
     async def get_all_flows(self):
         flows = await self.get_list(1, 10000)
@@ -0,0 +1,127 @@
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional
+
+from haystack.dataclasses import ChatRole
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+from chat2rag.core.session_store import SessionStore, session_store
+from chat2rag.utils.history_window import HistoryEntry, estimate_tokens, truncate_to_tokens
+from chat2rag.utils.llm_client import LLMClient
+
+logger = get_logger(__name__)
+
+SUMMARY_PROMPT = """请将以下对话压缩为一段简洁的中文摘要，供后续对话参考。
+要求：保留用户的身份信息、偏好、已确认的事实和尚未解决的问题；不要编造内容；不超过200字；直接输出摘要。
+
+已有摘要：
+{summary}
+
+新增对话：
+{dialogue}"""
+
+# 摘要输入中单条消息的最大 token 数
+SUMMARY_MESSAGE_MAX_TOKENS = 300
+
+_ROLE_LABELS = {ChatRole.USER: "用户", ChatRole.ASSISTANT: "助手"}
+
+
+@dataclass
+class HistorySummary:
+    """滚动摘要，upto 为已被摘要覆盖的消息条数"""
+
+    upto: int
+    text: str
+
+
+def format_dialogue(entries: List[HistoryEntry]) -> str:
+    """整理为摘要输入，工具调用和结果不参与摘要"""
+    lines = []
+    for entry in entries:
+        label = _ROLE_LABELS.get(entry.message.role)
+        text = entry.message.text
+        if label and text:
+            lines.append(f"{label}：{truncate_to_tokens(text, SUMMARY_MESSAGE_MAX_TOKENS)}")
+    return "\n".join(lines)
+
+
+class HistorySummarizer:
+    """
+    历史消息的滚动摘要
+
+    滑出上下文窗口的消息累计到一定 token 数后，在后台与已有摘要合并成新摘要，
+    请求链路只读取已有摘要，不等待 LLM。
+    """
+
+    NAMESPACE = "chat_summary"
+
+    def __init__(self, store: SessionStore | None = None, llm_client: LLMClient | None = None):
+        self.store = store or session_store
+        self.llm_client = llm_client or LLMClient()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    async def get(self, chat_id: str) -> Optional[HistorySummary]:
+        data = await self.store.get(self.NAMESPACE, chat_id)
+        return HistorySummary(**data) if data else None
+
+    def schedule(
+        self,
+        chat_id: str,
+        summary: Optional[HistorySummary],
+        entries: List[HistoryEntry],
+        upto: int,
+    ) -> None:
+        """entries 为尚未摘要、且已滑出窗口的消息；同一会话同时只运行一个摘要任务"""
+        if not CONFIG.HISTORY_SUMMARY_ENABLED or chat_id in self._tasks:
+            return
+        if sum(entry.tokens for entry in entries) < CONFIG.HISTORY_SUMMARY_TRIGGER_TOKENS:
+            return
+
+        async def _run():
+            try:
+                await self.summarize(chat_id, summary, entries, upto)
+            except Exception:
+                logger.exception(f"History summary failed: chat_id={chat_id}")
+
+        task = asyncio.create_task(_run())
+        self._tasks[chat_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(chat_id, None))
+
+    async def summarize(
+        self,
+        chat_id: str,
+        summary: Optional[HistorySummary],
+        entries: List[HistoryEntry],
+        upto: int,
+    ) -> Optional[HistorySummary]:
+        dialogue = format_dialogue(entries)
+        if not dialogue:
+            return None
+
+        text = await self.llm_client.acall_llm(
+            messages=[
+                {
+                    "role": "user",
+                    "content": SUMMARY_PROMPT.format(summary=summary.text if summary else "无", dialogue=dialogue),
+                }
+            ],
+            max_tokens=CONFIG.HISTORY_SUMMARY_MAX_TOKENS,
+            extra_log="History Summary",
+        )
+
+        # 期间已有其他 worker 更新了摘要，放弃本次结果
+        current = await self.get(chat_id)
+        if (current.upto if current else 0) != (summary.upto if summary else 0):
+            return None
+
+        new_summary = HistorySummary(upto=upto, text=text)
+        await self.store.set(self.NAMESPACE, chat_id, {"upto": new_summary.upto, "text": new_summary.text})
+        logger.info(
+            f"History summarized: chat_id={chat_id}, upto={upto}, "
+            f"input_tokens={sum(e.tokens for e in entries)}, summary_tokens={estimate_tokens(text)}"
+        )
+        return new_summary
+
+
+history_summarizer = HistorySummarizer()
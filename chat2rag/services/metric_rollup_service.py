@@ -0,0 +1,372 @@
+"""
+聊天指标预聚合
+
+每条 Metric 写入后在进程内按 (粒度, 时间桶, 知识库, 模型) 累加，后台任务定时合并到
+metric_rollups 表；看板直接查询预聚合结果，不再拉取原始指标。
+
+耗时分位数使用对数分桶直方图（相邻桶上界相差 25%），可跨时间桶、跨维度相加，
+估算误差在一个桶宽以内。
+"""
+
+import asyncio
+import math
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+
+from chat2rag.config import CONFIG
+from chat2rag.core.crud import paginate
+from chat2rag.core.enums import RollupGranularity
+from chat2rag.core.logger import get_logger
+from chat2rag.models import Metric, MetricRollup
+from chat2rag.schemas.metric import MetricCreate, MetricRollupData
+
+logger = get_logger(__name__)
+
+HISTOGRAM_BASE = 1.25
+ROLLUP_DIMENSIONS = ("bucket", "collections", "model")
+# 查询参数中表示不分组（整个区间汇总）的取值，空列表无法通过查询字符串传递
+ROLLUP_NO_GROUP = "none"
+
+
+def truncate_time(value: datetime, granularity: RollupGranularity) -> datetime:
+    """时间 -> 所在时间桶的起点"""
+    value = value.replace(second=0, microsecond=0)
+    if granularity in (RollupGranularity.HOUR, RollupGranularity.DAY):
+        value = value.replace(minute=0)
+    if granularity == RollupGranularity.DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def histogram_bin(ms: float) -> str:
+    """耗时 -> 直方图桶编号（JSON 键为字符串）"""
+    if ms <= 1:
+        return "0"
+    return str(math.ceil(math.log(ms, HISTOGRAM_BASE)))
+
+
+def histogram_percentile(hist: Dict[str, int], q: float) -> float | None:
+    """按直方图估算分位数，返回所在桶的几何中点"""
+    total = sum(hist.values())
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for key in sorted(hist, key=int):
+        seen += hist[key]
+        if seen >= rank:
+            index = int(key)
+            return round(HISTOGRAM_BASE ** (index - 0.5), 2) if index > 0 else 1.0
+    return round(HISTOGRAM_BASE ** (int(max(hist, key=int)) - 0.5), 2)
+
+
+def _merge_hist(target: dict, source: dict):
+    """直方图相加；分阶段直方图为 {阶段: 直方图}，递归合并"""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge_hist(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+@dataclass
+class RollupAccumulator:
+    """一个时间桶、一组维度下的累计值，字段与 MetricRollup 一一对应"""
+
+    count: int = 0
+    error_count: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    first_response_count: int = 0
+    first_response_sum: float = 0.0
+    first_response_hist: Dict[str, int] = field(default_factory=dict)
+    total_count: int = 0
+    total_sum: float = 0.0
+    total_hist: Dict[str, int] = field(default_factory=dict)
+    stage_hist: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def add(
+        self,
+        error: bool = False,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_tokens: int = 0,
+        first_response_ms: float | None = None,
+        total_ms: float | None = None,
+        stage_timings: Dict[str, float] | None = None,
+    ):
+        self.count += 1
+        self.error_count += int(bool(error))
+        self.input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens or 0
+        self.cached_tokens += cached_tokens or 0
+        if first_response_ms is not None:
+            self.first_response_count += 1
+            self.first_response_sum += first_response_ms
+            _merge_hist(self.first_response_hist, {histogram_bin(first_response_ms): 1})
+        if total_ms is not None:
+            self.total_count += 1
+            self.total_sum += total_ms
+            _merge_hist(self.total_hist, {histogram_bin(total_ms): 1})
+        for stage, ms in (stage_timings or {}).items():
+            _merge_hist(self.stage_hist, {stage: {histogram_bin(ms): 1}})
+
+    def merge(self, other: "RollupAccumulator"):
+        for item in fields(self):
+            value = getattr(other, item.name)
+            if isinstance(value, dict):
+                _merge_hist(getattr(self, item.name), value)
+            else:
+                setattr(self, item.name, getattr(self, item.name) + value)
+
+    @classmethod
+    def from_row(cls, row: MetricRollup) -> "RollupAccumulator":
+        return cls(**{item.name: getattr(row, item.name) for item in fields(cls)})
+
+    def to_fields(self) -> dict:
+        return {item.name: getattr(self, item.name) for item in fields(self)}
+
+    def to_data(self, **dimensions) -> MetricRollupData:
+        return MetricRollupData(
+            **dimensions,
+            count=self.count,
+            error_count=self.error_count,
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            cached_tokens=self.cached_tokens,
+            avg_first_response_ms=round(self.first_response_sum / self.first_response_count, 2)
+            if self.first_response_count
+            else None,
+            p50_first_response_ms=histogram_percentile(self.first_response_hist, 0.5),
+            p95_first_response_ms=histogram_percentile(self.first_response_hist, 0.95),
+            avg_total_ms=round(self.total_sum / self.total_count, 2) if self.total_count else None,
+            p50_total_ms=histogram_percentile(self.total_hist, 0.5),
+            p95_total_ms=histogram_percentile(self.total_hist, 0.95),
+            stage_p50_ms={stage: histogram_percentile(hist, 0.5) for stage, hist in self.stage_hist.items()},
+            stage_p95_ms={stage: histogram_percentile(hist, 0.95) for stage, hist in self.stage_hist.items()},
+        )
+
+
+def accumulate(
+    pending: Dict[tuple, RollupAccumulator],
+    at: datetime,
+    collections: str | None,
+    model: str | None,
+    **values,
+):
+    """将一条指标累加到所有粒度的时间桶"""
+    for granularity in RollupGranularity:
+        key = (granularity.value, truncate_time(at, granularity), collections or "", model or "")
+        pending.setdefault(key, RollupAccumulator()).add(**values)
+
+
+class MetricRollupService:
+    def __init__(self):
+        self._pending: Dict[tuple, RollupAccumulator] = {}
+        self._lock = asyncio.Lock()
+        self._last_prune: datetime | None = None
+        # 重算期间 record() 的原始记录，扫描结束后补回晚于最后一条已扫描指标的部分
+        self._rebuild_log: List[tuple] | None = None
+
+    def record(
+        self,
+        metric: MetricCreate,
+        at: datetime | None = None,
+        stage_timings: Dict[str, float] | None = None,
+    ):
+        """
+        Metric 写入后调用，只做内存累加；stage_timings 可包含写入 Metric 本身的耗时
+
+        at 应传入 Metric 的 create_time，与 rebuild 扫描原始指标时的时间一致
+        """
+        at = at or datetime.now()
+        values = dict(
+            error=bool(metric.error_message),
+            input_tokens=metric.input_tokens,
+            output_tokens=metric.output_tokens,
+            cached_tokens=metric.cached_tokens,
+            first_response_ms=metric.first_response_ms,
+            total_ms=metric.total_ms,
+            stage_timings=stage_timings if stage_timings is not None else metric.stage_timings,
+        )
+        accumulate(self._pending, at, metric.collections, metric.model, **values)
+        if self._rebuild_log is not None:
+            self._rebuild_log.append((at, metric.collections, metric.model, values))
+
+    async def _upsert(self, key: tuple, acc: RollupAccumulator):
+        granularity, bucket, collections, model = key
+        lookup = dict(granularity=granularity, bucket=bucket, collections=collections, model=model)
+        # 多进程并发创建同一行时唯一约束冲突，重试一次走更新分支
+        for _ in range(2):
+            try:
+                async with in_transaction():
+                    row = await MetricRollup.filter(**lookup).select_for_update().first()
+                    if row is None:
+                        await MetricRollup.create(**lookup, **acc.to_fields())
+                        return
+                    merged = RollupAccumulator.from_row(row)
+                    merged.merge(acc)
+                    await MetricRollup.filter(id=row.id).update(**merged.to_fields())
+                    return
+            except IntegrityError:
+                continue
+        raise IntegrityError(f"Failed to upsert metric rollup {lookup}")
+
+    async def flush(self):
+        """把进程内累加的结果合并到数据库"""
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            failed = 0
+            for key, acc in pending.items():
+                try:
+                    await self._upsert(key, acc)
+                except Exception:
+                    failed += 1
+                    self._pending.setdefault(key, RollupAccumulator()).merge(acc)
+            if failed:
+                logger.warning(f"Failed to flush {failed}/{len(pending)} metric rollups, will retry")
+            elif pending:
+                logger.debug(f"Flushed {len(pending)} metric rollups")
+
+    async def prune(self):
+        """分钟粒度只保留 ROLLUP_MINUTE_RETENTION_DAYS 天"""
+        cutoff = datetime.now() - timedelta(days=CONFIG.ROLLUP_MINUTE_RETENTION_DAYS)
+        deleted = await MetricRollup.filter(granularity=RollupGranularity.MINUTE.value, bucket__lt=cutoff).delete()
+        if deleted:
+            logger.info(f"Pruned {deleted} minute rollups before {cutoff}")
+
+    async def _scan(
+        self, start: datetime, end: datetime
+    ) -> tuple[Dict[tuple, RollupAccumulator], int, datetime | None]:
+        """按 create_time 顺序扫描原始指标，返回累加结果、条数和最后一条的 create_time"""
+        rebuilt: Dict[tuple, RollupAccumulator] = {}
+        processed = 0
+        cursor = None
+        last_scanned: datetime | None = None
+        query = Metric.filter(create_time__gte=start, create_time__lt=end)
+        while True:
+            page = await paginate(query, page_size=5000, order=["create_time"], cursor=cursor, with_total=False)
+            for metric in page.items:
+                accumulate(
+                    rebuilt,
+                    metric.create_time.replace(tzinfo=None),
+                    metric.collections,
+                    metric.model,
+                    error=bool(metric.error_message),
+                    input_tokens=metric.input_tokens,
+                    output_tokens=metric.output_tokens,
+                    cached_tokens=metric.cached_tokens,
+                    first_response_ms=metric.first_response_ms,
+                    total_ms=metric.total_ms,
+                    stage_timings=metric.stage_timings,
+                )
+            processed += len(page.items)
+            if page.items:
+                last_scanned = page.items[-1].create_time.replace(tzinfo=None)
+            if not page.next_cursor:
+                return rebuilt, processed, last_scanned
+            cursor = page.next_cursor
+
+    async def rebuild(self, start: datetime, end: datetime) -> int:
+        """
+        从原始指标重新计算 [start, end) 所在各天的预聚合，返回处理的指标条数
+
+        用于首次启用或数据修复；按天对齐，避免与已有时间桶部分重叠
+        """
+        start = truncate_time(start, RollupGranularity.DAY)
+        end = truncate_time(end, RollupGranularity.DAY) + timedelta(days=1)
+
+        async with self._lock:
+            self._rebuild_log = []
+            try:
+                rebuilt, processed, last_scanned = await self._scan(start, end)
+            finally:
+                rebuild_log, self._rebuild_log = self._rebuild_log, None
+
+            # 区间内已扫描到的指标全部从原始数据重算，丢弃尚未写入的累加；
+            # 扫描最后一页期间写入、未被扫描到的指标从重算记录中补回
+            self._pending = {key: acc for key, acc in self._pending.items() if not start <= key[1] < end}
+            for at, collections, model, values in rebuild_log:
+                if start <= at < end and (last_scanned is None or at > last_scanned):
+                    accumulate(self._pending, at, collections, model, **values)
+            async with in_transaction():
+                await MetricRollup.filter(bucket__gte=start, bucket__lt=end).delete()
+                await MetricRollup.bulk_create(
+                    [
+                        MetricRollup(
+                            granularity=granularity,
+                            bucket=bucket,
+                            collections=collections,
+                            model=model,
+                            **acc.to_fields(),
+                        )
+                        for (granularity, bucket, collections, model), acc in rebuilt.items()
+                    ],
+                    batch_size=1000,
+                )
+
+        logger.info(f"Rebuilt {len(rebuilt)} metric rollups from {processed} metrics in [{start}, {end})")
+        return processed
+
+    async def backfill_if_empty(self):
+        """预聚合表为空时（首次启用），从近 ROLLUP_BACKFILL_DAYS 天的原始指标回填"""
+        if await MetricRollup.exists():
+            return
+        now = datetime.now()
+        await self.rebuild(now - timedelta(days=CONFIG.ROLLUP_BACKFILL_DAYS), now)
+
+    async def aggregate(
+        self,
+        granularity: RollupGranularity,
+        start_time: datetime,
+        end_time: datetime,
+        collection: str | None = None,
+        model: str | None = None,
+        group_by: Iterable[str] = ("bucket",),
+    ) -> List[MetricRollupData]:
+        """
+        查询预聚合结果
+
+        group_by 为 bucket / collections / model 的任意组合；为空时返回整个区间的汇总
+        """
+        group_by = [item for item in ROLLUP_DIMENSIONS if item in set(group_by)]
+
+        q = Q(granularity=granularity.value, bucket__gte=start_time, bucket__lt=end_time)
+        if collection:
+            q &= Q(collections__icontains=collection)
+        if model:
+            q &= Q(model=model)
+        rows = await MetricRollup.filter(q).order_by("bucket")
+
+        grouped: Dict[tuple, RollupAccumulator] = {}
+        for row in rows:
+            key = tuple(getattr(row, item) for item in group_by)
+            grouped.setdefault(key, RollupAccumulator()).merge(RollupAccumulator.from_row(row))
+
+        return [acc.to_data(**dict(zip(group_by, key))) for key, acc in grouped.items()]
+
+    async def run_periodic(self, interval_sec: int = 10):
+        """后台定时任务：回填、合并、清理"""
+        try:
+            await self.backfill_if_empty()
+        except Exception:
+            logger.exception("Failed to backfill metric rollups")
+
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                await self.flush()
+                if self._last_prune is None or datetime.now() - self._last_prune > timedelta(hours=1):
+                    await self.prune()
+                    self._last_prune = datetime.now()
+            except Exception:
+                logger.exception("Failed to maintain metric rollups")
+
+
+metric_rollup_service = MetricRollupService()
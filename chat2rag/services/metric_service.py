@@ -14,6 +14,8 @@ from chat2rag.schemas.metric import (
 
 
 class MetricService(CRUDBase[Metric, MetricCreate, MetricUpdate]):
+    estimate_count = True
+
     def __init__(self):
         super().__init__(Metric)
 
@@ -35,6 +37,14 @@ class MetricService(CRUDBase[Metric, MetricCreate, MetricUpdate]):
         if chat_id:
             q &= Q(chat_id=chat_id)
 
+        # 会话数和分页都在数据库中完成，只取当前页的会话
+        count_row = await Metric.filter(q).annotate(session_count=Count("chat_id", distinct=True)).first().values(
+            "session_count"
+        )
+        total = (count_row or {}).get("session_count") or 0
+        if total == 0:
+            return 0, []
+
         aggregated = await (
             Metric.filter(q)
             .group_by("chat_id")
@@ -45,6 +55,9 @@ class MetricService(CRUDBase[Metric, MetricCreate, MetricUpdate]):
                 min_create_time=Min("create_time"),
                 max_update_time=Max("update_time"),
             )
+            .order_by("-max_update_time", "chat_id")
+            .offset((page - 1) * page_size)
+            .limit(page_size)
             .values(
                 "chat_id",
                 "message_count",
@@ -56,16 +69,17 @@ class MetricService(CRUDBase[Metric, MetricCreate, MetricUpdate]):
         )
 
         chat_ids = [row["chat_id"] for row in aggregated]
+        first_times = {row["chat_id"]: row["min_create_time"] for row in aggregated}
         first_messages = await (
-            Metric.filter(chat_id__in=chat_ids)
+            Metric.filter(chat_id__in=chat_ids, create_time__in=list(set(first_times.values())))
             .order_by("chat_id", "create_time")
-            .values("chat_id", "question", "model", "collections")
+            .values("chat_id", "question", "model", "collections", "create_time")
         )
 
         first_msg_map: dict[str, dict] = {}
         for msg in first_messages:
             cid = msg["chat_id"]
-            if cid not in first_msg_map:
+            if cid not in first_msg_map and msg["create_time"] == first_times[cid]:
                 first_msg_map[cid] = msg
 
         sessions = []
@@ -86,13 +100,7 @@ class MetricService(CRUDBase[Metric, MetricCreate, MetricUpdate]):
                 }
             )
 
-        sessions.sort(key=lambda x: x["update_time"], reverse=True)
-        total = len(sessions)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated = sessions[start_idx:end_idx]
-
-        return total, [ChatSessionData(**s) for s in paginated]
+        return total, [ChatSessionData(**s) for s in sessions]
 
     async def get_session_stats(self, chat_id: str) -> SessionStatsData | None:
         metrics = await Metric.filter(chat_id=chat_id).values(
@@ -135,5 +143,18 @@ class MetricService(CRUDBase[Metric, MetricCreate, MetricUpdate]):
             collections_used=collections,
         )
 
+    async def get_top_configurations(self, start_time: datetime, limit: int = 20) -> List[dict]:
+        """按 (model, collections, tools) 统计使用次数，降序返回"""
+        from tortoise.functions import Count
+
+        return await (
+            Metric.filter(create_time__gte=start_time, model__isnull=False)
+            .group_by("model", "collections", "tools")
+            .annotate(count=Count("message_id"))
+            .order_by("-count")
+            .limit(limit)
+            .values("model", "collections", "tools", "count")
+        )
+
 
 metric_service = MetricService()
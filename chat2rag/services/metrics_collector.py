@@ -2,11 +2,15 @@ import asyncio
 from time import perf_counter_ns
 from typing import Dict, List
 
+from chat2rag.config import CONFIG
+from chat2rag.core.enums import ChatStage
 from chat2rag.core.logger import get_logger
+from chat2rag.core.spans import SpanRecorder
 from chat2rag.models.action import RobotAction
 from chat2rag.models.expression import RobotExpression
 from chat2rag.schemas.chat import QueryContent, SourceItem, SourceType
 from chat2rag.schemas.metric import MetricCreate
+from chat2rag.services.metric_rollup_service import metric_rollup_service
 from chat2rag.services.metric_service import metric_service
 
 logger = get_logger(__name__)
@@ -17,10 +21,12 @@ class MetricsCollector:
         self.message_id = message_id
         self.start_time_ns = perf_counter_ns()
         self.metrics = MetricCreate(message_id=message_id)
+        self.spans = SpanRecorder(message_id, self.start_time_ns)
         self._source_items: list[SourceItem] = []
         self._tool_sources: Dict[str, str] = {}
         self._retrieval_documents: Dict[str, List[Dict]] = {}
         self._first_response_marked = False
+        self._first_audio_marked = False
 
     def set_query_info(
         self,
@@ -70,6 +76,18 @@ class MetricsCollector:
         logger.info(f"First response time: {elapsed_ns / 1_000_000_000:.3f}s")
         return True
 
+    def mark_first_audio(self) -> bool:
+        if self._first_audio_marked:
+            return False
+
+        elapsed_ns = perf_counter_ns() - self.start_time_ns
+        self.metrics.first_audio_ms = round(elapsed_ns / 1_000_000, 2)
+        self._first_audio_marked = True
+        self.spans.mark(ChatStage.TTS_FIRST_AUDIO.value)
+
+        logger.info(f"First audio time: {elapsed_ns / 1_000_000_000:.3f}s")
+        return True
+
     def add_source(self, source_type: SourceType, display: str, detail: str = ""):
         self._source_items.append(
             SourceItem(type=source_type, display=display, detail=detail)
@@ -119,9 +137,17 @@ class MetricsCollector:
     def set_tool_result(self, result: dict):
         self.metrics.tool_result = result
 
-    def add_tokens(self, input_tokens: int = 0, output_tokens: int = 0):
+    def add_tokens(self, input_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0):
         self.metrics.input_tokens += input_tokens
         self.metrics.output_tokens += output_tokens
+        self.metrics.cached_tokens += cached_tokens
+
+    def set_prompt_prefix(self, prefix_hash: str, prefix_tokens: int):
+        self.metrics.prompt_prefix_hash = prefix_hash
+        self.metrics.prompt_prefix_tokens = prefix_tokens
+
+    def set_pipeline_time(self, elapsed_ms: float):
+        self.metrics.pipeline_ms = round(elapsed_ms, 2)
 
     def set_error(self, error_message: str):
         self.metrics.error_message = error_message
@@ -140,8 +166,28 @@ class MetricsCollector:
                     len(docs) for docs in self._retrieval_documents.values()
                 )
 
-            await metric_service.create(self.metrics)
-            logger.info(f"Metrics saved: message_id={self.message_id}")
+            document_ms = self.spans.elapsed_ms(
+                ChatStage.EMBEDDING.value, ChatStage.RETRIEVAL.value, ChatStage.RERANK.value
+            )
+            if document_ms is not None:
+                self.metrics.document_ms = document_ms
+            self.metrics.stage_timings = self.spans.timings() or None
+
+            with self.spans.span(ChatStage.METRICS_SAVE.value):
+                metric = await metric_service.create(self.metrics)
+            logger.info(f"Metrics saved: message_id={self.message_id}, stages={self.spans.timings()}")
+
+            # 写入耗时只能体现在预聚合和链路导出中
+            if CONFIG.ROLLUP_ENABLED:
+                metric_rollup_service.record(
+                    self.metrics,
+                    at=metric.create_time.replace(tzinfo=None),
+                    stage_timings=self.spans.timings(),
+                )
+            if CONFIG.TELEMETRY_ENABLED:
+                from chat2rag.core.telemetry import export_spans
+
+                export_spans(self.spans, error=self.metrics.error_message)
 
         except Exception:
             logger.exception(f"Failed to save metrics for {self.message_id}")
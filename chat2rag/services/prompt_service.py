@@ -1,5 +1,6 @@
 from typing import List
 
+from cachetools import TTLCache
 from tortoise.expressions import Q
 from tortoise.transactions import in_transaction
 
@@ -36,6 +37,11 @@ def _merge_prompt_version_data(prompt: Prompt, version: PromptVersion) -> Prompt
 class PromptService(CRUDBase[Prompt, PromptCreate, PromptUpdate]):
     def __init__(self):
         super().__init__(Prompt)
+        # prompt_name -> 当前版本的提示词文本
+        self._template_cache: TTLCache = TTLCache(maxsize=256, ttl=CONFIG.PROMPT_CACHE_TTL)
+
+    def invalidate_cache(self):
+        self._template_cache.clear()
 
     async def ensure_default_prompt(self):
         """确保默认提示词存在（仅在启动时调用一次）"""
@@ -73,6 +79,7 @@ class PromptService(CRUDBase[Prompt, PromptCreate, PromptUpdate]):
                 # 事务会自动回滚
                 raise
 
+        self.invalidate_cache()
         return _merge_prompt_version_data(prompt, prompt_version)
 
     async def update(self, id: int, obj_in: PromptUpdate) -> PromptVersion:
@@ -109,6 +116,7 @@ class PromptService(CRUDBase[Prompt, PromptCreate, PromptUpdate]):
             prompt.current_version = new_version
             await prompt.save(update_fields=["current_version"])
 
+        self.invalidate_cache()
         return _merge_prompt_version_data(prompt, prompt_version)
 
     async def set_version(self, id: int, version: int | None = None) -> PromptData:
@@ -134,6 +142,7 @@ class PromptService(CRUDBase[Prompt, PromptCreate, PromptUpdate]):
 
         prompt.current_version = version
         await prompt.save(update_fields=["current_version"])
+        self.invalidate_cache()
 
         # 返回当前生效版本的数据
         current_version_obj = await PromptVersion.filter(
@@ -152,6 +161,7 @@ class PromptService(CRUDBase[Prompt, PromptCreate, PromptUpdate]):
             await PromptVersion.filter(prompt=prompt).delete()
             await prompt.delete()
 
+        self.invalidate_cache()
         return True
 
     async def get_version(self, id: int):
@@ -246,12 +256,16 @@ class PromptService(CRUDBase[Prompt, PromptCreate, PromptUpdate]):
         return _merge_prompt_version_data(prompt, version_obj)
 
     async def get_prompt_template(self, prompt_name: str) -> str:
-        """Obtain the prompt template from the database"""
+        """Obtain the prompt template from the database, cached per prompt name"""
+        if prompt_name in self._template_cache:
+            return self._template_cache[prompt_name]
+
         prompt = await prompt_service.get_by_prompt_name(
             prompt_name
         ) or await prompt_service.get_by_prompt_name("默认")
         if not prompt:
             raise ValueNoExist(msg=f"提示词<{prompt_name}>不存在, 且默认提示词未设置")
+        self._template_cache[prompt_name] = prompt.prompt_text
         return prompt.prompt_text
 
 
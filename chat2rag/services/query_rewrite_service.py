@@ -0,0 +1,311 @@
+"""
+问题扩写
+
+用户问题先经本地规则归一化并扩写出若干变体：
+- 全角转半角、大小写、空白（NFKC）
+- 繁体转简体：安装了 opencc 时使用，否则使用内置常用字表
+- 口语转书面：咋 -> 怎么、啥 -> 什么 等
+- 同义词替换：内置表 + QUERY_REWRITE_SYNONYMS_PATH
+
+所有变体在一次 embedding 请求中批量编码，按归一化后的问题缓存，检索时由 MultiQueryRetriever
+在一次 Qdrant 批量请求中完成。本地规则没有产生变体时，可在后台调用 LLM 改写，
+结果并入缓存供之后的相同问题使用，请求链路不等待 LLM。
+"""
+
+import asyncio
+import contextlib
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+from cachetools import TTLCache
+
+from chat2rag.config import CONFIG
+from chat2rag.core.enums import ChatStage
+from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
+from chat2rag.core.spans import current_recorder
+from chat2rag.utils.client_pool import client_pool
+from chat2rag.utils.llm_client import LLMClient
+
+try:
+    from opencc import OpenCC
+
+    _opencc = OpenCC("t2s")
+except ImportError:
+    _opencc = None
+
+logger = get_logger(__name__)
+
+QUERY_REWRITE_CACHE = registry.counter("query_rewrite_cache_total", "问题扩写缓存命中情况", ["result"])
+QUERY_REWRITE_LLM = registry.counter("query_rewrite_llm_total", "问题扩写 LLM 调用结果", ["result"])
+
+REWRITE_PROMPT = """请将用户问题改写为 {count} 种意思相同、表达不同的问法，用于知识库检索。
+要求：不改变原意，不添加新的信息；每行一个问法，不要编号，不要解释。
+
+用户问题：{query}"""
+
+# 未安装 opencc 时使用的常用繁简字表（繁体在前）
+_T2S_PAIRS = (
+    "這这們们來来時时問问題题麼么說说請请過过還还對对會会裡里裏里開开關关門门點点電电車车機机場场館馆"
+    "號号碼码費费務务預预約约輪轮廁厕衛卫間间樓楼層层與与嗎吗應应該该現现幾几營营業业區区買买賣卖錢钱"
+    "網网絡络線线聯联繫系認认證证護护簽签辦办處处參参觀观遊游覽览風风劃划廳厅驗验體体檢检個个從从為为"
+    "醫医療疗藥药險险長长臺台灣湾後后東东邊边進进沒没兒儿樣样寫写讀读極极運运動动夠够單单價价導导隊队"
+    "掛挂診诊學学習习圖图書书訊讯聽听聲声語语話话謝谢氣气溫温離离遠远鐘钟頭头飯饭設设備备員员訂订張张"
+    "種种類类實实際际專专標标準准確确視视頻频輛辆駕驾駛驶鐵铁歲岁齡龄雙双週周"
+)
+_T2S_TABLE = str.maketrans(dict(zip(_T2S_PAIRS[0::2], _T2S_PAIRS[1::2])))
+
+# 口语 -> 书面，按最长匹配一次替换，避免链式替换
+COLLOQUIAL_FORMS = {
+    "咋样": "怎么样",
+    "咋办": "怎么办",
+    "咋整": "怎么办",
+    "咋": "怎么",
+    "啥时候": "什么时候",
+    "多会儿": "什么时候",
+    "啥子": "什么",
+    "啥": "什么",
+    "哪儿": "哪里",
+    "哪块儿": "哪里",
+    "木有": "没有",
+    "多钱": "多少钱",
+    "几点钟": "几点",
+}
+
+# 内置同义词组，按需用同义词表文件补充
+DEFAULT_SYNONYMS = [
+    ["厕所", "卫生间", "洗手间"],
+    ["多少钱", "价格", "费用"],
+    ["营业时间", "开放时间"],
+    ["wifi", "无线网"],
+    ["电话", "联系方式"],
+    ["预约", "预订"],
+]
+
+_WHITESPACE = re.compile(r"\s+")
+_NON_WORD = re.compile(r"[\W_]+")
+_COLLOQUIAL_PATTERN = re.compile("|".join(sorted(map(re.escape, COLLOQUIAL_FORMS), key=len, reverse=True)))
+# LLM 输出中的编号、项目符号
+_LIST_PREFIX = re.compile(r"^\s*(?:\d+[.、)]|[-*•])\s*")
+
+
+def to_simplified(text: str) -> str:
+    if _opencc is not None:
+        return _opencc.convert(text)
+    return text.translate(_T2S_TABLE)
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角、繁体转简体、小写、合并空白"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", to_simplified(text)).strip().lower()
+
+
+def canonicalize(text: str) -> str:
+    """归一化并将口语表达替换为书面表达"""
+    return _COLLOQUIAL_PATTERN.sub(lambda match: COLLOQUIAL_FORMS[match.group(0)], normalize_text(text))
+
+
+def query_key(text: str) -> str:
+    """缓存键：书面形式去掉标点和空白，口语与书面问法共用缓存"""
+    return _NON_WORD.sub("", canonicalize(text))
+
+
+def _variant_key(text: str) -> str:
+    """变体去重：只忽略字形、大小写和标点差异"""
+    return _NON_WORD.sub("", normalize_text(text))
+
+
+class SynonymTable:
+    """同义词组：问题中出现组内任一词时，替换为组内其他词生成变体"""
+
+    def __init__(self, groups: Iterable[Iterable[str]]):
+        self._groups: Dict[str, List[str]] = {}
+        for group in groups:
+            terms = list(dict.fromkeys(term for term in map(normalize_text, group) if term))
+            if len(terms) < 2:
+                continue
+            for term in terms:
+                self._groups[term] = terms
+        terms = sorted(self._groups, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, terms))) if terms else None
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "SynonymTable":
+        groups = list(DEFAULT_SYNONYMS)
+        path = path or CONFIG.QUERY_REWRITE_SYNONYMS_PATH
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    groups.append(re.split(r"[\s,，]+", line))
+            logger.info(f"Synonym table loaded: {path}")
+        return cls(groups)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def expand(self, text: str) -> List[str]:
+        """text 应为 canonicalize 之后的文本"""
+        if self._pattern is None:
+            return []
+        variants = []
+        for term in dict.fromkeys(match.group(0) for match in self._pattern.finditer(text)):
+            variants.extend(text.replace(term, other) for other in self._groups[term] if other != term)
+        return variants
+
+
+@dataclass
+class QueryExpansion:
+    """问题变体及其向量，第一个变体为归一化后的原问题"""
+
+    variants: List[str]
+    embeddings: List[List[float]]
+
+
+class QueryRewriteService:
+    """
+    问题扩写与查询向量缓存
+
+    Args:
+        embedder: 批量编码函数，默认调用 EMBEDDING_* 配置的 OpenAI 兼容接口
+        llm_client: 后台 LLM 改写使用的客户端
+        synonyms: 同义词表，默认首次使用时从 QUERY_REWRITE_SYNONYMS_PATH 加载
+    """
+
+    def __init__(
+        self,
+        embedder: Callable[[List[str]], Awaitable[List[List[float]]]] | None = None,
+        llm_client: LLMClient | None = None,
+        synonyms: SynonymTable | None = None,
+    ):
+        self.embedder = embedder or self._embed
+        self.llm_client = llm_client or LLMClient()
+        self._synonyms = synonyms
+        self._cache: TTLCache = TTLCache(maxsize=CONFIG.QUERY_REWRITE_CACHE_SIZE, ttl=CONFIG.QUERY_REWRITE_CACHE_TTL)
+        self._llm_tasks: Dict[tuple, asyncio.Task] = {}
+
+    @property
+    def synonyms(self) -> SynonymTable:
+        if self._synonyms is None:
+            self._synonyms = SynonymTable.load()
+        return self._synonyms
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._cache)
+
+    def reload(self):
+        """同义词表修改后调用"""
+        self._synonyms = None
+        self._cache.clear()
+
+    def rewrite(self, query: str) -> List[str]:
+        """本地规则生成的变体：归一化后的原问题、书面形式、同义词替换"""
+        canonical = canonicalize(query)
+        candidates = [normalize_text(query), canonical, *self.synonyms.expand(canonical)]
+
+        variants: Dict[str, str] = {}
+        for candidate in candidates:
+            key = _variant_key(candidate)
+            if key and key not in variants:
+                variants[key] = candidate
+        return list(variants.values())[: CONFIG.QUERY_REWRITE_MAX_VARIANTS]
+
+    async def expand(self, query: str, rewrite: bool = True) -> QueryExpansion:
+        """
+        获取问题变体及其向量
+
+        Args:
+            query: 用户问题
+            rewrite: 是否扩写；为 False 时只编码原问题，仍然使用缓存
+        """
+        rewrite = rewrite and CONFIG.QUERY_REWRITE_ENABLED
+        key = (rewrite, query_key(query) if rewrite else query.strip())
+        expansion = self._cache.get(key)
+        if expansion is not None:
+            QUERY_REWRITE_CACHE.inc(result="hit")
+            return expansion
+        QUERY_REWRITE_CACHE.inc(result="miss")
+
+        variants = (self.rewrite(query) if rewrite else []) or [query.strip()]
+        recorder = current_recorder()
+        with recorder.span(ChatStage.EMBEDDING.value) if recorder else contextlib.nullcontext():
+            embeddings = await self.embedder(variants) if variants[0] else []
+
+        expansion = QueryExpansion(variants=variants, embeddings=embeddings)
+        self._cache[key] = expansion
+        logger.debug(f"Query expanded: {query[:50]} -> {variants}")
+
+        if rewrite and len(variants) == 1 and variants[0]:
+            self._schedule_llm(key, query)
+        return expansion
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        client = client_pool.get_async_openai(CONFIG.EMBEDDING_OPENAI_URL, CONFIG.EMBEDDING_API_KEY)
+        response = await client.embeddings.create(
+            model=CONFIG.EMBEDDING_MODEL,
+            input=texts,
+            dimensions=CONFIG.EMBEDDING_DIMENSIONS,
+            encoding_format="float",
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _schedule_llm(self, key: tuple, query: str):
+        """同一问题同时只运行一个改写任务"""
+        if not CONFIG.QUERY_REWRITE_LLM or CONFIG.QUERY_REWRITE_MAX_VARIANTS < 2 or key in self._llm_tasks:
+            return
+        task = asyncio.create_task(self._llm_rewrite(key, query))
+        self._llm_tasks[key] = task
+        task.add_done_callback(lambda _: self._llm_tasks.pop(key, None))
+
+    async def _llm_rewrite(self, key: tuple, query: str):
+        try:
+            text = await asyncio.wait_for(
+                self.llm_client.acall_llm(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": REWRITE_PROMPT.format(count=CONFIG.QUERY_REWRITE_MAX_VARIANTS - 1, query=query),
+                        }
+                    ],
+                    max_tokens=200,
+                    extra_log="Query Rewrite",
+                ),
+                timeout=CONFIG.QUERY_REWRITE_LLM_TIMEOUT,
+            )
+
+            expansion = self._cache.get(key)
+            if expansion is None:
+                return
+            known = {_variant_key(variant) for variant in expansion.variants}
+            new_variants = []
+            for line in text.splitlines():
+                line = _LIST_PREFIX.sub("", line).strip()
+                line_key = _variant_key(line)
+                if line_key and line_key not in known:
+                    known.add(line_key)
+                    new_variants.append(line)
+            new_variants = new_variants[: CONFIG.QUERY_REWRITE_MAX_VARIANTS - len(expansion.variants)]
+            if not new_variants:
+                QUERY_REWRITE_LLM.inc(result="empty")
+                return
+
+            embeddings = await self.embedder(new_variants)
+            self._cache[key] = QueryExpansion(
+                variants=expansion.variants + new_variants,
+                embeddings=expansion.embeddings + embeddings,
+            )
+            QUERY_REWRITE_LLM.inc(result="success")
+            logger.info(f"Query rewritten by LLM: {query[:50]} -> {new_variants}")
+        except Exception as e:
+            QUERY_REWRITE_LLM.inc(result="error")
+            logger.warning(f"Query rewrite by LLM failed: {type(e).__name__}: {e}")
+
+
+query_rewrite_service = QueryRewriteService()
+
+registry.gauge("query_rewrite_cache_size", "问题扩写缓存条目数", callback=lambda: query_rewrite_service.cache_size)
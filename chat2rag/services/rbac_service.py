@@ -1,31 +1,66 @@
+from dataclasses import dataclass, field
 from typing import List, Optional
 
+from cachetools import TTLCache
+
+from chat2rag.config import CONFIG
 from chat2rag.models import Permission, Role, RolePermission, User, UserRole
 
 
+@dataclass(frozen=True)
+class UserPermissions:
+    """用户的有效角色编码和权限编码"""
+
+    roles: List[str] = field(default_factory=list)
+    permissions: List[str] = field(default_factory=list)
+
+
 class RbacService:
     """RBAC权限服务"""
 
-    async def get_user_permissions(self, user: User) -> List[str]:
-        """获取用户所有权限编码"""
+    def __init__(self):
+        # 角色、权限分配变更时递增；查询期间版本变化的结果不写入缓存
+        self.version = 0
+        self._cache: TTLCache = TTLCache(maxsize=CONFIG.RBAC_CACHE_SIZE, ttl=CONFIG.RBAC_CACHE_TTL)
+
+    def invalidate(self):
+        """角色、权限或其分配关系变更后调用"""
+        self.version += 1
+        self._cache.clear()
+
+    async def resolve(self, user: User) -> UserPermissions:
+        """一次联表查询获取用户的有效角色和权限，按 (租户, 用户) 缓存"""
         if user.is_superuser:
-            return ["*"]
+            return UserPermissions(roles=["super_admin"], permissions=["*"])
 
-        permissions = set()
-        user_roles = await UserRole.filter(user_id=user.id).all()
+        key = (user.tenant_id, user.id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
 
-        for ur in user_roles:
-            role = await Role.filter(id=ur.role_id, status=1).first()
-            if not role:
-                continue
+        version = self.version
+        rows = await UserRole.filter(user_id=user.id, role__status=1).values_list(
+            "role__code",
+            "role__role_permissions__permission__code",
+            "role__role_permissions__permission__status",
+        )
 
-            role_permissions = await RolePermission.filter(role_id=role.id).all()
-            for rp in role_permissions:
-                perm = await Permission.filter(id=rp.permission_id, status=1).first()
-                if perm:
-                    permissions.add(perm.code)
+        roles = []
+        permissions = set()
+        for role_code, permission_code, permission_status in rows:
+            if role_code not in roles:
+                roles.append(role_code)
+            if permission_code and permission_status == 1:
+                permissions.add(permission_code)
 
-        return list(permissions)
+        result = UserPermissions(roles=roles, permissions=sorted(permissions))
+        if version == self.version:
+            self._cache[key] = result
+        return result
+
+    async def get_user_permissions(self, user: User) -> List[str]:
+        """获取用户所有权限编码"""
+        return (await self.resolve(user)).permissions
 
     async def check_permission(self, user: User, permission_code: str) -> bool:
         """检查用户是否拥有指定权限"""
@@ -78,6 +113,7 @@ class RbacService:
                 UserRole(user_id=user.id, role_id=role_id) for role_id in role_ids
             ]
             await UserRole.bulk_create(user_roles)
+        self.invalidate()
 
     async def get_role_permissions(self, role: Role) -> List[Permission]:
         """获取角色所有权限"""
@@ -96,6 +132,7 @@ class RbacService:
                 for perm_id in permission_ids
             ]
             await RolePermission.bulk_create(role_permissions)
+        self.invalidate()
 
 
 rbac_service = RbacService()
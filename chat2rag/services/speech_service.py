@@ -0,0 +1,406 @@
+"""
+语音推理服务
+
+- ASR/VAD 模型每进程一份，首次使用时在推理线程中加载
+- 推理在独立线程池中执行（torch / onnxruntime 推理期间释放 GIL），在途任务数有上限，超出时调用方等待
+- WebSocket 收到的 PCM16 字节按帧切成 np.frombuffer 只读视图，只有跨包的帧才拷贝
+- 多路连接的 VAD 帧合并为一个 batch 推理，模型隐状态按连接保存
+- 说话期间按块增量送入流式 ASR，一句话结束时给出完整结果
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from chat2rag.config import CONFIG
+from chat2rag.core.enums import SpeechEventType
+from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
+
+logger = get_logger(__name__)
+
+SAMPLING_RATE = 16000
+# Silero VAD 在 16kHz 下每帧固定 512 个采样点（32ms）
+VAD_FRAME_SAMPLES = 512
+_INT16_SCALE = np.float32(1 / 32768)
+
+
+def _load_vad():
+    from chat2rag.providers.vad.silero import SileroBatchVAD
+
+    return SileroBatchVAD()
+
+
+def _load_asr():
+    from chat2rag.providers.asr import FunASR
+
+    return FunASR()
+
+
+@dataclass
+class SpeechEvent:
+    type: SpeechEventType
+    text: str = ""
+    # FINAL：判定结束时已经过的静音时长，用于推算用户实际说完的时刻
+    silence_ms: float = 0
+
+
+class FrameReader:
+    """
+    把任意长度的 PCM16 字节切成固定长度的帧
+
+    帧是对收到字节的只读视图，只有跨两个包的帧才拷贝拼接
+    """
+
+    def __init__(self, frame_samples: int = VAD_FRAME_SAMPLES):
+        self.frame_samples = frame_samples
+        self.frame_bytes = frame_samples * 2
+        self._carry = b""
+
+    def feed(self, data: bytes) -> List[np.ndarray]:
+        frames = []
+        offset = 0
+        if self._carry:
+            need = self.frame_bytes - len(self._carry)
+            if len(data) < need:
+                self._carry += data
+                return frames
+            frames.append(np.frombuffer(self._carry + data[:need], dtype=np.int16))
+            offset = need
+
+        count = (len(data) - offset) // self.frame_bytes
+        if count:
+            block = np.frombuffer(data, dtype=np.int16, count=count * self.frame_samples, offset=offset)
+            frames.extend(block.reshape(count, self.frame_samples))
+            offset += count * self.frame_bytes
+
+        self._carry = bytes(data[offset:])
+        return frames
+
+
+class VADStream:
+    """
+    单路连接的 VAD 状态：模型隐状态、上下文，以及与 silero VADIterator 相同的起止判定
+
+    Args:
+        threshold: 语音概率阈值，低于 threshold - 0.15 视为静音
+        min_silence_ms: 静音持续该时长后判定一句话结束
+        speech_pad_ms: 起止点向外扩展的时长
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        min_silence_ms: int | None = None,
+        speech_pad_ms: int = 30,
+        frame_samples: int = VAD_FRAME_SAMPLES,
+    ):
+        self.threshold = threshold or CONFIG.SPEECH_VAD_THRESHOLD
+        self.min_silence_samples = SAMPLING_RATE * (min_silence_ms or CONFIG.SPEECH_VAD_MIN_SILENCE_MS) // 1000
+        self.speech_pad_samples = SAMPLING_RATE * speech_pad_ms // 1000
+        self.frame_samples = frame_samples
+        # 由推理线程按模型规格初始化
+        self.state: np.ndarray | None = None
+        self.context: np.ndarray | None = None
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.context = None
+        self.triggered = False
+        self.temp_end = 0
+        self.current_sample = 0
+
+    def update(self, prob: float) -> Dict[str, int] | None:
+        """根据一帧的语音概率更新状态，返回 {"start": 采样点}、{"end": 采样点} 或 None"""
+        self.current_sample += self.frame_samples
+
+        if prob >= self.threshold and self.temp_end:
+            self.temp_end = 0
+
+        if prob >= self.threshold and not self.triggered:
+            self.triggered = True
+            return {"start": max(0, self.current_sample - self.speech_pad_samples - self.frame_samples)}
+
+        if prob < self.threshold - 0.15 and self.triggered:
+            if not self.temp_end:
+                self.temp_end = self.current_sample
+            if self.current_sample - self.temp_end < self.min_silence_samples:
+                return None
+            end = self.temp_end + self.speech_pad_samples - self.frame_samples
+            self.temp_end = 0
+            self.triggered = False
+            return {"end": end}
+
+        return None
+
+
+class ASRStream:
+    """单路连接的增量流式识别：int16 帧转换后写入块缓冲，凑满一块送入流式模型"""
+
+    def __init__(self, service: "SpeechService", chunk_samples: int):
+        self._service = service
+        self._chunk_samples = chunk_samples
+        self._buffer = np.empty(chunk_samples, dtype=np.float32)
+        self._filled = 0
+        self.cache: dict = {}
+        self.text = ""
+
+    async def feed(self, frame: np.ndarray) -> str:
+        """送入一帧 int16 采样，返回新增的识别文本"""
+        added = ""
+        start = 0
+        while start < len(frame):
+            take = min(len(frame) - start, self._chunk_samples - self._filled)
+            np.multiply(
+                frame[start : start + take],
+                _INT16_SCALE,
+                out=self._buffer[self._filled : self._filled + take],
+                dtype=np.float32,
+            )
+            self._filled += take
+            start += take
+            if self._filled == self._chunk_samples:
+                added += await self._recognize(is_final=False)
+        return added
+
+    async def finish(self) -> str:
+        """识别剩余音频，返回整句结果"""
+        await self._recognize(is_final=True)
+        return self.text
+
+    async def _recognize(self, is_final: bool) -> str:
+        # 缓冲交给推理线程，换一块新的继续写入
+        chunk = self._buffer[: self._filled]
+        self._buffer = np.empty(self._chunk_samples, dtype=np.float32)
+        self._filled = 0
+        text = await self._service.run(self._service.asr_chunk, chunk, self.cache, is_final)
+        self.text += text
+        return text
+
+
+class SpeechSession:
+    """一路语音连接：VAD 判定一句话的起止，说话期间增量识别"""
+
+    def __init__(self, service: "SpeechService"):
+        self._service = service
+        self._reader = FrameReader(VAD_FRAME_SAMPLES)
+        self._previous: np.ndarray | None = None
+        self.vad = VADStream()
+        self.asr: ASRStream | None = None
+
+    async def feed(self, data: bytes) -> List[SpeechEvent]:
+        """送入 WebSocket 收到的 16kHz PCM16 字节"""
+        events = []
+        for frame in self._reader.feed(data):
+            status = self.vad.update(await self._service.detect(self.vad, frame))
+
+            if status and "start" in status:
+                self.asr = ASRStream(self._service, await self._service.asr_chunk_samples())
+                events.append(SpeechEvent(SpeechEventType.SPEECH_START))
+                # 补上起点前的一帧，避免吞掉首字
+                if self._previous is not None:
+                    await self.asr.feed(self._previous)
+
+            if self.asr is not None:
+                if await self.asr.feed(frame):
+                    events.append(SpeechEvent(SpeechEventType.PARTIAL, self.asr.text))
+                if status and "end" in status:
+                    silence_ms = (self.vad.current_sample - status["end"]) * 1000 / SAMPLING_RATE
+                    events.append(SpeechEvent(SpeechEventType.FINAL, await self.asr.finish(), silence_ms))
+                    self.asr = None
+
+            self._previous = frame
+        return events
+
+    async def close(self) -> List[SpeechEvent]:
+        """连接结束时给出未说完的一句的结果"""
+        self.vad.reset()
+        if self.asr is None:
+            return []
+        text = await self.asr.finish()
+        self.asr = None
+        return [SpeechEvent(SpeechEventType.FINAL, text)]
+
+
+class SpeechService:
+    """
+    进程级语音推理服务
+
+    Args:
+        vad_factory: 构建批量 VAD 模型，需提供 infer(frames, states, contexts) 以及 context_samples、state_size
+        asr_factory: 构建 ASR 模型，需提供 transcribe、stream_chunk 以及 stream_chunk_samples
+        workers: 推理线程数
+        queue_size: 在途（执行中 + 排队）任务上限
+        batch_size: 单次 VAD 推理的最大帧数
+        batch_wait_ms: 凑 batch 的最长等待时间
+    """
+
+    def __init__(
+        self,
+        vad_factory: Callable[[], Any] = _load_vad,
+        asr_factory: Callable[[], Any] = _load_asr,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        batch_size: int | None = None,
+        batch_wait_ms: float | None = None,
+    ):
+        self._factories = {"vad": vad_factory, "asr": asr_factory}
+        self._models: Dict[str, Any] = {}
+        self._model_lock = threading.Lock()
+        self._workers = workers or CONFIG.SPEECH_WORKERS
+        self._queue_size = queue_size or CONFIG.SPEECH_QUEUE_SIZE
+        self._batch_size = batch_size or CONFIG.SPEECH_VAD_BATCH_SIZE
+        self._batch_wait = (batch_wait_ms or CONFIG.SPEECH_VAD_BATCH_WAIT_MS) / 1000
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._vad_pending: List[Tuple[VADStream, np.ndarray, asyncio.Future]] = []
+        self._vad_timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.in_flight = 0
+        self.vad_batches = 0
+        self.vad_frames = 0
+
+    # ------------------------------------------------------------------ 模型
+
+    def _model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._model_lock:
+                model = self._models.get(name)
+                if model is None:
+                    logger.info(f"Loading speech model: {name}")
+                    model = self._models[name] = self._factories[name]()
+        return model
+
+    @property
+    def vad_model(self):
+        return self._model("vad")
+
+    @property
+    def asr_model(self):
+        return self._model("asr")
+
+    async def warmup(self):
+        """预先加载模型，避免首个连接等待"""
+        await self.run(lambda: (self.vad_model, self.asr_model))
+
+    # ------------------------------------------------------------------ 执行
+
+    async def run(self, func: Callable, *args):
+        """在推理线程池中执行，在途任务达到上限时等待"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="speech")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._queue_size)
+
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            finally:
+                self.in_flight -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ------------------------------------------------------------------ VAD
+
+    async def detect(self, stream: VADStream, frame: np.ndarray) -> float:
+        """一帧的语音概率；同一时间窗内各连接的帧合并推理"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._vad_pending.append((stream, frame, future))
+        if len(self._vad_pending) >= self._batch_size:
+            self._flush_vad()
+        elif self._vad_timer is None:
+            self._vad_timer = loop.call_later(self._batch_wait, self._flush_vad)
+        return await future
+
+    def _flush_vad(self):
+        if self._vad_timer is not None:
+            self._vad_timer.cancel()
+            self._vad_timer = None
+
+        # 同一连接的帧有先后依赖，一个 batch 内每个连接最多一帧
+        batch, rest, seen = [], [], set()
+        for item in self._vad_pending:
+            if id(item[0]) in seen or len(batch) >= self._batch_size:
+                rest.append(item)
+            else:
+                seen.add(id(item[0]))
+                batch.append(item)
+        self._vad_pending = rest
+
+        loop = asyncio.get_running_loop()
+        if rest:
+            self._vad_timer = loop.call_later(self._batch_wait, self._flush_vad)
+        if batch:
+            task = loop.create_task(self._dispatch_vad(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch_vad(self, batch: List[Tuple[VADStream, np.ndarray, asyncio.Future]]):
+        try:
+            probs = await self.run(self._infer_vad, [item[0] for item in batch], [item[1] for item in batch])
+        except Exception as e:
+            logger.exception("VAD inference failed")
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), prob in zip(batch, probs):
+            if not future.done():
+                future.set_result(float(prob))
+
+    def _infer_vad(self, streams: List[VADStream], frames: List[np.ndarray]) -> np.ndarray:
+        model = self.vad_model
+        batch = np.empty((len(frames), len(frames[0])), dtype=np.float32)
+        for row, frame in zip(batch, frames):
+            np.multiply(frame, _INT16_SCALE, out=row, dtype=np.float32)
+
+        for stream in streams:
+            if stream.state is None:
+                stream.state = np.zeros((2, model.state_size), dtype=np.float32)
+                stream.context = np.zeros(model.context_samples, dtype=np.float32)
+        states = np.stack([stream.state for stream in streams], axis=1)
+        contexts = np.stack([stream.context for stream in streams])
+
+        probs, states, contexts = model.infer(batch, states, contexts)
+        for index, stream in enumerate(streams):
+            stream.state = states[:, index]
+            stream.context = contexts[index]
+
+        self.vad_batches += 1
+        self.vad_frames += len(frames)
+        return probs
+
+    # ------------------------------------------------------------------ ASR
+
+    async def asr_chunk_samples(self) -> int:
+        model = self._models.get("asr") or await self.run(lambda: self.asr_model)
+        return model.stream_chunk_samples
+
+    def asr_chunk(self, chunk: np.ndarray, cache: dict, is_final: bool) -> str:
+        return self.asr_model.stream_chunk(chunk, cache, is_final=is_final)
+
+    async def transcribe(self, audio: str | np.ndarray) -> str:
+        """整段识别：音频文件路径或 16kHz float32 采样"""
+        return await self.run(lambda: self.asr_model.transcribe(audio))
+
+    def create_session(self) -> SpeechSession:
+        return SpeechSession(self)
+
+
+speech_service = SpeechService()
+
+registry.gauge("speech_inference_in_flight", "语音推理在途任务数", callback=lambda: speech_service.in_flight)
+registry.counter("speech_vad_batches_total", "VAD 批量推理次数", callback=lambda: speech_service.vad_batches)
+registry.counter("speech_vad_frames_total", "VAD 推理帧数", callback=lambda: speech_service.vad_frames)
@@ -0,0 +1,180 @@
+"""
+班计划作业记录表（列车时刻表）的内存索引
+
+Excel 只在文件变化时解析一次，按列存储，并建立：
+- 车次（去除 ★◆ 标记、大写）-> 行号
+- 纯数字车次（去除 G/C/D）-> 行号列表
+- 按开车时刻排序的行号，用于时间段查询
+"""
+
+import asyncio
+import hashlib
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from chat2rag.core.logger import get_logger
+from chat2rag.services.excel_schema_service import load_schema, read_excel_with_schema
+
+logger = get_logger(__name__)
+
+TICKET_DIR = Path("uploads/ticket")
+TIMETABLE_FILE = TICKET_DIR / "福州南站综控室班计划作业记录表.xlsx"
+
+
+class TimetableUnavailable(Exception):
+    """时刻表文件或表结构缺失，message 可直接返回给用户"""
+
+
+def clean_train_number(value) -> str:
+    return str(value).strip().replace("★", "").replace("◆", "").upper()
+
+
+def train_digits(train_number: str) -> str:
+    return train_number.replace("G", "").replace("C", "").replace("D", "")
+
+
+def parse_departure_minutes(departure: str) -> Optional[int]:
+    """'08:05' / '08:05:00' -> 485，无法解析返回 None"""
+    try:
+        parts = departure.split(":")
+        return int(parts[0]) * 60 + (int(parts[1]) if len(parts) > 1 else 0)
+    except (ValueError, IndexError):
+        return None
+
+
+def _cell_text(value) -> str:
+    return "" if value is None or pd.isna(value) else str(value).strip()
+
+
+@dataclass
+class Timetable:
+    """按列存储的时刻表"""
+
+    train_numbers: List[str] = field(default_factory=list)
+    departures: List[str] = field(default_factory=list)
+    departure_minutes: List[Optional[int]] = field(default_factory=list)
+    gates: List[str] = field(default_factory=list)
+
+    by_number: Dict[str, int] = field(default_factory=dict)
+    by_digits: Dict[str, List[int]] = field(default_factory=dict)
+    # 按开车时刻排序的 (分钟, 行号)
+    time_keys: List[int] = field(default_factory=list)
+    time_rows: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "Timetable":
+        table = cls()
+        for number, departure, gate in zip(df["车次"].tolist(), df["开车时刻"].tolist(), df["检票口"].tolist()):
+            number = _cell_text(number)
+            if not number:
+                continue
+            row = len(table.train_numbers)
+            train_number = clean_train_number(number)
+            departure = _cell_text(departure)
+
+            table.train_numbers.append(train_number)
+            table.departures.append(departure)
+            table.departure_minutes.append(parse_departure_minutes(departure) if departure else None)
+            table.gates.append(_cell_text(gate))
+
+            # 与逐行扫描保持一致：重复车次取第一行
+            table.by_number.setdefault(train_number, row)
+            table.by_digits.setdefault(train_digits(train_number), []).append(row)
+
+        timed = sorted(
+            (minutes, row) for row, minutes in enumerate(table.departure_minutes) if minutes is not None
+        )
+        table.time_keys = [minutes for minutes, _ in timed]
+        table.time_rows = [row for _, row in timed]
+        return table
+
+    def __len__(self) -> int:
+        return len(self.train_numbers)
+
+    def find(self, train_number: str) -> List[int]:
+        """
+        查找车次，返回行号列表
+
+        精确匹配优先，只返回一行；否则按纯数字车次匹配，可能返回多行
+        """
+        if train_number in self.by_number:
+            return [self.by_number[train_number]]
+        return list(self.by_digits.get(train_number, []))
+
+    def rows_between(self, start_minutes: int, end_minutes: int) -> List[int]:
+        """开车时刻在 [start_minutes, end_minutes) 内的行号，按时间排序"""
+        lo = bisect_left(self.time_keys, start_minutes)
+        hi = bisect_right(self.time_keys, end_minutes - 1)
+        return self.time_rows[lo:hi]
+
+
+class TimetableService:
+    """
+    时刻表缓存
+
+    每次访问只比较文件的 mtime/大小；变化后再比较内容哈希，内容确有变化才重新解析。
+    """
+
+    def __init__(self, excel_file: Path = TIMETABLE_FILE):
+        self.excel_file = Path(excel_file)
+        self.schema_path = self.excel_file.parent / "schema.json"
+        self._timetable: Timetable | None = None
+        self._signature: tuple | None = None
+        self._content_hash: str | None = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self) -> tuple:
+        excel_stat = self.excel_file.stat()
+        schema_stat = self.schema_path.stat()
+        return (
+            excel_stat.st_mtime_ns,
+            excel_stat.st_size,
+            schema_stat.st_mtime_ns,
+            schema_stat.st_size,
+        )
+
+    def _content_digest(self) -> str:
+        digest = hashlib.sha256(self.excel_file.read_bytes())
+        digest.update(self.schema_path.read_bytes())
+        return digest.hexdigest()
+
+    def get(self) -> Timetable:
+        if not self.excel_file.exists():
+            raise TimetableUnavailable(f"错误：找不到班计划作业记录表文件 {self.excel_file}")
+        if not self.schema_path.exists():
+            raise TimetableUnavailable("错误：请先上传Excel文件以识别表格结构")
+
+        signature = self._file_signature()
+        if self._timetable is not None and signature == self._signature:
+            return self._timetable
+
+        with self._lock:
+            if self._timetable is not None and signature == self._signature:
+                return self._timetable
+
+            content_hash = self._content_digest()
+            if self._timetable is None or content_hash != self._content_hash:
+                if not load_schema(self.schema_path):
+                    raise TimetableUnavailable("错误：请先上传Excel文件以识别表格结构")
+                self._timetable = Timetable.from_dataframe(read_excel_with_schema(self.excel_file))
+                self._content_hash = content_hash
+                logger.info(f"Timetable loaded: {len(self._timetable)} trains from {self.excel_file}")
+            self._signature = signature
+            return self._timetable
+
+    async def get_async(self) -> Timetable:
+        """在线程中加载，避免解析 Excel 时阻塞事件循环"""
+        return await asyncio.to_thread(self.get)
+
+    def invalidate(self):
+        with self._lock:
+            self._signature = None
+            self._content_hash = None
+
+
+timetable_service = TimetableService()
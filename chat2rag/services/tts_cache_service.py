@@ -0,0 +1,96 @@
+import asyncio
+from typing import Iterable
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+from chat2rag.models import Command, FlowData
+from chat2rag.providers.tts.audio_cache import tts_audio_cache
+from chat2rag.providers.tts.factory import TTSFactory
+from chat2rag.schemas.chat import Audio
+from chat2rag.streaming.segmenter import SentenceSegmenter
+
+logger = get_logger(__name__)
+
+
+def split_sentences(text: str) -> list[str]:
+    """使用与流式合成相同的断句器切分固定话术，保证缓存键一致"""
+    segmenter = SentenceSegmenter()
+    sentences = segmenter.feed(text or "")
+    sentences.append(segmenter.flush())
+    return [s for s in sentences if s]
+
+
+class TTSCacheWarmer:
+    """固定话术（指令回复、流程节点回复）的预合成任务，覆盖 TTS_WARM_VOICES 中的每个音色"""
+
+    def __init__(self, audio_configs: list[Audio] | None = None):
+        self.audio_configs = audio_configs or [Audio(voice=voice) for voice in CONFIG.TTS_WARM_VOICES]
+        self._tasks: set[asyncio.Task] = set()
+
+    async def warm_texts(self, texts: Iterable[str]) -> int:
+        """合成尚未缓存的句子并落盘，返回新合成的句子数"""
+        sentences = list(dict.fromkeys(s for text in texts for s in split_sentences(text)))
+        if not sentences:
+            return 0
+
+        synthesized = 0
+        for audio_config in self.audio_configs:
+            synthesized += await self._warm_voice(audio_config, sentences)
+        return synthesized
+
+    async def _warm_voice(self, audio_config: Audio, sentences: list[str]) -> int:
+        missing = [s for s in sentences if not await tts_audio_cache.contains(audio_config, s)]
+        if not missing:
+            return 0
+
+        tts_provider = TTSFactory.create(audio_config)
+        if not tts_provider:
+            return 0
+
+        synthesized = 0
+        try:
+            if not hasattr(tts_provider, "speak_sentence"):
+                return 0
+            for sentence in missing:
+                audio = await tts_provider.speak_sentence(sentence)
+                if audio:
+                    await tts_audio_cache.put(audio_config, sentence, audio, persist=True)
+                    synthesized += 1
+        finally:
+            await tts_provider.close()
+
+        if synthesized:
+            logger.info(f"TTS cache warmed: voice={audio_config.voice}, {synthesized}/{len(sentences)} sentences")
+        return synthesized
+
+    async def warm_command(self, command: Command) -> int:
+        if not command.is_active or not command.reply:
+            return 0
+        return await self.warm_texts([command.reply])
+
+    async def warm_flow(self, flow: FlowData) -> int:
+        nodes = (flow.flow_json or {}).get("nodes", [])
+        return await self.warm_texts(node.get("data", {}).get("response", "") for node in nodes)
+
+    async def warm_all(self) -> int:
+        replies = await Command.filter(is_active=True).values_list("reply", flat=True)
+        total = await self.warm_texts(reply for reply in replies if reply)
+        for flow in await FlowData.all():
+            total += await self.warm_flow(flow)
+        return total
+
+    def schedule(self, coro) -> None:
+        """后台执行预合成，不阻塞保存接口"""
+
+        async def _run():
+            try:
+                await coro
+            except Exception:
+                logger.exception("TTS cache warm-up failed")
+
+        task = asyncio.create_task(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+tts_cache_warmer = TTSCacheWarmer()
@@ -0,0 +1,251 @@
+"""
+全双工语音会话
+
+- 音频帧送入 SpeechSession（VAD + 流式 ASR）
+- 增量识别结果稳定一段时间后提前送入策略链推测执行，输出先缓存：整句结果一致时直接放出，不一致时取消重跑；
+  推测执行在确认前不调用工具，见 StreamHandler.commit_gate
+- 回复走 ChatProcessor：LLM token 经 StreamHandler 流入 TTSProcessor，边生成边合成
+- 用户再次开口时打断：取消当前回复（含 Pipeline 与 TTS），并通知客户端停止播放
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Awaitable, Callable, List
+
+from chat2rag.config import CONFIG
+from chat2rag.core.enums import SpeechEventType
+from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
+from chat2rag.schemas.chat import ChatRequest, QueryContent
+from chat2rag.services.speech_service import SpeechEvent, SpeechSession, speech_service
+
+logger = get_logger(__name__)
+
+VOICE_TURNS = registry.counter("voice_turns_total", "语音会话回复次数", ["result"])
+MOUTH_TO_EAR_SECONDS = registry.histogram(
+    "voice_mouth_to_ear_seconds",
+    "用户说完到首段回复音频发出的时间(秒)",
+    buckets=(0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _normalize(text: str) -> str:
+    """比较识别结果时忽略标点、空白和大小写"""
+    return _NON_WORD.sub("", text or "").lower()
+
+
+def _create_processor(request: ChatRequest):
+    # 按需加载，Pipeline 相关依赖较重
+    from chat2rag.services.chat_service import ChatProcessor
+    from chat2rag.streaming import Transport
+
+    return ChatProcessor(request, transport=Transport.WEBSOCKET)
+
+
+@dataclass
+class TurnLatency:
+    """一次回复的端到端延迟"""
+
+    text: str
+    speculative: bool
+    mouth_to_ear_ms: float
+
+
+class VoiceTurn:
+    """一次回复：ChatProcessor 的输出在确认前缓存，确认后按序发送"""
+
+    def __init__(self, session: "VoiceSession", text: str, speech_end: float | None = None):
+        self.session = session
+        self.text = text
+        self.speculative = speech_end is None
+        self.speech_end = speech_end
+        self.first_audio: float | None = None
+        self.committed = not self.speculative
+        self._buffer: List[str | bytes] = []
+
+        request = session.request.model_copy(update={"content": QueryContent(text=text)})
+        self.processor = session.processor_factory(request)
+        self._gate = asyncio.Event()
+        if self.speculative:
+            self.processor.handler.commit_gate = self._gate
+        else:
+            self._gate.set()
+
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # 任务结果无人等待，异常在此记录
+        try:
+            async for frame in self.processor.process():
+                async with self.session.send_lock:
+                    if self.committed:
+                        await self._emit(frame)
+                    else:
+                        self._buffer.append(frame)
+        except Exception:
+            logger.exception(f"Voice turn failed: text={self.text[:50]}, speculative={self.speculative}")
+
+    async def commit(self, speech_end: float):
+        """整句识别结果与推测一致：放出已缓存的输出，之后的输出直接发送"""
+        async with self.session.send_lock:
+            self.speech_end = speech_end
+            self.committed = True
+            for frame in self._buffer:
+                await self._emit(frame)
+            self._buffer.clear()
+        self._gate.set()
+
+    async def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+            await asyncio.wait([self.task])
+
+    async def _emit(self, frame: str | bytes):
+        if isinstance(frame, bytes) and self.first_audio is None:
+            self.first_audio = perf_counter()
+            self.session.record_latency(self)
+        await self.session.send(frame)
+
+
+class VoiceSession:
+    """
+    一路全双工语音会话
+
+    Args:
+        request: 会话配置（模型、知识库、音频输出等），每句话替换其中的文本
+        send: 发送一帧：str 为文本帧，bytes 为二进制音频帧
+        speech: 语音识别会话，默认使用进程共享的 speech_service
+        processor_factory: 按请求构建 ChatProcessor
+        speculative: 是否用增量识别结果推测执行，默认 VOICE_SPECULATIVE
+    """
+
+    def __init__(
+        self,
+        request: ChatRequest,
+        send: Callable[[str | bytes], Awaitable[Any]],
+        speech: SpeechSession | None = None,
+        processor_factory: Callable[[ChatRequest], Any] = _create_processor,
+        speculative: bool | None = None,
+    ):
+        self.request = request
+        self.send = send
+        self.speech = speech or speech_service.create_session()
+        self.processor_factory = processor_factory
+        self.speculative = CONFIG.VOICE_SPECULATIVE if speculative is None else speculative
+        self.send_lock = asyncio.Lock()
+        self.latencies: List[TurnLatency] = []
+        # 推测执行中的回复 / 已确认的回复 / 等待增量结果稳定后启动推测的计时任务
+        self._draft: VoiceTurn | None = None
+        self._reply: VoiceTurn | None = None
+        self._pending_draft: asyncio.Task | None = None
+
+    async def feed(self, data: bytes):
+        """送入客户端的 16kHz PCM16 音频"""
+        for event in await self.speech.feed(data):
+            await self._on_event(event)
+
+    async def wait_reply(self):
+        """等待当前回复发送完毕"""
+        if self._reply is not None:
+            await asyncio.wait([self._reply.task])
+
+    async def close(self):
+        await self._discard_draft()
+        if self._reply is not None:
+            await self._reply.cancel()
+            self._reply = None
+        await self.speech.close()
+
+    async def send_error(self, message: str):
+        await self._send_json({"object": "error", "message": message})
+
+    def record_latency(self, turn: VoiceTurn):
+        latency = TurnLatency(
+            text=turn.text,
+            speculative=turn.speculative,
+            mouth_to_ear_ms=(turn.first_audio - turn.speech_end) * 1000,
+        )
+        self.latencies.append(latency)
+        MOUTH_TO_EAR_SECONDS.observe(latency.mouth_to_ear_ms / 1000)
+        logger.debug(f"Voice mouth-to-ear {latency.mouth_to_ear_ms:.0f}ms, speculative={turn.speculative}")
+
+    async def _on_event(self, event: SpeechEvent):
+        if event.type == SpeechEventType.SPEECH_START:
+            await self._barge_in()
+        elif event.type == SpeechEventType.PARTIAL:
+            await self._send_json({"object": "transcript", "text": event.text, "final": False})
+            await self._speculate(event.text)
+        elif event.type == SpeechEventType.FINAL:
+            speech_end = perf_counter() - event.silence_ms / 1000
+            await self._send_json({"object": "transcript", "text": event.text, "final": True})
+            await self._respond(event.text, speech_end)
+
+    async def _barge_in(self):
+        """用户开口：放弃推测，打断正在进行的回复"""
+        await self._discard_draft()
+        if self._reply is None:
+            return
+        interrupted = not self._reply.task.done()
+        await self._reply.cancel()
+        self._reply = None
+        if interrupted:
+            VOICE_TURNS.inc(result="interrupted")
+        # 回复已发完时客户端可能仍在播放，同样通知其停止
+        await self._send_json({"object": "interrupt"})
+
+    async def _speculate(self, text: str):
+        if not self.speculative or len(_normalize(text)) < CONFIG.VOICE_SPECULATE_MIN_CHARS:
+            return
+        self._cancel_pending_draft()
+        if self._draft is not None and _normalize(self._draft.text) == _normalize(text):
+            return
+        self._pending_draft = asyncio.create_task(self._start_draft(text))
+
+    async def _start_draft(self, text: str):
+        """增量结果在防抖时间内没有变化才启动推测，旧的推测在此之前继续运行"""
+        await asyncio.sleep(CONFIG.VOICE_SPECULATE_DEBOUNCE_MS / 1000)
+        self._pending_draft = None
+        draft, self._draft = self._draft, VoiceTurn(self, text)
+        if draft is not None:
+            await draft.cancel()
+
+    def _cancel_pending_draft(self):
+        if self._pending_draft is not None:
+            self._pending_draft.cancel()
+            self._pending_draft = None
+
+    async def _respond(self, text: str, speech_end: float):
+        self._cancel_pending_draft()
+        draft, self._draft = self._draft, None
+        if not _normalize(text):
+            if draft is not None:
+                await draft.cancel()
+            return
+
+        if draft is not None and _normalize(draft.text) == _normalize(text):
+            VOICE_TURNS.inc(result="speculative_hit")
+            self._reply = draft
+            await draft.commit(speech_end)
+            return
+
+        if draft is not None:
+            VOICE_TURNS.inc(result="speculative_miss")
+            await draft.cancel()
+        else:
+            VOICE_TURNS.inc(result="direct")
+        self._reply = VoiceTurn(self, text, speech_end=speech_end)
+
+    async def _discard_draft(self):
+        self._cancel_pending_draft()
+        if self._draft is not None:
+            await self._draft.cancel()
+            self._draft = None
+
+    async def _send_json(self, data: dict):
+        async with self.send_lock:
+            await self.send(json.dumps(data, ensure_ascii=False))
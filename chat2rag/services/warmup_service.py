@@ -0,0 +1,151 @@
+"""
+Pipeline 预热
+
+首次使用某个 (模型, 知识库, 工具) 组合时，需要构建 AgentPipeline、连接 MCP 服务、
+检测向量模式，首个问题会明显卡顿。启动时及定时按近期 Metric 中最常用的组合
+预先构建 Pipeline，并提前建立 Embedding / Rerank / TTS / MCP 连接。
+"""
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from chat2rag.components import OpenRanker
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+from chat2rag.models import MCPServer
+from chat2rag.pipelines.agent import create_agent_pipeline
+from chat2rag.providers.tts.factory import TTSFactory
+from chat2rag.schemas.chat import Audio
+from chat2rag.services.metric_service import metric_service
+from chat2rag.tools.mcp import connection_manager
+from chat2rag.utils.client_pool import client_pool
+
+logger = get_logger(__name__)
+
+MCP_CONNECT_TIMEOUT = 30
+
+
+def _split(value: str | None) -> Tuple[str, ...]:
+    """Metric 中逗号分隔的字段 -> 排序去重后的元组"""
+    if not value:
+        return ()
+    return tuple(sorted({item.strip() for item in value.split(",") if item.strip()}))
+
+
+@dataclass(frozen=True)
+class PipelineProfile:
+    """一种 Pipeline 配置"""
+
+    model: str
+    collections: Tuple[str, ...] = ()
+    tools: Tuple[str, ...] = ()
+    count: int = field(default=0, compare=False)
+
+
+class WarmupService:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        # 最近一次预热中各配置的构建耗时(毫秒)
+        self.build_ms: Dict[PipelineProfile, float] = {}
+
+    async def get_profiles(self, limit: int, lookback_days: int) -> List[PipelineProfile]:
+        """近期最常用的配置；知识库/工具顺序不同的记录合并统计"""
+        since = datetime.now() - timedelta(days=lookback_days)
+        rows = await metric_service.get_top_configurations(since, limit=limit * 4)
+
+        counter: Counter = Counter()
+        for row in rows:
+            counter[(row["model"], _split(row["collections"]), _split(row["tools"]))] += row["count"]
+
+        return [
+            PipelineProfile(model=model, collections=collections, tools=tools, count=count)
+            for (model, collections, tools), count in counter.most_common(limit)
+        ]
+
+    async def warm_pipeline(self, profile: PipelineProfile) -> float:
+        start = perf_counter()
+        # 与未指定采样参数的请求（ChatRequest 默认值）一致，才能得到同一个缓存键
+        await create_agent_pipeline(
+            model=profile.model,
+            collections=list(profile.collections),
+            tools=list(profile.tools),
+            generation_kwargs=CONFIG.GENERATION_KWARGS,
+            extra_log="Warmup",
+        )
+        elapsed_ms = round((perf_counter() - start) * 1000, 2)
+        self.build_ms[profile] = elapsed_ms
+        logger.info(
+            f"Pipeline warmed up in {elapsed_ms:.0f}ms: model={profile.model}, "
+            f"collections={list(profile.collections)}, tools={list(profile.tools)}, uses={profile.count}"
+        )
+        return elapsed_ms
+
+    async def connect_mcp_servers(self):
+        servers = await MCPServer.filter(is_active=True).all()
+        for server in servers:
+            try:
+                await asyncio.wait_for(connection_manager.get_toolset(server), timeout=MCP_CONNECT_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Failed to pre-connect MCP server {server.name}: {e}")
+
+    async def prime_embedding(self):
+        if CONFIG.EMBEDDING_OPENAI_URL:
+            await client_pool.create_text_embedder().run_async(text="预热")
+
+    async def prime_rerank(self):
+        if CONFIG.RERANK_ENABLED and CONFIG.RERANK_URL:
+            # 只需建立连接，不关心响应状态
+            client = await OpenRanker.get_client()
+            await client.head(CONFIG.RERANK_URL)
+
+    async def prime_tts(self):
+        tts = TTSFactory.create(Audio())
+        if not tts:
+            return
+        try:
+            await tts.warm_up()
+        finally:
+            await tts.close()
+
+    async def run(self):
+        """执行一次预热；上一次尚未结束时跳过"""
+        if self._lock.locked():
+            return
+        async with self._lock:
+            start = perf_counter()
+            results = await asyncio.gather(
+                self.connect_mcp_servers(),
+                self.prime_embedding(),
+                self.prime_rerank(),
+                self.prime_tts(),
+                return_exceptions=True,
+            )
+            for name, result in zip(("mcp", "embedding", "rerank", "tts"), results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Warmup of {name} connection failed: {result}")
+
+            profiles = await self.get_profiles(CONFIG.WARMUP_TOP_N, CONFIG.WARMUP_LOOKBACK_DAYS)
+            for profile in profiles:
+                try:
+                    await self.warm_pipeline(profile)
+                except Exception as e:
+                    logger.warning(f"Failed to warm up pipeline {profile}: {e}")
+
+            logger.info(f"Warmup finished: {len(profiles)} pipelines in {perf_counter() - start:.2f}s")
+
+
+async def periodic_warmup(service: WarmupService, interval_sec: int = 1800):
+    """后台定时任务，启动时立即预热一次，之后每隔 interval_sec 秒预热"""
+    while True:
+        try:
+            await service.run()
+        except Exception:
+            logger.exception("Failed to warm up pipelines")
+        await asyncio.sleep(interval_sec)
+
+
+warmup_service = WarmupService()
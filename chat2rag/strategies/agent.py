@@ -8,15 +8,12 @@ from typing import AsyncIterator, List
 from haystack.dataclasses import ChatMessage, ChatRole, StreamingChunk
 
 from chat2rag.config import CONFIG
-from chat2rag.core.enums import ModelCapability
+from chat2rag.core.enums import ChatStage, ModelCapability
 from chat2rag.core.logger import get_logger
-from chat2rag.models.models import ModelProvider, ModelSource
-from chat2rag.pipelines.agent import AgentPipeline
+from chat2rag.pipelines.agent import create_agent_pipeline
 from chat2rag.schemas.chat import SourceType
-from chat2rag.services.model_service import model_source_service
 from chat2rag.utils.chat_history import chat_history
-from chat2rag.utils.merge_kwargs import merge_generation_kwargs
-from chat2rag.utils.pipeline_cache import create_pipeline
+from chat2rag.utils.prompt_layout import prompt_prefix_fingerprint
 
 from .base import ResponseStrategy
 
@@ -48,11 +45,18 @@ class AgentStrategy(ResponseStrategy):
         )
         task = asyncio.create_task(self._process_pipeline(query, history_messages))
 
+        abandoned = False
         try:
             async for chunk in self.handler.get_stream(self.is_batch):
                 yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # 下游放弃（如语音打断）时取消 Pipeline，不等待生成结束
+            abandoned = True
+            task.cancel()
+            raise
         finally:
-            await task
+            if not abandoned:
+                await task
 
     async def _process_pipeline(self, query: str, history_messages: List[ChatMessage]):
         """处理 Agent Pipeline"""
@@ -60,30 +64,21 @@ class AgentStrategy(ResponseStrategy):
         current_time = {"time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
         try:
             capability = self._detect_capability()
-            model_source: ModelSource = await model_source_service.get_best_source(
-                self.request.model, capability=capability, extra_log="Agent Stage"
-            )
-            model_provider: ModelProvider = await model_source.provider
-            generation_kwargs = merge_generation_kwargs(
-                self.request.generation_kwargs,
-                model_source.generation_kwargs,
-                CONFIG.GENERATION_KWARGS,
-            )
 
             logger.info(
                 f"[{self.handler.message_id}] Starting agent pipeline: capability={capability.value}, "
                 f"tools={self.request.tools}, collections={self.request.collections}"
             )
 
-            pipeline = await create_pipeline(
-                AgentPipeline,
-                collections=self.request.collections,
-                model=model_source.name,
-                tools=self.request.tools if capability == "text" else [],
-                api_base_url=model_provider.base_url,
-                api_key=model_provider.api_key,
-                generation_kwargs=generation_kwargs,
-            )
+            with self.handler.spans.span(ChatStage.PIPELINE.value) as span:
+                pipeline = await create_agent_pipeline(
+                    model=self.request.model,
+                    collections=self.request.collections,
+                    tools=self.request.tools,
+                    generation_kwargs=self.request.generation_kwargs,
+                    capability=capability,
+                )
+            self.handler.set_pipeline_time(span.elapsed_ms)
             logger.debug(f"[{self.handler.message_id}] Pipeline created successfully")
 
             tool_sources = pipeline.get_tool_sources()
@@ -102,7 +97,7 @@ class AgentStrategy(ResponseStrategy):
                 },
                 messages=history_messages,
                 extra_params=self.request.extra_params | current_time,
-                streaming_callback=self.handler.callback,
+                streaming_callback=self.handler.llm_callback,
             )
             logger.info(f"[{self.handler.message_id}] pipeline.run_async completed")
 
@@ -122,21 +117,28 @@ class AgentStrategy(ResponseStrategy):
 
             messages: list = result.get("agent", {}).get("messages", [])
             new_messages = self._get_latest_user_round(messages)
+            await self.handler.wait_committed()
             if self.request.chat_id and messages:
-                chat_history.add_message(self.request.chat_id, messages=new_messages)
+                await chat_history.add_message(self.request.chat_id, messages=new_messages)
                 elapsed_time = perf_counter() - self.start_time
                 logger.info(f"Agent pipeline completed in {elapsed_time:.2f}s")
                 logger.debug(f"Answer: {new_messages[-1].text}")
 
+            prompt = result.get("builder", {}).get("prompt", [])
+            if prompt:
+                self.handler.set_prompt_prefix(*prompt_prefix_fingerprint(prompt, pipeline.get_tools()))
+
             input_tokens = 0
             output_tokens = 0
+            cached_tokens = 0
             for message in new_messages:
                 if message.role == ChatRole.ASSISTANT:
                     usage = message.meta.get("usage", {})
                     if usage:
                         input_tokens += int(usage.get("prompt_tokens", 0))
                         output_tokens += int(usage.get("completion_tokens", 0))
-            self.handler.set_token_info(input_tokens, output_tokens)
+                        cached_tokens += int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+            self.handler.set_token_info(input_tokens, output_tokens, cached_tokens)
 
         except Exception as e:
             logger.exception(
@@ -1,10 +1,11 @@
 import asyncio
 from abc import ABC, abstractmethod
-from time import perf_counter
+from time import perf_counter, perf_counter_ns
 from typing import AsyncIterator
 
 from haystack.dataclasses import ChatRole, StreamingChunk
 
+from chat2rag.core.enums import ChatStage
 from chat2rag.core.logger import get_logger
 from chat2rag.dataclass.strategy import StrategyRequest
 from chat2rag.utils.chat_history import chat_history
@@ -16,6 +17,9 @@ logger = get_logger(__name__)
 class ResponseStrategy(ABC):
     """响应策略基类"""
 
+    # 匹配阶段的耗时记入该阶段；None 表示策略内部自行记录
+    stage: ChatStage | None = None
+
     def __init__(
         self,
         request: StrategyRequest,
@@ -43,11 +47,16 @@ class ResponseStrategy(ABC):
         self, answer: str, source: str, **kwargs
     ) -> AsyncIterator[str]:
         """统一的流式输出"""
-        asyncio.create_task(self._stream_answer(answer, source, **kwargs))
-        async for chunk in self.handler.get_stream(
-            self.is_batch, query={"text": self.query}
-        ):
-            yield chunk
+        task = asyncio.create_task(self._stream_answer(answer, source, **kwargs))
+        try:
+            async for chunk in self.handler.get_stream(
+                self.is_batch, query={"text": self.query}
+            ):
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # 下游放弃时停止发送，不再写入聊天历史
+            task.cancel()
+            raise
 
     async def _stream_answer(self, answer: str, source: str, **kwargs):
         """流式发送答案"""
@@ -86,11 +95,12 @@ class ResponseStrategy(ABC):
             )
 
             # 更新聊天历史
+            await self.handler.wait_committed()
             if self.request.chat_id:
-                chat_history.add_message(
+                await chat_history.add_message(
                     self.request.chat_id, ChatRole.USER, self.query
                 )
-                chat_history.add_message(
+                await chat_history.add_message(
                     self.request.chat_id, ChatRole.ASSISTANT, answer
                 )
 
@@ -121,12 +131,19 @@ class StrategyChain:
     async def execute(self, query: str) -> AsyncIterator[str]:
         """按顺序执行策略"""
         for strategy in self.strategies:
+            start_ns = perf_counter_ns()
             if await strategy.can_handle(query):
                 has_result = False
                 async for chunk in strategy.execute(query):
+                    # 首个输出之前的时间即匹配耗时
+                    if not has_result and strategy.stage:
+                        strategy.handler.spans.record(strategy.stage.value, start_ns)
                     has_result = True
                     yield chunk
 
+                if not has_result and strategy.stage:
+                    strategy.handler.spans.record(strategy.stage.value, start_ns)
+
                 # 如果该策略产生了结果，就不再执行后续策略
                 if has_result:
                     return
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import AsyncIterator, Optional
 
 from chat2rag.config import CONFIG
+from chat2rag.core.enums import ChatStage
 from chat2rag.core.logger import get_logger
 from chat2rag.models.command import Command, ParamType
 from chat2rag.schemas.chat import SourceType
@@ -26,6 +27,8 @@ class MatchResult:
 class CommandStrategy(ResponseStrategy):
     """命令匹配策略：规则优先 -> 模糊匹配 -> LLM兜底"""
 
+    stage = ChatStage.COMMAND
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.command_service = CommandService()
@@ -1,6 +1,7 @@
 import os
 from typing import AsyncIterator
 
+from chat2rag.core.enums import ChatStage
 from chat2rag.schemas.chat import SourceType
 from chat2rag.services.collection_service import document_service
 
@@ -10,6 +11,8 @@ from .base import ResponseStrategy
 class ExactMatchStrategy(ResponseStrategy):
     """精确匹配策略"""
 
+    stage = ChatStage.EXACT_MATCH
+
     async def can_handle(self, query: str) -> bool:
         return self.request.precision_mode == 1 and bool(self.request.collections)
 
@@ -1,6 +1,7 @@
 from typing import AsyncIterator
 
 from chat2rag.config import CONFIG
+from chat2rag.core.enums import ChatStage
 from chat2rag.core.flow.flow import handle_flow
 
 from .base import ResponseStrategy
@@ -9,6 +10,8 @@ from .base import ResponseStrategy
 class FlowStrategy(ResponseStrategy):
     """流程处理策略"""
 
+    stage = ChatStage.FLOW
+
     async def can_handle(self, query: str) -> bool:
         return CONFIG.IS_FLOW and bool(self.request.flows)
 
@@ -2,12 +2,12 @@ import asyncio
 from time import perf_counter
 from typing import AsyncIterator
 
-from haystack.components.generators.chat import OpenAIChatGenerator
-from haystack.dataclasses import ChatMessage, ImageContent, StreamingChunk
-from haystack.utils import Secret
+from haystack.dataclasses import ChatMessage, StreamingChunk
 
 from chat2rag.config import CONFIG
 from chat2rag.core.logger import get_logger
+from chat2rag.utils.client_pool import client_pool
+from chat2rag.utils.image_ingest import image_ingestor
 
 from .base import ResponseStrategy
 
@@ -36,25 +36,21 @@ class MultiModalStrategy(ResponseStrategy):
 
     async def _process_pipeline(self):
         try:
-            image_data = self.request.content.image
-            multiModal = OpenAIChatGenerator(
+            multiModal = client_pool.get_chat_generator(
                 model=CONFIG.MULTIMODAL_MODEL,
                 api_base_url=CONFIG.MULTIMODAL_API_URL,
-                api_key=Secret.from_token(CONFIG.MULTIMODAL_API_KEY),
-                streaming_callback=self.handler.callback,
+                api_key=CONFIG.MULTIMODAL_API_KEY,
                 generation_kwargs={
                     "extra_body": {"stream_options": {"include_usage": True}}
                 },
             )
-            if image_data.startswith(("http://", "https://")):
-                image = ImageContent.from_url(image_data, detail="low")
-            else:
-                if image_data.startswith("data:image"):
-                    image_data = image_data.split(",", 1)[1]
-                image = ImageContent(base64_image=image_data, detail="low")
+            image = await image_ingestor.ingest(self.request.content.image)
 
-            user_message = ChatMessage.from_user(content_parts=[self.query, image])
-            result = await multiModal.run_async([user_message])
+            content_parts = [self.query, image] if image else [self.query]
+            user_message = ChatMessage.from_user(content_parts=content_parts)
+            result = await multiModal.run_async(
+                [user_message], streaming_callback=self.handler.callback
+            )
             message = result.get("replies")[0]
             usage = message.meta.get("usage", {})
 
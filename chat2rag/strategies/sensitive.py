@@ -1,6 +1,7 @@
 import re
 from typing import AsyncIterator
 
+from chat2rag.core.enums import ChatStage
 from chat2rag.services.sensitive_service import SensitiveService
 
 from .base import ResponseStrategy
@@ -11,6 +12,8 @@ sensitive_word_service = SensitiveService()
 class SensitiveWordStrategy(ResponseStrategy):
     """机器人敏感词策略"""
 
+    stage = ChatStage.SENSITIVE
+
     # 示例敏感词列表，实际可从request或配置动态获取
 
     async def can_handle(self, query: str) -> bool:
@@ -1,3 +1,3 @@
-from chat2rag.streaming.handler import StreamHandler, StreamHandlerV1
+from chat2rag.streaming.handler import StreamHandler, StreamHandlerV1, Transport
 
-__all__ = ["StreamHandler", "StreamHandlerV1"]
+__all__ = ["StreamHandler", "StreamHandlerV1", "Transport"]
@@ -6,8 +6,15 @@ BEHAVIOR_TAG_PATTERN = re.compile(r"\[(EMOJI|ACTION|IMAGE|VIDEO):.*?\]")
 
 TTS_PUNCTUATION_MARKS = [",", ".", "，", "。", "!", "?", "！", "？", "；", "：", "、"]
 
-TTS_BATCH_TIMEOUT = 0.05
+# 增量断句：有效字数阈值，首句使用更小的阈值以降低首段音频延迟
+TTS_SEGMENT_MIN_CHARS = 4
+TTS_SEGMENT_MAX_CHARS = 50
+TTS_FIRST_SEGMENT_MIN_CHARS = 2
+TTS_FIRST_SEGMENT_MAX_CHARS = 12
+
 TTS_MAX_BATCH_SIZE = 5
+# 同时在途（已提交、未输出）的句子合成数
+TTS_MAX_INFLIGHT = 4
 
 AUDIO_QUEUE_MAX_SIZE = 100
 TEXT_QUEUE_MAX_SIZE = 200
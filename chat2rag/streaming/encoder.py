@@ -0,0 +1,184 @@
+import struct
+from typing import Any
+
+import orjson
+
+from chat2rag.schemas.chat import AudioContent, SourceItem, StreamChunkV1, StreamChunkV2
+
+# create_time 在 schema 中是类定义时确定的默认值，与原 model_dump 输出保持一致
+_V2_CREATE_TIME = StreamChunkV2.model_fields["create_time"].default
+_V1_CREATE_TIME = StreamChunkV1.model_fields["create_time"].default
+
+_EMPTY_BEHAVIOR = b'{"emoji":"","action":""}'
+_EMPTY_TOOL = b'{"toolName":"","toolType":"","arguments":{},"toolResult":""}'
+_EMPTY_SOURCE = b'{"items":[]}'
+_EMPTY_DICT = b"{}"
+
+# WebSocket 二进制音频帧头：魔数 b"AU"、协议版本、保留位、句子序号（大端 uint32）
+AUDIO_FRAME_MAGIC = b"AU"
+AUDIO_FRAME_VERSION = 1
+AUDIO_FRAME_HEADER = struct.Struct(">2sBBI")
+
+
+def _dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=str)
+
+
+def _strip(value: str | None) -> str:
+    """与 BaseSchema 的 str_strip_whitespace 行为保持一致"""
+    return value.strip() if value else ""
+
+
+class StreamFrameEncoder:
+    """
+    SSE 帧编码器
+
+    每条消息的静态部分（messageId、model、createTime、空的 behavior/tool/source、
+    检索文档）只渲染一次，逐 token 只序列化变化的字段，输出与
+    `StreamChunkV2.model_dump(by_alias=True)` 等价的 JSON。
+    """
+
+    def __init__(self, message_id: str, model: str | None = None):
+        message_id_bytes = _dumps(_strip(message_id))
+        self._v2_tail = b',"createTime":' + _dumps(_V2_CREATE_TIME) + b',"messageId":' + message_id_bytes + b"}"
+        self._v1_tail = b',"createTime":' + _dumps(_V1_CREATE_TIME) + b',"messageId":' + message_id_bytes + b"}"
+        self._model_value: str | None = None
+        self._model = b'"None"'
+        self._documents_ref: dict | None = None
+        self._documents = _EMPTY_DICT
+        self.set_model(model)
+
+    def set_model(self, model: str | None):
+        if model is None or model == self._model_value:
+            return
+        self._model_value = model
+        self._model = _dumps(_strip(model))
+
+    def _documents_bytes(self, documents: dict | None) -> bytes:
+        if not documents:
+            return _EMPTY_DICT
+        # 检索文档在一次回复中只设置一次，按对象引用缓存序列化结果
+        if documents is not self._documents_ref:
+            self._documents_ref = documents
+            self._documents = _dumps(documents)
+        return self._documents
+
+    @staticmethod
+    def _audio_bytes(audio: AudioContent | None) -> bytes:
+        if audio is None:
+            return b"null"
+        return (
+            b'{"text":'
+            + _dumps(_strip(audio.text))
+            + b',"audioBase64":'
+            + _dumps(_strip(audio.audio_base64))
+            + b',"format":'
+            + _dumps(_strip(audio.format))
+            + b',"sampleRate":'
+            + _dumps(audio.sample_rate)
+            + b"}"
+        )
+
+    @staticmethod
+    def _tool_bytes(tool: str | None, tool_type: str, arguments: dict, tool_result: Any) -> bytes:
+        if not tool:
+            return _EMPTY_TOOL
+        return (
+            b'{"toolName":'
+            + _dumps(_strip(tool))
+            + b',"toolType":'
+            + _dumps(_strip(tool_type))
+            + b',"arguments":'
+            + _dumps(arguments or {})
+            + b',"toolResult":'
+            + _dumps(tool_result if tool_result is not None else "")
+            + b"}"
+        )
+
+    @staticmethod
+    def _source_bytes(items: list[SourceItem] | None) -> bytes:
+        if not items:
+            return _EMPTY_SOURCE
+        return b'{"items":' + _dumps([item.model_dump(by_alias=True) for item in items]) + b"}"
+
+    def encode(
+        self,
+        text: str = "",
+        status: int = 1,
+        image: str = "",
+        video: str = "",
+        audio: AudioContent | None = None,
+        emoji: str = "",
+        action: str = "",
+        tool: str | None = None,
+        tool_type: str = "",
+        arguments: dict | None = None,
+        tool_result: Any = None,
+        source_items: list[SourceItem] | None = None,
+        documents: dict | None = None,
+        query: dict | None = None,
+    ) -> bytes:
+        """编码一条 StreamChunkV2 消息，返回 JSON 字节"""
+        behavior = (
+            b'{"emoji":' + _dumps(_strip(emoji)) + b',"action":' + _dumps(_strip(action)) + b"}"
+            if emoji or action
+            else _EMPTY_BEHAVIOR
+        )
+        return b"".join(
+            (
+                b'{"object":"message","input":',
+                _dumps(query) if query else _EMPTY_DICT,
+                b',"content":{"text":',
+                _dumps(_strip(text)),
+                b',"image":',
+                _dumps(_strip(image)),
+                b',"video":',
+                _dumps(_strip(video)),
+                b',"audio":',
+                self._audio_bytes(audio),
+                b'},"model":',
+                self._model,
+                b',"status":',
+                str(status).encode(),
+                b',"behavior":',
+                behavior,
+                b',"tool":',
+                self._tool_bytes(tool, tool_type, arguments, tool_result),
+                b',"source":',
+                self._source_bytes(source_items) if status == 2 else _EMPTY_SOURCE,
+                b',"document":',
+                self._documents_bytes(documents),
+                self._v2_tail,
+            )
+        )
+
+    def encode_v1(self, text: str = "", status: int = 1, documents: dict | None = None) -> bytes:
+        """编码一条 StreamChunkV1 消息，返回 JSON 字节"""
+        document_count = sum(len(docs) for docs in documents.values()) if documents else 0
+        return b"".join(
+            (
+                b'{"object":"message","content":',
+                _dumps(_strip(text)),
+                b',"model":',
+                self._model,
+                b',"status":',
+                str(status).encode(),
+                b',"documentCount":',
+                str(document_count).encode(),
+                self._v1_tail,
+            )
+        )
+
+    @staticmethod
+    def to_sse(payload: bytes) -> str:
+        return "data: " + payload.decode("utf-8") + "\n\n"
+
+    @staticmethod
+    def to_text(payload: bytes) -> str:
+        """WebSocket 文本帧：紧凑 JSON，不带 SSE 前缀"""
+        return payload.decode("utf-8")
+
+    @staticmethod
+    def encode_audio_frame(seq: int, audio: bytes) -> bytes:
+        """WebSocket 二进制帧：8 字节帧头 + 原始音频"""
+        return AUDIO_FRAME_HEADER.pack(AUDIO_FRAME_MAGIC, AUDIO_FRAME_VERSION, 0, seq) + audio
@@ -1,28 +1,23 @@
 import asyncio
-import json
+import base64
 import uuid
+import weakref
+from time import perf_counter
 from typing import AsyncIterator
 
 from haystack.dataclasses import StreamingChunk
 
+from chat2rag.core.enums import ChatStage
 from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
+from chat2rag.core.spans import SpanRecorder
 from chat2rag.dataclass.stream import StreamConfig
-from chat2rag.schemas.chat import (
-    Audio,
-    AudioContent,
-    BehaviorSchema,
-    ContentSchema,
-    QueryContent,
-    SourceSchema,
-    SourceType,
-    StreamChunkV2,
-    ToolSchema,
-)
+from chat2rag.schemas.chat import Audio, AudioContent, QueryContent, SourceType
 from chat2rag.services.action_service import robot_action_service
 from chat2rag.services.expression_service import robot_expression_service
 from chat2rag.services.metrics_collector import MetricsCollector
 from chat2rag.streaming.behavior_parser import BehaviorTagParser
-from chat2rag.streaming.constants import BEHAVIOR_TAG_PATTERN
+from chat2rag.streaming.encoder import StreamFrameEncoder
 from chat2rag.streaming.mode_processor import create_mode_processor
 from chat2rag.streaming.tool_handler import ToolCallHandler
 from chat2rag.streaming.tts_processor import TTSProcessor
@@ -31,18 +26,51 @@ from chat2rag.providers.tts.factory import TTSFactory
 logger = get_logger(__name__)
 
 
+class Transport:
+    SSE = "sse"
+    WEBSOCKET = "ws"
+
+
 class StreamControl:
     START = "[START]"
     END = "[END]"
     DOC_INFO = "doc_info"
 
 
+# 正在输出的流，抓取运行时指标时读取其队列长度
+_active_handlers: "weakref.WeakSet[StreamHandler]" = weakref.WeakSet()
+
+
+def _tts_queue_depths() -> dict:
+    depths = {("text",): 0, ("audio",): 0}
+    for handler in list(_active_handlers):
+        if handler.tts_processor:
+            sizes = handler.tts_processor.get_queue_sizes()
+            depths[("text",)] += sizes["text_queue"]
+            depths[("audio",)] += sizes["audio_queue"]
+    return depths
+
+
+registry.gauge("active_streams", "正在输出的聊天流数量", callback=lambda: len(_active_handlers))
+registry.gauge(
+    "stream_queue_depth",
+    "所有聊天流中待输出的数据块数量",
+    callback=lambda: sum(handler.queue.qsize() for handler in list(_active_handlers)),
+)
+registry.gauge("tts_queue_depth", "TTS 待合成文本 / 待发送音频数量", ["queue"], callback=_tts_queue_depths)
+STREAMS_TOTAL = registry.counter("streams_total", "聊天流总数")
+STREAM_SECONDS = registry.histogram(
+    "stream_duration_seconds", "聊天流持续时间(秒)", buckets=(0.5, 1, 2, 3, 5, 10, 20, 30, 60, 120)
+)
+
+
 class StreamHandler:
     def __init__(
         self,
         config: StreamConfig | None = None,
         enable_tts: bool = False,
         audio_config: Audio | None = None,
+        transport: str = Transport.SSE,
     ):
         self.message_id = str(uuid.uuid4().hex[:16])
         self.config = config or StreamConfig()
@@ -67,15 +95,39 @@ class StreamHandler:
 
         self.audio_config = audio_config or Audio()
         self.mode_processor = None
+        self.encoder = StreamFrameEncoder(self.message_id)
+        self.transport = transport
+        self._audio_seq = 0
+        # 语音会话推测执行时设置：确认前不调用工具、不写入聊天历史和指标，被放弃时随任务一起取消
+        self.commit_gate: asyncio.Event | None = None
 
     @property
     def _execute_tools_list(self) -> list[str]:
         """向后兼容：工具执行列表"""
         return self.tool_handler._executed_tools
 
+    @property
+    def spans(self) -> SpanRecorder:
+        return self.metrics.spans
+
     async def callback(self, chunk: StreamingChunk):
         await self.queue.put(chunk)
 
+    async def wait_committed(self):
+        """推测执行的请求在此等待确认，普通请求直接返回"""
+        if self.commit_gate is not None:
+            await self.commit_gate.wait()
+
+    async def llm_callback(self, chunk: StreamingChunk):
+        """大模型流式输出回调，额外记录首 token 时间"""
+        if chunk.content:
+            self.spans.mark(ChatStage.LLM_FIRST_TOKEN.value)
+        if chunk.tool_calls:
+            # 推测执行的请求在工具调用前等待确认（生成器在此阻塞，ToolInvoker 不会执行），
+            # 被放弃时随任务取消，不产生工具副作用
+            await self.wait_committed()
+        await self.queue.put(chunk)
+
     def set_query_info(
         self,
         content: QueryContent,
@@ -109,8 +161,14 @@ class StreamHandler:
         if tools:
             self.metrics.add_tool_info(tools)
 
-    def set_token_info(self, input_tokens: int = 0, output_tokens: int = 0):
-        self.metrics.add_tokens(input_tokens, output_tokens)
+    def set_token_info(self, input_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0):
+        self.metrics.add_tokens(input_tokens, output_tokens, cached_tokens)
+
+    def set_prompt_prefix(self, prefix_hash: str, prefix_tokens: int):
+        self.metrics.set_prompt_prefix(prefix_hash, prefix_tokens)
+
+    def set_pipeline_time(self, elapsed_ms: float):
+        self.metrics.set_pipeline_time(elapsed_ms)
 
     def set_source(self, source: str):
         self.metrics.set_source(source)
@@ -142,13 +200,16 @@ class StreamHandler:
 
     async def get_stream(
         self, is_batch: bool = False, query: dict = {}
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[str | bytes]:
         self.mode_processor = create_mode_processor(is_batch, self.config.split_symbols)
 
         first_response_marked = False
         stream_ended = False
 
         logger.debug(f"[{self.message_id}] Stream started")
+        _active_handlers.add(self)
+        STREAMS_TOTAL.inc()
+        stream_start = perf_counter()
 
         try:
             while True:
@@ -224,6 +285,7 @@ class StreamHandler:
                             ):
                                 yield data_str
 
+                            await self.wait_committed()
                             await self.metrics.save()
                             logger.info(f"[{self.message_id}] Stream completed")
                             continue
@@ -256,7 +318,14 @@ class StreamHandler:
                             async for data_str in self._yield_audio_data(*result):
                                 yield data_str
 
+        except (asyncio.CancelledError, GeneratorExit):
+            # 下游放弃（如语音打断）：丢弃尚未合成和发送的音频
+            if self.tts_processor:
+                self.tts_processor.cancel()
+            raise
         finally:
+            _active_handlers.discard(self)
+            STREAM_SECONDS.observe(perf_counter() - stream_start)
             if self.tts_processor:
                 await self.tts_processor.stop_worker()
 
@@ -377,19 +446,38 @@ class StreamHandler:
         audio_content: AudioContent | None = None,
         **kwargs,
     ) -> AsyncIterator[str]:
-        data = await self._create_message(
+        frame = await self._build_frame(
             content, meta, audio_content=audio_content, **kwargs
         )
-        yield f"data: {json.dumps(data.model_dump(by_alias=True), ensure_ascii=False)}\n\n"
+        yield self._encode_frame(frame)
 
     async def _yield_audio_data(
-        self, type_: str, text: str, audio_base64: str, meta: dict | None
-    ) -> AsyncIterator[str]:
+        self, type_: str, text: str, audio_bytes: bytes, meta: dict | None
+    ) -> AsyncIterator[str | bytes]:
+        self.metrics.mark_first_audio()
+        if self.transport == Transport.WEBSOCKET:
+            # 音频元信息走文本帧（audioBase64 为空），紧随其后的二进制帧携带原始音频
+            self._audio_seq += 1
+            audio_content = self.tts_processor.build_audio_content(text, "")
+            async for data_str in self._yield_data("", meta, audio_content=audio_content):
+                yield data_str
+            yield self.encoder.encode_audio_frame(self._audio_seq, audio_bytes)
+            return
+
+        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
         audio_content = self.tts_processor.build_audio_content(text, audio_base64)
         async for data_str in self._yield_data("", meta, audio_content=audio_content):
             yield data_str
 
-    async def _create_message(
+    def _encode_frame(self, frame: dict) -> str:
+        """将帧字段编码为 SSE 数据或 WebSocket 文本帧"""
+        self.encoder.set_model(self.model)
+        payload = self.encoder.encode(**frame)
+        if self.transport == Transport.WEBSOCKET:
+            return self.encoder.to_text(payload)
+        return self.encoder.to_sse(payload)
+
+    async def _build_frame(
         self,
         content: str,
         meta: dict = None,
@@ -400,7 +488,8 @@ class StreamHandler:
         query: dict = {},
         behavior_data: dict = None,
         audio_content: AudioContent | None = None,
-    ) -> StreamChunkV2:
+    ) -> dict:
+        """计算一条消息的可变字段，交由 StreamFrameEncoder 编码"""
         if meta is None:
             meta = {"model": "None", "finish_reason": "none"}
 
@@ -421,8 +510,6 @@ class StreamHandler:
 
         if behavior_data is None:
             if content:
-                clean_text = BEHAVIOR_TAG_PATTERN.sub("", content).strip()
-
                 clean_text, _, tags = self.behavior_parser.extract_tags(content)
                 emoji_name = tags.get("emoji", "")
                 action_name = tags.get("action", "")
@@ -452,42 +539,29 @@ class StreamHandler:
             self._answer_parts.append(clean_content)
             self.metrics.set_answer("".join(self._answer_parts))
 
-        if tool:
-            tool_content = ToolSchema(
-                tool_name=tool,
-                tool_type=tool_type,
-                arguments=arguments,
-                tool_result=tool_result,
-            )
-        else:
-            tool_content = {}
-
-        return StreamChunkV2(
-            input=query,
-            content=ContentSchema(
-                text=behavior_data["clean_text"],
-                image=behavior_data["image"],
-                video=behavior_data["video"],
-                audio=audio_content,
-            ),
-            model=self.model,
-            status=status,
-            behavior=BehaviorSchema(
-                emoji=behavior_data["emoji"],
-                action=behavior_data["action"],
-            ),
-            tool=tool_content,
-            source=SourceSchema(items=self.metrics._source_items)
-            if status == 2
-            else SourceSchema(),
-            document=self.metrics._retrieval_documents
-            if self.metrics._retrieval_documents
-            else {},
-            message_id=self.message_id,
-        )
+        return {
+            "text": clean_content,
+            "status": status,
+            "image": behavior_data["image"],
+            "video": behavior_data["video"],
+            "audio": audio_content,
+            "emoji": behavior_data["emoji"],
+            "action": behavior_data["action"],
+            "tool": tool,
+            "tool_type": tool_type,
+            "arguments": arguments,
+            "tool_result": tool_result,
+            "source_items": self.metrics._source_items,
+            "documents": self.metrics._retrieval_documents,
+            "query": query,
+        }
 
 
 class StreamHandlerV1(StreamHandler):
-    async def _create_message(self, *args, **kwargs) -> StreamChunkV2:
-        res: StreamChunkV2 = await super()._create_message(*args, **kwargs)
-        return res.to_stream_chunk_v1()
+    def _encode_frame(self, frame: dict) -> str:
+        self.encoder.set_model(self.model)
+        return self.encoder.to_sse(
+            self.encoder.encode_v1(
+                text=frame["text"], status=frame["status"], documents=frame["documents"]
+            )
+        )
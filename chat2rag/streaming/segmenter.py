@@ -0,0 +1,132 @@
+from io import StringIO
+
+from chat2rag.streaming.constants import (
+    BEHAVIOR_TAG_TYPES,
+    TTS_FIRST_SEGMENT_MAX_CHARS,
+    TTS_FIRST_SEGMENT_MIN_CHARS,
+    TTS_PUNCTUATION_MARKS,
+    TTS_SEGMENT_MAX_CHARS,
+    TTS_SEGMENT_MIN_CHARS,
+)
+
+_PUNCTUATION = frozenset(TTS_PUNCTUATION_MARKS)
+_TAG_PREFIXES = tuple(f"[{tag}:" for tag in BEHAVIOR_TAG_TYPES)
+_MAX_TAG_LENGTH = 256
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and (char.isalnum() or char in "'-")
+
+
+class SentenceSegmenter:
+    """
+    增量断句器
+
+    逐字符处理新到达的文本，已扫描过的内容不会再次扫描：
+    - 行为标签（[EMOJI:...] 等）在流中直接剥离，跨 chunk 的半截标签会暂存
+    - 遇到标点且有效字数 >= min_chars 时切句，过短的分句并入下一句
+    - 无标点时有效字数达到 max_chars 强制切句，不拆开英文单词
+    - 首句使用更小的阈值，尽早送出第一段音频
+    """
+
+    def __init__(
+        self,
+        min_chars: int = TTS_SEGMENT_MIN_CHARS,
+        max_chars: int = TTS_SEGMENT_MAX_CHARS,
+        first_min_chars: int = TTS_FIRST_SEGMENT_MIN_CHARS,
+        first_max_chars: int = TTS_FIRST_SEGMENT_MAX_CHARS,
+    ):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.first_min_chars = first_min_chars
+        self.first_max_chars = first_max_chars
+
+        self._segment = StringIO()
+        self._content_len = 0
+        self._tag = ""
+        self._emitted = 0
+
+    @property
+    def _limits(self) -> tuple[int, int]:
+        if self._emitted == 0:
+            return self.first_min_chars, self.first_max_chars
+        return self.min_chars, self.max_chars
+
+    def feed(self, text: str) -> list[str]:
+        """追加文本，返回本次完成切分的句子"""
+        segments: list[str] = []
+        self._process(text, segments)
+        return segments
+
+    def flush(self) -> str:
+        """输出剩余文本（包括未闭合的半截标签）并重置状态"""
+        if self._tag:
+            self._segment.write(self._tag)
+            self._tag = ""
+        segment = self._segment.getvalue().strip()
+        self._reset_segment()
+        self._emitted = 0
+        return segment
+
+    def _process(self, text: str, segments: list[str]):
+        for char in text:
+            if self._tag:
+                self._tag += char
+                if self._is_behavior_tag(self._tag):
+                    if char == "]":
+                        # 完整的行为标签，直接丢弃
+                        self._tag = ""
+                    continue
+                # 不是行为标签："[" 按普通文本输出，其余字符重新处理
+                pending, self._tag = self._tag, ""
+                self._append("[", segments)
+                self._process(pending[1:], segments)
+            elif char == "[":
+                self._tag = char
+            else:
+                self._append(char, segments)
+
+    @staticmethod
+    def _is_behavior_tag(tag: str) -> bool:
+        for prefix in _TAG_PREFIXES:
+            if prefix.startswith(tag):
+                return True
+            if tag.startswith(prefix):
+                return len(tag) <= _MAX_TAG_LENGTH
+        return False
+
+    def _append(self, char: str, segments: list[str]):
+        self._segment.write(char)
+        is_punct = char in _PUNCTUATION
+        if not is_punct and not char.isspace():
+            self._content_len += 1
+
+        min_chars, max_chars = self._limits
+        if is_punct and self._content_len >= min_chars:
+            self._cut(self._segment.getvalue(), "", segments)
+        elif self._content_len >= max_chars:
+            self._cut(*self._split_word(self._segment.getvalue()), segments)
+
+    @staticmethod
+    def _split_word(text: str) -> tuple[str, str]:
+        """强制切句时退回到末尾英文单词之前，整句都是一个单词时照常切分"""
+        start = len(text)
+        while start > 0 and _is_word_char(text[start - 1]):
+            start -= 1
+        if start == len(text) or not text[:start].strip():
+            return text, ""
+        return text[:start], text[start:]
+
+    def _cut(self, segment: str, carry: str, segments: list[str]):
+        segment = segment.strip()
+        self._reset_segment()
+        if carry:
+            self._segment.write(carry)
+            self._content_len = len(carry)
+        if segment:
+            segments.append(segment)
+            self._emitted += 1
+
+    def _reset_segment(self):
+        self._segment = StringIO()
+        self._content_len = 0
@@ -1,19 +1,17 @@
 import asyncio
-import base64
-from io import StringIO
 from typing import AsyncGenerator, AsyncIterator
 
 from chat2rag.core.logger import get_logger
 from chat2rag.providers.tts import BaseTTS
+from chat2rag.providers.tts.audio_cache import tts_audio_cache
 from chat2rag.schemas.chat import Audio, AudioContent
 from chat2rag.streaming.constants import (
     AUDIO_QUEUE_MAX_SIZE,
-    BEHAVIOR_TAG_PATTERN,
-    TTS_BATCH_TIMEOUT,
     TTS_MAX_BATCH_SIZE,
-    TTS_PUNCTUATION_MARKS,
+    TTS_MAX_INFLIGHT,
     TEXT_QUEUE_MAX_SIZE,
 )
+from chat2rag.streaming.segmenter import SentenceSegmenter
 
 logger = get_logger(__name__)
 
@@ -26,11 +24,14 @@ class TTSProcessor:
         self._audio_queue: asyncio.Queue = asyncio.Queue(maxsize=AUDIO_QUEUE_MAX_SIZE)
         self._text_queue: asyncio.Queue = asyncio.Queue(maxsize=TEXT_QUEUE_MAX_SIZE)
 
+        # 已提交合成的句子按顺序排队，由 _emit_loop 按序取回音频
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=TTS_MAX_INFLIGHT)
+
         self._worker_task: asyncio.Task | None = None
+        self._emit_task: asyncio.Task | None = None
         self._running = False
         self._initialized = False
 
-        self._text_buffer = StringIO()
         self._initialized_lock = asyncio.Lock()
 
     async def initialize(self) -> bool:
@@ -58,6 +59,8 @@ class TTSProcessor:
                 return
 
         self._running = True
+        self._pending = asyncio.Queue(maxsize=TTS_MAX_INFLIGHT)
+        self._emit_task = asyncio.create_task(self._emit_loop())
         self._worker_task = asyncio.create_task(self._tts_worker_loop())
         logger.debug("TTS worker started")
 
@@ -78,10 +81,40 @@ class TTSProcessor:
 
             self._worker_task = None
 
+        if self._emit_task:
+            try:
+                await self._pending.put(None)
+                await asyncio.wait_for(self._emit_task, timeout=10.0)
+            except asyncio.TimeoutError:
+                logger.warning("TTS emitter timeout, cancelling")
+                self._emit_task.cancel()
+            except asyncio.CancelledError:
+                pass
+
+            self._emit_task = None
+
         self._running = False
-        self._text_buffer = StringIO()
         logger.debug("TTS worker stopped")
 
+    def cancel(self):
+        """立即停止：取消合成中的句子，丢弃未发送的音频（用于语音打断）"""
+        for task in (self._worker_task, self._emit_task):
+            if task:
+                task.cancel()
+        self._worker_task = None
+        self._emit_task = None
+
+        while not self._pending.empty():
+            item = self._pending.get_nowait()
+            if item:
+                item[1].cancel()
+        for queue in (self._text_queue, self._audio_queue):
+            while not queue.empty():
+                queue.get_nowait()
+
+        self._running = False
+        logger.debug("TTS worker cancelled")
+
     async def add_text(self, text: str):
         if not self._running or not text:
             return
@@ -91,7 +124,7 @@ class TTSProcessor:
         except asyncio.QueueFull:
             logger.warning("TTS text queue full, dropping text chunk")
 
-    async def get_audio(self, timeout: float = 0.1) -> tuple[str, str, dict] | None:
+    async def get_audio(self, timeout: float = 0.1) -> tuple[str, str, bytes, dict] | None:
         try:
             audio_data = await asyncio.wait_for(
                 self._audio_queue.get(), timeout=timeout
@@ -104,7 +137,7 @@ class TTSProcessor:
 
     async def drain_audio_queue(
         self, timeout: float = 5.0
-    ) -> AsyncIterator[tuple[str, str, dict]]:
+    ) -> AsyncIterator[tuple[str, str, bytes, dict]]:
         while True:
             try:
                 audio_data = await asyncio.wait_for(
@@ -117,10 +150,11 @@ class TTSProcessor:
                 break
 
     async def _tts_worker_loop(self):
-        buffer = StringIO()
+        segmenter = SentenceSegmenter()
+        stopping = False
 
         try:
-            while self._running:
+            while self._running and not stopping:
                 texts = []
 
                 try:
@@ -137,65 +171,75 @@ class TTSProcessor:
                     try:
                         text = self._text_queue.get_nowait()
                         if text is None:
+                            stopping = True
                             break
                         texts.append(text)
                     except asyncio.QueueEmpty:
                         break
 
-                combined_text = "".join(texts)
-                buffer.write(combined_text)
+                for sentence in segmenter.feed("".join(texts)):
+                    await self._submit_sentence(sentence)
 
-                clean_text = BEHAVIOR_TAG_PATTERN.sub("", buffer.getvalue())
-
-                last_punct_pos = max(
-                    (clean_text.rfind(mark) for mark in TTS_PUNCTUATION_MARKS),
-                    default=-1,
-                )
-
-                if last_punct_pos >= 0:
-                    sentence = clean_text[: last_punct_pos + 1]
-                    remaining = clean_text[last_punct_pos + 1 :]
-
-                    buffer = StringIO()
-                    buffer.write(remaining)
-
-                    await self._process_sentence(sentence)
-
-            if buffer.getvalue().strip():
-                final_text = buffer.getvalue().strip()
-                await self._process_sentence(final_text)
+            await self._submit_sentence(segmenter.flush())
 
         except asyncio.CancelledError:
-            if buffer.getvalue().strip():
-                try:
-                    await self._process_sentence(buffer.getvalue().strip())
-                except Exception:
-                    pass
+            try:
+                await self._submit_sentence(segmenter.flush())
+            except Exception:
+                pass
         except Exception:
             logger.exception("TTS worker error")
 
-    async def _process_sentence(self, sentence: str):
+    async def _submit_sentence(self, sentence: str):
+        """立即发起合成，不等待结果；在途句子数超过上限时在此阻塞"""
         if not sentence or not sentence.strip():
             return
 
+        task = asyncio.create_task(self._synthesize(sentence))
+        await self._pending.put((sentence, task))
+
+    async def _synthesize(self, sentence: str) -> bytes | None:
+        cached = await tts_audio_cache.get(self.audio_config, sentence)
+        if cached is not None:
+            return cached
+
         try:
             if hasattr(self.tts_provider, "speak_sentence"):
                 audio_bytes = await self.tts_provider.speak_sentence(sentence)
             else:
                 audio_bytes = await self.tts_provider.speak(sentence)
+        except Exception:
+            logger.warning(f"TTS process error for sentence: {sentence[:50]}")
+            return None
+
+        if audio_bytes:
+            await tts_audio_cache.put(self.audio_config, sentence, audio_bytes)
+        return audio_bytes
+
+    async def _emit_loop(self):
+        """按提交顺序取回各句音频，保证播放顺序与文本一致"""
+        while True:
+            item = await self._pending.get()
+            if item is None:
+                break
+
+            sentence, task = item
+            try:
+                audio_bytes = await task
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                audio_bytes = None
 
             if audio_bytes:
-                audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-                audio_data = ("audio", sentence, audio_base64, None)
+                # 保留原始字节，由传输层决定 base64（SSE）或二进制帧（WebSocket）
+                audio_data = ("audio", sentence, audio_bytes, None)
 
                 try:
                     self._audio_queue.put_nowait(audio_data)
                 except asyncio.QueueFull:
                     logger.warning("Audio queue full, dropping audio chunk")
 
-        except Exception:
-            logger.warning(f"TTS process error for sentence: {sentence[:50]}")
-
     def build_audio_content(self, text: str, audio_base64: str) -> AudioContent:
         return AudioContent(
             text=text,
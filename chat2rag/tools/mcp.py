@@ -11,6 +11,7 @@ from haystack_integrations.tools.mcp import (
 
 from chat2rag.core.enums import MCPToolType
 from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
 from chat2rag.models import MCPServer
 
 logger = get_logger(__name__)
@@ -37,6 +38,8 @@ class MCPConnectionManager:
                 if not self._initialized:
                     self._toolsets: Dict[int, MCPToolset] = {}
                     self._locks: Dict[int, asyncio.Lock] = {}
+                    # server_id -> connecting / connected / failed
+                    self._states: Dict[int, str] = {}
                     MCPConnectionManager._initialized = True
 
     async def get_toolset(self, server: MCPServer) -> MCPToolset | None:
@@ -57,16 +60,21 @@ class MCPConnectionManager:
             try:
                 server_info = self._create_server_info(server)
                 if not server_info:
+                    self._states[server.id] = "failed"
                     return None
 
                 logger.debug(f"Connecting to MCP service: {server.name} ({server_info})")
-                toolset = MCPToolset(server_info=server_info, eager_connect=True)
+                self._states[server.id] = "connecting"
+                # eager_connect 在构造函数中同步建连并拉取工具列表，放到线程中执行，不阻塞事件循环
+                toolset = await asyncio.to_thread(MCPToolset, server_info=server_info, eager_connect=True)
 
                 self._toolsets[server.id] = toolset
+                self._states[server.id] = "connected"
                 logger.info(f"Connected to MCP server: {server.name}")
                 return toolset
 
             except Exception as e:
+                self._states[server.id] = "failed"
                 logger.error(f"Failed to create toolset for server {server.name}: {e}", exc_info=True)
                 return None
 
@@ -84,6 +92,7 @@ class MCPConnectionManager:
 
     async def remove_toolset(self, server_id: int) -> bool:
         """移除并清理toolset"""
+        self._states.pop(server_id, None)
         if server_id not in self._toolsets:
             return False
 
@@ -108,6 +117,12 @@ class MCPConnectionManager:
             # 清理锁
             self._locks.pop(server_id, None)
 
+    def get_state_counts(self) -> Dict[tuple, int]:
+        counts = {("connecting",): 0, ("connected",): 0, ("failed",): 0}
+        for state in list(self._states.values()):
+            counts[(state,)] += 1
+        return counts
+
     async def cleanup_all(self):
         """清理所有连接"""
         for server_id in list(self._toolsets.keys()):
@@ -121,3 +136,4 @@ class MCPConnectionManager:
 
 
 connection_manager = MCPConnectionManager()
+registry.gauge("mcp_connections", "MCP 服务连接数，按状态", ["state"], callback=connection_manager.get_state_counts)
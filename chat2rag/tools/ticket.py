@@ -5,14 +5,12 @@
 
 import re
 from datetime import datetime
-from pathlib import Path
 from typing import Annotated
 
-import pandas as pd
 from haystack.tools import tool
 
 from chat2rag.core.logger import get_logger
-from chat2rag.services.excel_schema_service import load_schema, read_excel_with_schema
+from chat2rag.services.timetable_service import TimetableUnavailable, timetable_service
 
 logger = get_logger(__name__)
 
@@ -67,47 +65,22 @@ def get_train_info(
     try:
         normalized_train_number = normalize_train_number(train_number)
 
-        excel_file = Path("uploads/ticket/福州南站综控室班计划作业记录表.xlsx")
-        schema_path = excel_file.parent / "schema.json"
+        timetable = timetable_service.get()
+        rows = timetable.find(normalized_train_number)
 
-        if not excel_file.exists():
-            return f"错误：找不到班计划作业记录表文件 {excel_file}"
+        if len(rows) > 1:
+            train_options = [timetable.train_numbers[row] for row in rows]
+            return f"找到多个车次包含号码 {normalized_train_number}：{', '.join(train_options)}，请指定具体车次号"
 
-        if not load_schema(schema_path):
-            return "错误：请先上传Excel文件以识别表格结构"
-
-        df = read_excel_with_schema(excel_file)
-
-        train_row = None
-        potential_matches = []
-
-        for idx, row in df.iterrows():
-            if pd.notna(row.get("车次")):
-                db_train_number = str(row["车次"]).strip().replace("★", "").replace("◆", "").upper()
-                db_train_only_number = db_train_number.replace("G", "").replace("C", "").replace("D", "")
-
-                if db_train_number == normalized_train_number:
-                    train_row = row
-                    break
-
-                elif db_train_only_number == normalized_train_number:
-                    potential_matches.append((db_train_number, row))
-
-        if train_row is None and potential_matches:
-            if len(potential_matches) == 1:
-                train_row = potential_matches[0][1]
-            else:
-                train_options = [match[0] for match in potential_matches]
-                return f"找到多个车次包含号码 {normalized_train_number}：{', '.join(train_options)}，请指定具体车次号"
-
-        if train_row is None:
+        if not rows:
             return f"未找到车次 {normalized_train_number} 的信息，请确认车次号是否正确"
 
-        departure_time_str = str(train_row.get("开车时刻", "")).strip()
-        train_number_formated = str(train_row.get("车次", "")).strip().replace("★", "").replace("◆", "").upper()
-        gate_info = str(train_row.get("检票口", "")).strip()
+        row = rows[0]
+        departure_time_str = timetable.departures[row]
+        train_number_formated = timetable.train_numbers[row]
+        gate_info = timetable.gates[row]
 
-        if not departure_time_str or departure_time_str == "nan":
+        if not departure_time_str:
             return f"车次 {normalized_train_number} 的开车时间信息不完整"
 
         try:
@@ -124,7 +97,7 @@ def get_train_info(
         except ValueError:
             return f"车次 {normalized_train_number} 的开车时间格式错误：{departure_time_str}"
 
-        gate_text = f"检票口：{gate_info}" if gate_info and gate_info != "nan" else "检票口信息暂未更新"
+        gate_text = f"检票口：{gate_info}" if gate_info else "检票口信息暂未更新"
 
         if time_diff < 0:
             return f"""车次 {train_number_formated} 开车时间：{departure_time_str}
@@ -157,6 +130,8 @@ def get_train_info(
 如需导航，请说带我去{gate_options}检票口。(机器人仅支持固定命令触发导航，重要：务必输出该提示内容)
 """
 
+    except TimetableUnavailable as e:
+        return str(e)
     except FileNotFoundError:
         return "错误：找不到班计划作业记录表文件，请确认文件路径是否正确"
     except Exception as e:
@@ -172,40 +147,22 @@ def list_current_trains() -> str:
         当前时间段列车列表的字符串
     """
     try:
-        excel_file = Path("uploads/ticket/福州南站综控室班计划作业记录表.xlsx")
-        schema_path = excel_file.parent / "schema.json"
-
-        if not excel_file.exists():
-            return f"错误：找不到班计划作业记录表文件 {excel_file}"
-
-        if not load_schema(schema_path):
-            return "错误：请先上传Excel文件以识别表格结构"
-
-        df = read_excel_with_schema(excel_file)
-
-        current_time = datetime.now()
-        current_hour = current_time.hour
-
-        relevant_trains = []
-
-        for idx, row in df.iterrows():
-            if pd.notna(row.get("车次")) and pd.notna(row.get("开车时刻")):
-                try:
-                    departure_time_str = str(row["开车时刻"]).strip()
-                    departure_hour = int(departure_time_str.split(":")[0])
-
-                    if abs(departure_hour - current_hour) <= 2:
-                        train_number = str(row["车次"]).replace("★", "").replace("◆", "").strip()
-                        gate_info = str(row.get("检票口", "")).strip()
-                        relevant_trains.append(f"{train_number} - {departure_time_str} - 检票口：{gate_info}")
+        timetable = timetable_service.get()
 
-                except (ValueError, IndexError):
-                    continue
+        # 前后 2 小时（按小时计）内开车的列车
+        current_hour = datetime.now().hour
+        rows = timetable.rows_between((current_hour - 2) * 60, (current_hour + 3) * 60)
+        relevant_trains = [
+            f"{timetable.train_numbers[row]} - {timetable.departures[row]} - 检票口：{timetable.gates[row]}"
+            for row in rows
+        ]
 
         if not relevant_trains:
             return "当前时间段暂无列车信息"
 
         return "当前时间段列车信息：\n" + "\n".join(relevant_trains)
 
+    except TimetableUnavailable as e:
+        return str(e)
     except Exception as e:
         return f"查询列车列表时发生错误：{str(e)}"
@@ -30,6 +30,32 @@ class MetricController:
         else:
             return []
 
+    def get_metric_aggregate(
+        self,
+        start_time: str,
+        end_time: str,
+        collection: str = "",
+        granularity: str = "hour",
+        group_by: list[str] | None = None,
+    ):
+        """获取预聚合的指标统计；group_by 为空列表时返回整个区间的汇总"""
+        response = requests.get(
+            f"{self.metric_base_url}/aggregate",
+            params={
+                "granularity": granularity,
+                "startTime": start_time,
+                "endTime": end_time,
+                "collection": collection or None,
+                # requests 会丢弃空列表参数，汇总查询需显式传 "none"
+                "groupBy": ["bucket"] if group_by is None else group_by or ["none"],
+            },
+            timeout=10,
+        )
+        if response.status_code == 200:
+            return response.json()["data"] or []
+        else:
+            return []
+
     def get_hot_questions(self, collection: str | None = None, days: int = 30, limit: int = 10):
         response = requests.get(
             f"{self.metric_base_url}/hot-questions",
@@ -22,6 +22,7 @@ def init_state():
         "metric_page_size": 10,
         "collection_metric_select": "",
         "metrics_data": None,
+        "metrics_aggregate": None,
         # 热门问题相关
         "hot_collection": "",
         "hot_days": 30,
@@ -50,6 +51,29 @@ def load_metrics_data():
         return []
 
 
+def load_metrics_aggregate():
+    """加载预聚合统计：汇总、按场景、按模型、按时间"""
+    try:
+        params = dict(
+            start_time=st.session_state.metric_start_date,
+            end_time=st.session_state.metric_end_date,
+            collection=st.session_state.collection_metric_select,
+        )
+        start = datetime.strptime(st.session_state.metric_start_date, "%Y-%m-%d")
+        end = datetime.strptime(st.session_state.metric_end_date, "%Y-%m-%d")
+        granularity = "day" if (end - start).days > 7 else "hour"
+        summary = metric_controller.get_metric_aggregate(**params, granularity="day", group_by=[])
+        return {
+            "summary": summary[0] if summary else None,
+            "collections": metric_controller.get_metric_aggregate(**params, granularity="day", group_by=["collections"]),
+            "model": metric_controller.get_metric_aggregate(**params, granularity="day", group_by=["model"]),
+            "trend": metric_controller.get_metric_aggregate(**params, granularity=granularity, group_by=["bucket"]),
+        }
+    except Exception as e:
+        st.error(f"加载统计数据失败: {str(e)}")
+        return {}
+
+
 def load_hot_questions_data():
     """加载热门问题数据"""
     try:
@@ -152,6 +176,7 @@ def render_metrics_sidebar_content():
         if st.button("查询指标数据", use_container_width=True, type="primary"):
             with st.spinner("正在加载数据..."):
                 st.session_state.metrics_data = load_metrics_data()
+                st.session_state.metrics_aggregate = load_metrics_aggregate()
             st.rerun()
 
 
@@ -278,19 +303,19 @@ def render_metrics_table(df):
     )
 
 
-def render_metrics_charts(df):
-    """渲染指标统计图表"""
-    if df is None or df.empty:
+def render_metrics_charts(aggregate):
+    """渲染指标统计图表（预聚合数据）"""
+    if not aggregate or not aggregate.get("summary"):
         return
 
     col1, col2 = st.columns(2)
 
     with col1:
         # 场景分布
-        if "场景" in df.columns:
-            collection_counts = df["场景"].value_counts().reset_index()
-            collection_counts.columns = ["场景", "数量"]
-
+        if aggregate.get("collections"):
+            collection_counts = pd.DataFrame(
+                [{"场景": item["collections"] or "无", "数量": item["count"]} for item in aggregate["collections"]]
+            )
             fig = px.pie(
                 collection_counts,
                 values="数量",
@@ -301,10 +326,10 @@ def render_metrics_charts(df):
 
     with col2:
         # 模型分布
-        if "模型" in df.columns:
-            model_counts = df["模型"].value_counts().reset_index()
-            model_counts.columns = ["模型", "数量"]
-
+        if aggregate.get("model"):
+            model_counts = pd.DataFrame(
+                [{"模型": item["model"] or "未知", "数量": item["count"]} for item in aggregate["model"]]
+            )
             fig = px.pie(
                 model_counts,
                 values="数量",
@@ -314,23 +339,42 @@ def render_metrics_charts(df):
             st.plotly_chart(fig, use_container_width=True)
 
     # 响应时间趋势
-    if "创建时间" in df.columns and "firstResponseMs_raw" in df.columns:
-        df_trend = df.copy()
-        df_trend["创建时间"] = pd.to_datetime(df_trend["创建时间"])
-        df_trend = df_trend.sort_values("创建时间")
-        df_trend = df_trend.dropna(subset=["firstResponseMs_raw"])
+    if aggregate.get("trend"):
+        df_trend = pd.DataFrame(aggregate["trend"])
+        df_trend["bucket"] = pd.to_datetime(df_trend["bucket"])
+        df_trend = df_trend.sort_values("bucket").dropna(subset=["p50FirstResponseMs"])
 
         if not df_trend.empty:
             fig = px.line(
                 df_trend,
-                x="创建时间",
-                y="firstResponseMs_raw",
+                x="bucket",
+                y=["p50FirstResponseMs", "p95FirstResponseMs"],
                 title="首次响应时间趋势",
-                labels={"创建时间": "时间", "firstResponseMs_raw": "响应时间(ms)"},
+                labels={"bucket": "时间", "value": "响应时间(ms)", "variable": "分位数"},
                 markers=True,
             )
             st.plotly_chart(fig, use_container_width=True)
 
+    # 各阶段耗时分位数
+    summary = aggregate["summary"]
+    if summary.get("stageP50Ms"):
+        df_stage = pd.DataFrame(
+            {
+                "阶段": list(summary["stageP50Ms"].keys()),
+                "P50": list(summary["stageP50Ms"].values()),
+                "P95": [summary.get("stageP95Ms", {}).get(stage) for stage in summary["stageP50Ms"]],
+            }
+        )
+        fig = px.bar(
+            df_stage,
+            x="阶段",
+            y=["P50", "P95"],
+            barmode="group",
+            title="各阶段耗时分位数",
+            labels={"value": "耗时(ms)", "variable": "分位数"},
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
 
 def render_metrics_tab():
     """渲染指标列表标签页"""
@@ -339,25 +383,25 @@ def render_metrics_tab():
     # 初始加载数据
     if st.session_state.metrics_data is None:
         st.session_state.metrics_data = load_metrics_data()
+    if st.session_state.metrics_aggregate is None:
+        st.session_state.metrics_aggregate = load_metrics_aggregate()
 
     metrics = st.session_state.metrics_data
+    aggregate = st.session_state.metrics_aggregate
     df = prepare_metrics_dataframe(metrics)
 
-    # 显示统计信息
-    if df is not None and not df.empty:
+    # 显示统计信息（整个时间范围，而非当前页）
+    summary = (aggregate or {}).get("summary")
+    if summary:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("总记录数", len(df))
+            st.metric("总记录数", summary["count"])
         with col2:
-            if "场景" in df.columns:
-                st.metric("场景数", df["场景"].nunique())
+            st.metric("场景数", len(aggregate.get("collections") or []))
         with col3:
-            if "模型" in df.columns:
-                st.metric("模型数", df["模型"].nunique())
+            st.metric("模型数", len(aggregate.get("model") or []))
         with col4:
-            if "firstResponseMs_raw" in df.columns:
-                avg_time = df["firstResponseMs_raw"].mean()
-                st.metric("平均响应时间", format_response_time(avg_time))
+            st.metric("平均响应时间", format_response_time(summary.get("avgFirstResponseMs")))
 
     st.divider()
 
@@ -369,7 +413,7 @@ def render_metrics_tab():
 
     # 统计图表
     st.subheader("数据分析")
-    render_metrics_charts(df)
+    render_metrics_charts(aggregate)
 
 
 # ==================== 热门问题渲染 ====================
@@ -1,12 +1,18 @@
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, List, Optional
 
-from cachetools import TTLCache
-from haystack.dataclasses import ChatMessage, ChatRole, ImageContent, ToolCall
+from haystack.dataclasses import ChatMessage, ChatRole, ToolCall
 
+from chat2rag.config import CONFIG
 from chat2rag.core.logger import get_logger
+from chat2rag.core.session_store import SessionStore, session_store
 from chat2rag.services.action_service import robot_action_service
 from chat2rag.services.expression_service import robot_expression_service
+from chat2rag.services.history_summary_service import history_summarizer
 from chat2rag.services.prompt_service import prompt_service
+from chat2rag.utils.history_window import HistoryEntry, build_history_window, message_tokens
+from chat2rag.utils.image_ingest import dedupe_images, image_ingestor
+from chat2rag.utils.prompt_layout import PromptLayout
 
 logger = get_logger(__name__)
 
@@ -25,8 +31,7 @@ content: {{{{ doc.content }}}} score: {{{{ doc.score }}}}
 若存在图片链接，请根据问题内容判断是否进行输出
 """
 
-EXTRA_PROMPT = """
-请根据以上内容回答用户问题。
+MARKER_PROMPT = """
 你可以使用以下特殊标记来表示非文本内容：
 - 动作：[ACTION:动作名称]，示例: [ACTION:{action0}]，可选动作：可选动作：{actions}
 - 表情：[EMOJI:emoji名称]，示例: [EMOJI:{emoji0}]，可选表情：可选表情：{emojis}
@@ -34,23 +39,118 @@ EXTRA_PROMPT = """
 - 链接：`[LINK:URL]`，示例：[LINK:https://example.com]，确保 URL 完整且以 http:// 或 https:// 开头
 
 上述标记请在文本回复前提前合理地使用，以增强交互表现力。仅输出与问题相关的标记和回答内容，避免冗余解释。
+"""
+
+EXTRA_PROMPT = "\n请根据以上内容回答用户问题。" + MARKER_PROMPT + "回答：\n"
+
+# prefix_stable 布局下的用户消息：只包含每轮变化的内容
+STABLE_QUERY_TEMPLATE = (
+    DEFAULT_QUERY_TEMPLATE
+    + """{% if time %}
+当前时间：{{ time }}
+{% endif %}
+请根据以上内容回答用户问题。
 回答：
 """
+)
+
+
+def _format_markers(template: str, actions: tuple[str, ...], emojis: tuple[str, ...]) -> str:
+    return template.format(
+        action0=next(iter(actions), ""),
+        actions="、".join(actions),
+        emoji0=next(iter(emojis), ""),
+        emojis="、".join(emojis),
+    )
+
+
+@lru_cache(maxsize=32)
+def build_user_template(actions: tuple[str, ...], emojis: tuple[str, ...]) -> str:
+    """拼接带特殊标记说明的用户消息模板，相同的动作/表情组合只格式化一次"""
+    return DEFAULT_QUERY_TEMPLATE + _format_markers(EXTRA_PROMPT, actions, emojis)
+
+
+@lru_cache(maxsize=32)
+def build_marker_prompt(actions: tuple[str, ...], emojis: tuple[str, ...]) -> str:
+    """prefix_stable 布局下放入系统提示词的动作/表情说明"""
+    return _format_markers(MARKER_PROMPT, actions, emojis)
+
+
+_ROLE_CODES = {
+    ChatRole.USER: "u",
+    ChatRole.ASSISTANT: "a",
+    ChatRole.SYSTEM: "s",
+}
+_CODE_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+SUMMARY_PROMPT_PREFIX = "以下是之前对话的摘要：\n"
+
+
+def encode_message(message: ChatMessage) -> Any:
+    """
+    将 ChatMessage 编码为紧凑记录，并附带写入时计算的 token 数
+
+    纯文本消息编码为 [角色代码, 文本, token 数]，其余（工具调用、图片等）保留完整的 to_dict 结构
+    """
+    tokens = message_tokens(message)
+    is_plain_text = (
+        message.role in _ROLE_CODES
+        and len(message.texts) == 1
+        and not message.tool_calls
+        and not message.tool_call_results
+        and not message.images
+        and not getattr(message, "reasonings", None)
+    )
+    if is_plain_text:
+        return [_ROLE_CODES[message.role], message.text, tokens]
+    return {"d": message.to_dict(), "t": tokens}
+
+
+def decode_entry(record: Any) -> HistoryEntry:
+    if isinstance(record, list):
+        code, text, *rest = record
+        role = _CODE_ROLES[code]
+        if role == ChatRole.USER:
+            message = ChatMessage.from_user(text)
+        elif role == ChatRole.ASSISTANT:
+            message = ChatMessage.from_assistant(text)
+        else:
+            message = ChatMessage.from_system(text)
+        tokens = rest[0] if rest else None
+    else:
+        message = ChatMessage.from_dict(record["d"])
+        tokens = record.get("t")
+    return HistoryEntry(message=message, tokens=tokens if tokens is not None else message_tokens(message))
+
+
+def decode_message(record: Any) -> ChatMessage:
+    return decode_entry(record).message
 
 
 class ChatHistory:
+    """聊天记录，存放在可插拔的会话存储中（见 SESSION_STORE 配置）"""
+
+    NAMESPACE = "chat_history"
+
     _instance = None
 
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, ttl: int = 300):
-        # 使用TTLCache自动处理过期
-        self.message_cache = TTLCache(maxsize=1000, ttl=ttl)
+    def __init__(self, store: SessionStore | None = None):
+        self.store = store or session_store
+
+    async def get_entries(self, chat_id: str) -> List[HistoryEntry]:
+        records = await self.store.get_list(self.NAMESPACE, chat_id)
+        return [decode_entry(record) for record in records]
+
+    async def get_messages(self, chat_id: str) -> List[ChatMessage]:
+        return [entry.message for entry in await self.get_entries(chat_id)]
 
-    def add_message(
+    async def add_message(
         self,
         chat_id: str,
         role: Optional[ChatRole] = None,
@@ -59,58 +159,62 @@ class ChatHistory:
         tool_call: Optional[ToolCall] = None,
         messages: Optional[List[ChatMessage]] = None,
     ):
-        """Add a message to the cache"""
+        """Add a message to the session store"""
 
-        if chat_id not in self.message_cache:
-            self.message_cache[chat_id] = []
-
-        if messages:
-            self.message_cache[chat_id].extend(messages)
-        else:
+        if not messages:
             if role == ChatRole.USER:
-                self.message_cache[chat_id].append(ChatMessage.from_user(text))
+                messages = [ChatMessage.from_user(text)]
             elif role == ChatRole.TOOL:
-                self.message_cache[chat_id].append(ChatMessage.from_tool(tool_result, tool_call))
+                messages = [ChatMessage.from_tool(tool_result, tool_call)]
             elif role == ChatRole.ASSISTANT:
-                self.message_cache[chat_id].append(ChatMessage.from_assistant(text))
+                messages = [ChatMessage.from_assistant(text)]
             else:
                 raise ValueError("Invalid role")
 
-    def get_last_n_rounds(self, cache_messages: List[ChatMessage], rounds: int):
+        await self.store.append(self.NAMESPACE, chat_id, [encode_message(m) for m in messages])
+
+    async def get_recent_messages(self, chat_id: str, rounds: int) -> List[ChatMessage]:
         """
-        根据user->assistant的顺序回溯最近的rounds轮对话，
-        其中一轮包括user消息及紧随其后的assistant（包含中间tool）。
-        返回截取的消息列表（从旧到新排好序）
+        按 token 预算选取最近 rounds 轮对话，已有滚动摘要时以系统消息的形式放在最前
+
+        滑出窗口且尚未摘要的消息会在后台合并进摘要，不阻塞当前请求
         """
-        if not cache_messages or rounds < 1:
+        if rounds < 1:
             return []
 
-        rounds_found = 0
-        collected = []
-        i = len(cache_messages) - 1
-
-        # 临时堆栈，用来临时保存当前轮段消息，方便完成后整体加入结果
-        temp_stack = []
-
-        # 逆序遍历消息
-        while i >= 0 and rounds_found < rounds:
-            current_msg = cache_messages[i]
-
-            temp_stack.insert(0, current_msg)  # 头插，保持顺序
-
-            # 检查是否遇到一轮对话开始的user消息
-            if current_msg.role == ChatRole.USER:
-
-                # 找到了user消息，一个完整轮次的起点
-                rounds_found += 1
-
-                # 将这轮对话消息加入总收集列表，从前往后
-                collected = temp_stack + collected
-                temp_stack = []
-
-            i -= 1
+        entries = await self.get_entries(chat_id)
+        if not entries:
+            return []
 
-        return collected
+        summary = await history_summarizer.get(chat_id)
+        # 记录过期后重新开始的会话，旧摘要不再适用
+        if summary and summary.upto > len(entries):
+            summary = None
+        offset = summary.upto if summary else 0
+
+        messages = []
+        budget = CONFIG.HISTORY_MAX_TOKENS
+        if summary:
+            summary_message = ChatMessage.from_system(SUMMARY_PROMPT_PREFIX + summary.text)
+            messages.append(summary_message)
+            budget -= message_tokens(summary_message)
+
+        window = build_history_window(
+            entries[offset:],
+            rounds,
+            max_tokens=max(budget, 0),
+            tool_result_max_tokens=CONFIG.HISTORY_TOOL_RESULT_MAX_TOKENS,
+        )
+        messages.extend(window.messages)
+
+        if window.start > 0:
+            history_summarizer.schedule(chat_id, summary, entries[offset : offset + window.start], offset + window.start)
+
+        logger.debug(
+            f"History window: chat_id={chat_id}, messages={len(window.messages)}/{len(entries) - offset}, "
+            f"tokens={window.tokens}, summary={bool(summary)}"
+        )
+        return messages
 
     async def get_history_messages(
         self,
@@ -125,40 +229,38 @@ class ChatHistory:
 
         logger.info(f"Fetched history messages: prompt={prompt_name}, chat_id={chat_id}, rounds={rounds}")
 
-        # Prepare system prompt with optional context about collection
-        system_context = f"你当前处于{collection}场景下。\n" if collection else ""
-        system_prompt = system_context + await prompt_service.get_prompt_template(prompt_name)
+        prompt_template = await prompt_service.get_prompt_template(prompt_name)
+        if enable_extra_prompt:
+            action_list = tuple(await robot_action_service.get_active_action_list())
+            emoji_list = tuple(await robot_expression_service.get_active_expression_list())
+
+        if CONFIG.PROMPT_LAYOUT == PromptLayout.PREFIX_STABLE:
+            # 静态内容在前：提示词 -> 动作/表情说明 -> 场景；问题、文档、时间放在最后的用户消息
+            system_prompt = prompt_template
+            if enable_extra_prompt:
+                system_prompt += build_marker_prompt(action_list, emoji_list)
+            if collection:
+                system_prompt += f"\n你当前处于{collection}场景下。"
+            user_msg = STABLE_QUERY_TEMPLATE
+        else:
+            # Prepare system prompt with optional context about collection
+            system_context = f"你当前处于{collection}场景下。\n" if collection else ""
+            system_prompt = system_context + prompt_template
+            user_msg = build_user_template(action_list, emoji_list) if enable_extra_prompt else DEFAULT_QUERY_TEMPLATE
+
         messages = [ChatMessage.from_system(system_prompt)]
 
         rounds_to_retrieve = max(0, rounds - 1)  # exclude current round
 
-        cached_msgs = self.message_cache.get(chat_id, [])
-        if cached_msgs and rounds_to_retrieve > 0:
-            recent_msgs = self.get_last_n_rounds(cached_msgs, rounds_to_retrieve)
-            messages.extend(recent_msgs)
-
-        user_msg = DEFAULT_QUERY_TEMPLATE
-        if enable_extra_prompt:
-            action_list = await robot_action_service.get_active_action_list()
-            emoji_list = await robot_expression_service.get_active_expression_list()
-            formatted_prompt = EXTRA_PROMPT.format(
-                action0=next(iter(action_list), ""),
-                actions="、".join(action_list),
-                emoji0=next(iter(emoji_list), ""),
-                emojis="、".join(emoji_list),
-            )
-            user_msg += formatted_prompt
+        if rounds_to_retrieve > 0:
+            messages.extend(await self.get_recent_messages(chat_id, rounds_to_retrieve))
 
         contents = [user_msg]
-        if image:
-            if image.startswith(("http://", "https://")):
-                contents.append(ImageContent.from_url(image, detail="low"))
-            else:
-                image_data = image.split(",", 1)[1] if image.startswith("data:image") else image
-                contents.append(ImageContent(base64_image=image_data, detail="low"))
+        if image and (image_content := await image_ingestor.ingest(image)):
+            contents.append(image_content)
 
         messages.append(ChatMessage.from_user(content_parts=contents))
-        return messages
+        return dedupe_images(messages)
 
 
 chat_history = ChatHistory()
@@ -0,0 +1,122 @@
+from typing import Any, Dict, TypeVar
+
+from haystack.components.embedders import OpenAIDocumentEmbedder, OpenAITextEmbedder
+from haystack.components.generators.chat import OpenAIChatGenerator
+from haystack.utils import Secret
+from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
+from openai import AsyncOpenAI, OpenAI
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+from chat2rag.utils.qdrant_store import get_client
+
+logger = get_logger(__name__)
+
+C = TypeVar("C")
+
+
+class ClientPool:
+    """
+    模型客户端与文档存储复用池
+
+    - OpenAI 兼容客户端按 (base_url, api_key) 复用，同一端点只有一个 HTTP 连接池
+    - 生成器按 (model, base_url, api_key, generation_kwargs) 复用；流式回调在每次 run 时传入，不绑定在实例上
+    - Qdrant 文档存储按 (collection, 是否稀疏向量) 复用
+
+    Haystack 组件不能同时加入多个 Pipeline，因此嵌入器每个 Pipeline 单独创建，
+    只共享其底层客户端。
+    """
+
+    def __init__(self):
+        self._openai_clients: Dict[tuple, tuple[OpenAI, AsyncOpenAI]] = {}
+        self._generators: Dict[tuple, OpenAIChatGenerator] = {}
+        self._document_stores: Dict[tuple, QdrantDocumentStore] = {}
+
+    def get_openai_clients(self, base_url: str, api_key: str) -> tuple[OpenAI, AsyncOpenAI]:
+        key = (base_url, api_key)
+        clients = self._openai_clients.get(key)
+        if clients is None:
+            kwargs = {
+                "api_key": api_key,
+                "base_url": base_url,
+                "timeout": CONFIG.OPENAI_TIMEOUT,
+                "max_retries": CONFIG.OPENAI_MAX_RETRIES,
+            }
+            clients = (OpenAI(**kwargs), AsyncOpenAI(**kwargs))
+            self._openai_clients[key] = clients
+            logger.info(f"OpenAI client created: base_url={base_url}")
+        return clients
+
+    def get_async_openai(self, base_url: str, api_key: str) -> AsyncOpenAI:
+        return self.get_openai_clients(base_url, api_key)[1]
+
+    def bind_openai_clients(self, component: C, base_url: str, api_key: str) -> C:
+        """将 Haystack OpenAI 组件的客户端替换为共享客户端"""
+        client, async_client = self.get_openai_clients(base_url, api_key)
+        if hasattr(component, "client"):
+            component.client = client
+        if hasattr(component, "async_client"):
+            component.async_client = async_client
+        return component
+
+    def get_chat_generator(
+        self,
+        model: str,
+        api_base_url: str,
+        api_key: str,
+        generation_kwargs: Dict[str, Any] | None = None,
+    ) -> OpenAIChatGenerator:
+        key = (model, api_base_url, api_key, repr(generation_kwargs))
+        generator = self._generators.get(key)
+        if generator is None:
+            generator = OpenAIChatGenerator(
+                model=model,
+                api_base_url=api_base_url,
+                api_key=Secret.from_token(api_key),
+                generation_kwargs=generation_kwargs or {},
+            )
+            self.bind_openai_clients(generator, api_base_url, api_key)
+            self._generators[key] = generator
+            logger.info(f"Chat generator created: model={model}, base_url={api_base_url}")
+        return generator
+
+    def create_text_embedder(self) -> OpenAITextEmbedder:
+        embedder = OpenAITextEmbedder(
+            api_base_url=CONFIG.EMBEDDING_OPENAI_URL,
+            api_key=Secret.from_token(CONFIG.EMBEDDING_API_KEY),
+            model=CONFIG.EMBEDDING_MODEL,
+            dimensions=CONFIG.EMBEDDING_DIMENSIONS,
+        )
+        return self.bind_openai_clients(embedder, CONFIG.EMBEDDING_OPENAI_URL, CONFIG.EMBEDDING_API_KEY)
+
+    def create_document_embedder(self, **kwargs) -> OpenAIDocumentEmbedder:
+        embedder = OpenAIDocumentEmbedder(
+            api_base_url=CONFIG.EMBEDDING_OPENAI_URL,
+            api_key=Secret.from_token(CONFIG.EMBEDDING_API_KEY),
+            model=CONFIG.EMBEDDING_MODEL,
+            dimensions=CONFIG.EMBEDDING_DIMENSIONS,
+            **kwargs,
+        )
+        return self.bind_openai_clients(embedder, CONFIG.EMBEDDING_OPENAI_URL, CONFIG.EMBEDDING_API_KEY)
+
+    def get_document_store(self, collection: str, use_sparse: bool) -> QdrantDocumentStore:
+        key = (collection, use_sparse)
+        document_store = self._document_stores.get(key)
+        if document_store is None:
+            document_store = QdrantDocumentStore(
+                location=CONFIG.QDRANT_LOCATION,
+                embedding_dim=CONFIG.EMBEDDING_DIMENSIONS,
+                index=collection,
+                use_sparse_embeddings=use_sparse,
+            )
+            document_store._async_client = get_client()
+            self._document_stores[key] = document_store
+        return document_store
+
+    def invalidate_document_store(self, collection: str):
+        """知识库删除或重建后调用"""
+        for key in [key for key in self._document_stores if key[0] == collection]:
+            self._document_stores.pop(key)
+
+
+client_pool = ClientPool()
@@ -1,5 +1,5 @@
 import asyncio
-from typing import List
+from typing import Dict, List
 
 from chat2rag.core.init_app import modify_db
 from chat2rag.dataclass.flow_node import Condition, Node
@@ -30,42 +30,46 @@ def dict_to_flow_nodes(data: dict) -> List[Node]:
             state_name=state_name if state_name else node_type,
         )
 
-    def _update_condition(edge_dict: dict, nodes: List[Node]):
+    def _update_condition(edge_dict: dict, nodes_by_id: Dict[str, Node]):
         source_handle = edge_dict.get("sourceHandle")
 
         source_id = edge_dict.get("source")
         target_id = edge_dict.get("target")
 
-        # 1. 使用 next() 查找源节点，未找到则返回
-        source_node = next((n for n in nodes if n.id == source_id), None)
+        # 1. 按 id 索引查找源节点，未找到则返回
+        source_node = nodes_by_id.get(source_id)
         if not source_node:
             return
 
+        target_node = nodes_by_id.get(target_id)
+        target_state_name = target_node.state_name if target_node else ""
+
         # 2. 如果节点只有一个条件，直接更新它
         if len(source_node.conditions) == 1:
             source_node.conditions[0].transition_node_id = target_id
-            source_node.conditions[0].transition_node_state_name = next(
-                (n.state_name for n in nodes if n.id == target_id), ""
-            )
+            source_node.conditions[0].transition_node_state_name = target_state_name
             return
 
         # 3. 否则，解析 handle id 并查找匹配的条件进行更新
         try:
             source_handle_id = int(source_handle.split("-")[1])
-        except (ValueError, IndexError):
+        except (AttributeError, ValueError, IndexError):
             return  # 如果 handle 格式不正确则返回
 
         for condition in source_node.conditions:
             if int(condition.id) == source_handle_id:
                 condition.transition_node_id = target_id
-                condition.transition_node_state_name = next((n.state_name for n in nodes if n.id == target_id), "")
+                condition.transition_node_state_name = target_state_name
                 break  # 找到并更新后，退出循环
 
     # 转换主对象
     nodes = [_to_node(n) for n in data.get("nodes", [])]
+    nodes_by_id = {}
+    for node in nodes:
+        nodes_by_id.setdefault(node.id, node)
 
     for e in data.get("edges", []):
-        _update_condition(e, nodes)
+        _update_condition(e, nodes_by_id)
 
     return nodes
 
@@ -0,0 +1,153 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+import orjson
+from haystack.dataclasses import ChatMessage, ChatRole
+
+# 每条消息的固定开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+# 低清晰度图片的近似 token 数
+IMAGE_TOKENS = 85
+
+ELIDED_TOOL_RESULT = "[工具结果已省略]"
+TRUNCATED_SUFFIX = "...(内容过长已截断)"
+
+_CJK_PATTERN = re.compile("[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def _is_cjk(char: str) -> bool:
+    return _CJK_PATTERN.match(char) is not None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    近似估算 token 数：中日韩字符按 1 个 token，其余字符按 4 个字符 1 个 token
+
+    不依赖具体模型的分词器，只用于预算控制
+    """
+    if not text:
+        return 0
+    cjk = len(text) - len(_CJK_PATTERN.sub("", text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """截断到约 max_tokens 个 token，只扫描保留的前缀"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens * 4
+    for index, char in enumerate(text):
+        budget -= 4 if _is_cjk(char) else 1
+        if budget < 0:
+            return text[:index] + TRUNCATED_SUFFIX
+    return text
+
+
+def message_tokens(message: ChatMessage) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    for text in message.texts:
+        tokens += estimate_tokens(text)
+    for tool_call in message.tool_calls:
+        tokens += estimate_tokens(tool_call.tool_name)
+        tokens += estimate_tokens(orjson.dumps(tool_call.arguments).decode())
+    for tool_call_result in message.tool_call_results:
+        tokens += estimate_tokens(tool_call_result.result)
+    tokens += IMAGE_TOKENS * len(message.images)
+    return tokens
+
+
+@dataclass
+class HistoryEntry:
+    """聊天记录中的一条消息及其 token 数（写入时计算一次）"""
+
+    message: ChatMessage
+    tokens: int
+
+
+@dataclass
+class HistoryWindow:
+    """
+    选入上下文的历史消息
+
+    start 为第一条选中消息在原记录中的下标，之前的消息可用于滚动摘要
+    """
+
+    messages: List[ChatMessage] = field(default_factory=list)
+    tokens: int = 0
+    start: int = 0
+
+
+def _shrink_tool_result(message: ChatMessage, text: str) -> ChatMessage:
+    result = message.tool_call_result
+    return ChatMessage.from_tool(text, origin=result.origin, error=result.error)
+
+
+def _compact_round(
+    entries: Sequence[HistoryEntry],
+    tool_result_max_tokens: int,
+    elide_tool_results: bool,
+) -> tuple[List[ChatMessage], int]:
+    """
+    压缩一轮对话中的工具结果
+
+    - 最近一轮：超长的工具结果截断到 tool_result_max_tokens
+    - 更早的轮次：工具结果整体省略，最终回答已包含其要点
+    """
+    messages, tokens = [], 0
+    for entry in entries:
+        message = entry.message
+        if message.tool_call_result is not None:
+            if elide_tool_results:
+                message = _shrink_tool_result(message, ELIDED_TOOL_RESULT)
+            elif entry.tokens - MESSAGE_OVERHEAD_TOKENS > tool_result_max_tokens:
+                text = truncate_to_tokens(message.tool_call_result.result, tool_result_max_tokens)
+                message = _shrink_tool_result(message, text)
+            if message is not entry.message:
+                messages.append(message)
+                tokens += message_tokens(message)
+                continue
+        messages.append(message)
+        tokens += entry.tokens
+    return messages, tokens
+
+
+def build_history_window(
+    entries: Sequence[HistoryEntry],
+    rounds: int,
+    max_tokens: int,
+    tool_result_max_tokens: int,
+) -> HistoryWindow:
+    """
+    从新到旧选取最多 rounds 轮完整对话，累计 token 数不超过 max_tokens
+
+    一轮以 user 消息开始，包含其后的 assistant 与中间的 tool 消息；
+    只对每条消息累加预先计算好的 token 数，整体为线性复杂度。
+    """
+    if not entries or rounds < 1:
+        return HistoryWindow(start=len(entries))
+
+    round_starts = [i for i, entry in enumerate(entries) if entry.message.role == ChatRole.USER]
+
+    selected: List[List[ChatMessage]] = []
+    total, start = 0, len(entries)
+    for position in range(len(round_starts) - 1, max(len(round_starts) - rounds, 0) - 1, -1):
+        begin = round_starts[position]
+        end = round_starts[position + 1] if position + 1 < len(round_starts) else len(entries)
+        messages, tokens = _compact_round(
+            entries[begin:end],
+            tool_result_max_tokens,
+            elide_tool_results=bool(selected),
+        )
+        if total + tokens > max_tokens:
+            break
+        selected.append(messages)
+        total += tokens
+        start = begin
+
+    return HistoryWindow(
+        messages=[message for messages in reversed(selected) for message in messages],
+        tokens=total,
+        start=start,
+    )
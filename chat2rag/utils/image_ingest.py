@@ -0,0 +1,153 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+from dataclasses import replace
+from typing import List, Sequence
+
+import httpx
+from cachetools import LRUCache
+from haystack.dataclasses import ChatMessage, ImageContent, TextContent
+from PIL import Image, ImageOps
+
+from chat2rag.config import CONFIG
+from chat2rag.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+DUPLICATE_IMAGE_NOTE = "（图片与之前发送的图片#{digest}相同，请参考之前的图片）"
+
+
+def image_digest(image: ImageContent) -> str | None:
+    return (image.meta or {}).get("digest")
+
+
+def _strip_data_uri(image: str) -> str:
+    return image.split(",", 1)[1] if image.startswith("data:image") else image
+
+
+def _decode_data(image: str) -> bytes:
+    return base64.b64decode(_strip_data_uri(image))
+
+
+def _downsize(raw: bytes, max_side: int, fmt: str, quality: int) -> tuple[bytes, int, int]:
+    """缩放到 detail=low 的分辨率并重新编码"""
+    with Image.open(io.BytesIO(raw)) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_side, max_side))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format=fmt, quality=quality)
+        return buffer.getvalue(), img.width, img.height
+
+
+class ImageIngestor:
+    """
+    多模态图片预处理
+
+    解码 -> 缩放到 IMAGE_MAX_SIDE -> 重新编码为 JPEG/WebP -> 按原始内容哈希；
+    同一张图片（如摄像头重复帧）只处理一次。
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._client: httpx.AsyncClient | None = None
+
+    async def _fetch(self, url: str) -> bytes:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0, follow_redirects=True)
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return response.content
+
+    async def ingest(self, image: str) -> ImageContent | None:
+        """
+        image 为 http(s) 链接、data URI 或纯 base64
+
+        base64 无法解码时原样透传给模型；链接下载失败时返回 None，由调用方忽略该图片。
+        """
+        if image.startswith(("http://", "https://")):
+            if image in self._cache:
+                return self._cache[image]
+            try:
+                raw = await self._fetch(image)
+            except httpx.HTTPError as e:
+                logger.warning(f"Failed to fetch image {image}: {e}")
+                return None
+        else:
+            try:
+                raw = _decode_data(image)
+            except (binascii.Error, ValueError) as e:
+                logger.warning(f"Failed to decode image, passing through: {e}")
+                return ImageContent(base64_image=_strip_data_uri(image), detail="low", validation=False)
+
+        digest = hashlib.sha256(raw).hexdigest()[:16]
+        if digest in self._cache:
+            return self._cache[digest]
+
+        fmt = CONFIG.IMAGE_FORMAT.upper()
+        try:
+            data, width, height = await asyncio.to_thread(
+                _downsize, raw, CONFIG.IMAGE_MAX_SIDE, fmt, CONFIG.IMAGE_QUALITY
+            )
+            mime_type = _MIME_TYPES.get(fmt, "image/jpeg")
+            logger.debug(f"Image ingested: digest={digest}, {len(raw)} -> {len(data)} bytes, {width}x{height}")
+        except Exception as e:
+            # 无法识别的格式原样发送
+            logger.warning(f"Failed to downsize image {digest}: {e}")
+            data, mime_type = raw, None
+
+        content = ImageContent(
+            base64_image=base64.b64encode(data).decode(),
+            mime_type=mime_type,
+            detail="low",
+            meta={"digest": digest},
+        )
+        self._cache[digest] = content
+        if image.startswith(("http://", "https://")):
+            self._cache[image] = content
+        return content
+
+
+def dedupe_images(messages: Sequence[ChatMessage]) -> List[ChatMessage]:
+    """
+    同一会话中重复的图片只发送第一次，之后的消息改为文字引用
+
+    引用写在消息的第一段文本后面（提示词构建只保留第一段文本），
+    较早的消息保持不变，不影响前缀缓存。
+    """
+    seen: set[str] = set()
+    result = []
+    for message in messages:
+        if not message.images:
+            result.append(message)
+            continue
+
+        kept, duplicates = [], []
+        for image in message.images:
+            digest = image_digest(image)
+            if digest and digest in seen:
+                duplicates.append(digest)
+            else:
+                kept.append(image)
+                if digest:
+                    seen.add(digest)
+
+        if not duplicates:
+            result.append(message)
+            continue
+
+        notes = "".join(DUPLICATE_IMAGE_NOTE.format(digest=digest[:8]) for digest in duplicates)
+        texts = message.texts or [""]
+        content = [TextContent(text=texts[0] + notes)]
+        content += [TextContent(text=text) for text in texts[1:]]
+        content += kept
+        result.append(replace(message, _content=content))
+    return result
+
+
+image_ingestor = ImageIngestor()
@@ -1,19 +1,12 @@
-from openai import AsyncOpenAI
+from openai import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT
 
 from chat2rag.config import CONFIG
 from chat2rag.models.models import ModelProvider, ModelSource
 from chat2rag.services.model_service import model_source_service
+from chat2rag.utils.client_pool import client_pool
 
 
 class LLMClient:
-    _clients: dict[str, AsyncOpenAI] = {}
-
-    def _get_client(self, base_url: str, api_key: str) -> AsyncOpenAI:
-        key = f"{base_url}|{api_key}"
-        if key not in self._clients:
-            self._clients[key] = AsyncOpenAI(api_key=api_key, base_url=base_url)
-        return self._clients[key]
-
     async def acall_llm(
         self,
         messages: list[dict],
@@ -26,7 +19,10 @@ class LLMClient:
             model, extra_log=extra_log
         )
         model_provider: ModelProvider = await model_source.provider
-        client = self._get_client(model_provider.base_url, model_provider.api_key)
+        # 复用连接池，但沿用 SDK 默认的超时与重试，Excel 表结构、摘要等长调用需要更长超时
+        client = client_pool.get_async_openai(model_provider.base_url, model_provider.api_key).with_options(
+            timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES
+        )
         response = await client.chat.completions.create(
             model=model_source.name,
             messages=messages,
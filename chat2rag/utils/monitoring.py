@@ -1,8 +1,18 @@
+import asyncio
 import functools
+import sys
+import threading
 import time
-from typing import Callable
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import FrameType
+from typing import AsyncIterator, Callable, Deque, List, Tuple
 
 from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
 
 logger = get_logger(__name__)
 
@@ -18,3 +28,215 @@ def async_performance_logger(func: Callable):
         return result
 
     return wrapper
+
+
+# =====================================================================
+#                           运行时指标
+# =====================================================================
+
+
+def _db_pool_stats() -> dict:
+    """asyncpg 连接池：已建立 / 空闲 / 上限；其他数据库后端返回空"""
+    from tortoise import connections
+
+    stats = {}
+    for client in connections.all():
+        pool = getattr(client, "_pool", None)
+        if pool is None or not hasattr(pool, "get_size"):
+            continue
+        alias = client.connection_name
+        stats[(alias, "size")] = pool.get_size()
+        stats[(alias, "idle")] = pool.get_idle_size()
+        stats[(alias, "max")] = pool.get_max_size()
+    return stats
+
+
+registry.gauge("db_pool_connections", "数据库连接池连接数", ["alias", "state"], callback=_db_pool_stats)
+LOOP_LAG = registry.gauge("event_loop_lag_seconds", "最近一个采样周期内的最大事件循环延迟(秒)")
+LOOP_LAG_SECONDS = registry.histogram(
+    "event_loop_lag_distribution_seconds",
+    "事件循环延迟分布(秒)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+LOOP_BLOCKS = registry.counter("event_loop_blocks_total", "事件循环阻塞次数", ["module"])
+LOOP_BLOCK_SECONDS = registry.histogram(
+    "event_loop_block_seconds",
+    "事件循环阻塞时长(秒)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+_STACK_LIMIT = 30
+# 归因时跳过的事件循环/线程调度模块
+_RUNTIME_MODULES = ("asyncio", "threading", "selectors", "concurrent", "contextvars", "uvloop")
+
+
+@dataclass
+class BlockingEvent:
+    """一次事件循环阻塞"""
+
+    duration_ms: float
+    module: str
+    stack: List[str] = field(default_factory=list)
+    time: datetime = field(default_factory=datetime.now)
+
+    def format(self) -> str:
+        return f"Event loop blocked {self.duration_ms:.0f}ms in {self.module}\n" + "".join(self.stack)
+
+
+def attribute_module(frame: FrameType | None) -> str:
+    """阻塞归因：由内向外第一个 chat2rag 模块，没有则取最内层的非事件循环模块"""
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("chat2rag."):
+            return module
+        if fallback is None and module and not module.startswith(_RUNTIME_MODULES):
+            fallback = module
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class LoopMonitor:
+    """
+    事件循环延迟与阻塞检测
+
+    - 心跳任务在事件循环内定时 sleep，醒来时间超出预期的部分即事件循环延迟
+    - 看门狗线程检查心跳，超过 threshold_ms 未按时醒来时抓取事件循环线程的调用栈并归因到模块；
+      平时只有线程定时唤醒，只在发生阻塞时取栈
+    - 阻塞在两次检查之间结束时没有调用栈，模块记为 unknown
+
+    Args:
+        interval_sec: 延迟指标的上报周期
+        threshold_ms: 阻塞阈值
+        max_events: 保留的最近阻塞事件数
+        record_metrics: 是否写入 /metrics 并记录日志
+    """
+
+    def __init__(
+        self,
+        interval_sec: float = 0.5,
+        threshold_ms: float = 100,
+        max_events: int = 100,
+        record_metrics: bool = True,
+    ):
+        self.interval_sec = interval_sec
+        self.threshold_ms = threshold_ms
+        self.record_metrics = record_metrics
+        self.events: Deque[BlockingEvent] = deque(maxlen=max_events)
+        # 心跳不超过阈值的一半，看门狗每 1/4 阈值检查一次
+        self._heartbeat_sec = min(interval_sec, threshold_ms / 2000)
+        self._check_sec = threshold_ms / 4000
+        self._deadline: float | None = None
+        # 心跳迟到超过阈值时写入 (预期醒来时间, 迟到毫秒)，由看门狗消费
+        self._late: Deque[Tuple[float, float]] = deque()
+        self._loop_thread_id: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    async def run(self):
+        """在事件循环中运行，取消即停止"""
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+        window_start, max_lag = time.perf_counter(), 0.0
+        try:
+            while True:
+                deadline = time.perf_counter() + self._heartbeat_sec
+                self._deadline = deadline
+                await asyncio.sleep(self._heartbeat_sec)
+                now = time.perf_counter()
+                lag = max(now - deadline, 0.0)
+                if lag * 1000 >= self.threshold_ms:
+                    self._late.append((deadline, lag * 1000))
+
+                max_lag = max(max_lag, lag)
+                if self.record_metrics and now - window_start >= self.interval_sec:
+                    LOOP_LAG.set(max_lag)
+                    LOOP_LAG_SECONDS.observe(max_lag)
+                    window_start, max_lag = now, 0.0
+        finally:
+            self._deadline = None
+            self.stop()
+
+    def stop(self):
+        """停止看门狗，等待其处理完剩余事件"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        pending: Tuple[float, BlockingEvent] | None = None
+        while True:
+            stopped = self._stop.wait(self._check_sec)
+
+            deadline = self._deadline
+            if pending is None and deadline is not None and not stopped:
+                overdue_ms = (time.perf_counter() - deadline) * 1000
+                if overdue_ms >= self.threshold_ms:
+                    event = self._capture(overdue_ms)
+                    # 取栈期间心跳已醒来说明阻塞已结束，栈不可信
+                    if self._deadline == deadline:
+                        pending = (deadline, event)
+
+            while self._late:
+                late_deadline, lag_ms = self._late.popleft()
+                if pending is not None and pending[0] == late_deadline:
+                    event, pending = pending[1], None
+                    event.duration_ms = lag_ms
+                else:
+                    event = BlockingEvent(duration_ms=lag_ms, module="unknown")
+                self._record(event)
+
+            if stopped:
+                if pending is not None:
+                    self._record(pending[1])
+                return
+
+    def _capture(self, overdue_ms: float) -> BlockingEvent:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return BlockingEvent(duration_ms=overdue_ms, module="unknown")
+        stack = traceback.StackSummary.extract(traceback.walk_stack(frame), limit=_STACK_LIMIT)
+        stack.reverse()
+        return BlockingEvent(duration_ms=overdue_ms, module=attribute_module(frame), stack=stack.format())
+
+    def _record(self, event: BlockingEvent):
+        self.events.append(event)
+        if not self.record_metrics:
+            return
+        LOOP_BLOCKS.inc(module=event.module)
+        LOOP_BLOCK_SECONDS.observe(event.duration_ms / 1000)
+        logger.warning(event.format())
+
+
+async def monitor_event_loop_lag(interval_sec: float = 0.5, block_threshold_ms: float = 100):
+    """后台任务：事件循环延迟采样与阻塞检测"""
+    await LoopMonitor(interval_sec=interval_sec, threshold_ms=block_threshold_ms).run()
+
+
+@asynccontextmanager
+async def assert_no_blocking(max_ms: float) -> AsyncIterator[LoopMonitor]:
+    """
+    测试用：期间事件循环被阻塞超过 max_ms 时抛出 AssertionError，并给出阻塞位置
+
+    Example:
+        async with assert_no_blocking(100):
+            await client.post("/api/v1/chat", json=...)
+    """
+    monitor = LoopMonitor(threshold_ms=max_ms, record_metrics=False)
+    task = asyncio.create_task(monitor.run())
+    # 让心跳先开始
+    await asyncio.sleep(0)
+    try:
+        yield monitor
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    if monitor.events:
+        details = "\n".join(event.format() for event in monitor.events)
+        raise AssertionError(f"Event loop blocked longer than {max_ms}ms:\n{details}")
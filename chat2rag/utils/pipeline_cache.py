@@ -2,19 +2,23 @@ from functools import lru_cache
 from typing import Any, Type, TypeVar
 
 from chat2rag.core.logger import get_logger
+from chat2rag.core.runtime_metrics import registry
 from chat2rag.pipelines.base import BasePipeline
 
 logger = get_logger(__name__)
 T = TypeVar("T")
 
+# 与顺序无关的参数：排序去重后再作为缓存键，避免同一配置因顺序不同重复构建
+_ORDER_INSENSITIVE_KWARGS = {"collections", "tools"}
 
-from functools import lru_cache
-from typing import Any, Type, TypeVar
 
-from chat2rag.core.logger import get_logger
-
-logger = get_logger(__name__)
-T = TypeVar("T")
+def _normalize_kwargs(kwargs: dict) -> dict:
+    normalized = dict(kwargs)
+    for key in _ORDER_INSENSITIVE_KWARGS:
+        value = normalized.get(key)
+        if isinstance(value, (list, tuple, set)):
+            normalized[key] = sorted(set(value))
+    return normalized
 
 
 def _make_hashable_kwargs(**kwargs) -> tuple:
@@ -38,14 +42,32 @@ def _make_hashable_kwargs(**kwargs) -> tuple:
 def _cached_get_pipeline(cls: Type[T], args: tuple, hashable_kwargs: tuple) -> T:
     """实际被缓存的工厂函数 - 只缓存实例本身"""
     kwargs = dict(hashable_kwargs)
+    for key in _ORDER_INSENSITIVE_KWARGS & kwargs.keys():
+        if isinstance(kwargs[key], tuple):
+            kwargs[key] = list(kwargs[key])
     return cls(*args, **kwargs)
 
 
+def _cache_hit_ratio() -> float:
+    info = _cached_get_pipeline.cache_info()
+    lookups = info.hits + info.misses
+    return info.hits / lookups if lookups else 0.0
+
+
+registry.gauge("pipeline_cache_size", "已缓存的 Pipeline 数量", callback=lambda: _cached_get_pipeline.cache_info().currsize)
+registry.counter("pipeline_cache_hits_total", "Pipeline 缓存命中次数", callback=lambda: _cached_get_pipeline.cache_info().hits)
+registry.counter(
+    "pipeline_cache_misses_total", "Pipeline 缓存未命中次数", callback=lambda: _cached_get_pipeline.cache_info().misses
+)
+registry.gauge("pipeline_cache_hit_ratio", "Pipeline 缓存命中率（进程启动以来）", callback=_cache_hit_ratio)
+
+
 async def create_pipeline(cls: Type[T], *args: Any, **kwargs: Any) -> T:
     """
     Generic cached pipeline creator with async initialization support.
     Converts kwargs to hashable format before caching.
     """
+    kwargs = _normalize_kwargs(kwargs)
     try:
         hashable_kwargs = _make_hashable_kwargs(**kwargs)
         pipeline: BasePipeline = _cached_get_pipeline(cls, args, hashable_kwargs)
@@ -0,0 +1,48 @@
+import hashlib
+from typing import List, Sequence
+
+import orjson
+from haystack.dataclasses import ChatMessage, ChatRole
+
+from chat2rag.utils.history_window import estimate_tokens
+
+
+class PromptLayout:
+    """
+    提示词布局
+
+    - DEFAULT：动作/表情说明放在最后一条用户消息中
+    - PREFIX_STABLE：系统提示词、工具定义、动作/表情说明等静态内容在前，
+      问题、检索文档、当前时间等每轮变化的内容放在最后一条用户消息中，
+      便于支持前缀缓存的 OpenAI 兼容服务复用 KV 缓存
+    """
+
+    DEFAULT = "default"
+    PREFIX_STABLE = "prefix_stable"
+
+
+def tool_specs(tools: Sequence) -> List[dict]:
+    """工具定义（与发送给模型的 schema 一致），按名称排序"""
+    specs = []
+    for tool in tools:
+        if hasattr(tool, "tool_spec"):
+            specs.append(tool.tool_spec)
+        elif hasattr(tool, "__iter__"):
+            # Toolset
+            specs.extend(t.tool_spec for t in tool if hasattr(t, "tool_spec"))
+    return sorted(specs, key=lambda spec: spec.get("name", ""))
+
+
+def prompt_prefix_fingerprint(messages: Sequence[ChatMessage], tools: Sequence = ()) -> tuple[str, int]:
+    """
+    计算静态前缀（工具定义 + 首条系统消息）的哈希与估算 token 数
+
+    哈希相同的请求理论上可以命中上游的前缀缓存
+    """
+    parts = [orjson.dumps(tool_specs(tools), option=orjson.OPT_SORT_KEYS).decode()]
+    if messages and messages[0].role == ChatRole.SYSTEM:
+        parts.append(messages[0].text or "")
+
+    prefix = "\n".join(parts)
+    digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+    return digest, sum(estimate_tokens(part) for part in parts)
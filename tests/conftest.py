@@ -75,6 +75,7 @@ async def client():
     from chat2rag.api.routes import router
     from chat2rag.config import CONFIG
     from chat2rag.middleware import ExceptionHandlerMiddleware, LoggingMiddleware
+    from chat2rag.utils.monitoring import assert_no_blocking
 
     # 创建不带 lifespan 的测试 app
     app = FastAPI(title="Chat2RAG Test")
@@ -86,4 +87,9 @@ async def client():
     app.include_router(router, prefix=CONFIG.WEB_ROUTE_PREFIX)
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
-        yield ac
+        if CONFIG.LOOP_BLOCK_FAIL_MS:
+            # 请求处理过程中阻塞事件循环超过阈值即判定失败
+            async with assert_no_blocking(CONFIG.LOOP_BLOCK_FAIL_MS):
+                yield ac
+        else:
+            yield ac
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from chat2rag.api.v2 import chat as chat_module
+from chat2rag.streaming.encoder import AUDIO_FRAME_HEADER, StreamFrameEncoder
+
+
+class FakeChatProcessor:
+    """按 WebSocket 传输方式返回一条文本帧和一条音频帧"""
+
+    def __init__(self, request, transport=None):
+        self.request = request
+        self.encoder = StreamFrameEncoder("msg-ws", model="qwen")
+
+    async def process(self):
+        yield StreamFrameEncoder.to_text(self.encoder.encode(text=self.request.content.text, status=1))
+        yield StreamFrameEncoder.encode_audio_frame(3, b"\x01\x02")
+
+
+@pytest.fixture
+def ws_client(monkeypatch):
+    monkeypatch.setattr(chat_module, "ChatProcessor", FakeChatProcessor)
+    app = FastAPI()
+    app.include_router(chat_module.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_chat_ws_frames_and_errors(ws_client):
+    with ws_client.websocket_connect("/chat/ws") as websocket:
+        websocket.send_text("{not json")
+        assert websocket.receive_json()["object"] == "error"
+
+        websocket.send_json({"model": "qwen"})
+        assert websocket.receive_json()["object"] == "error"
+
+        websocket.send_bytes(b"\x00\x01")
+        assert websocket.receive_json()["object"] == "error"
+
+        websocket.send_json({"content": {"text": "你好"}})
+        frame = json.loads(websocket.receive_text())
+        assert frame["content"]["text"] == "你好"
+        assert frame["messageId"] == "msg-ws"
+
+        audio = websocket.receive_bytes()
+        magic, version, reserved, seq = AUDIO_FRAME_HEADER.unpack_from(audio)
+        assert (magic, version, reserved, seq) == (b"AU", 1, 0, 3)
+        assert audio[AUDIO_FRAME_HEADER.size :] == b"\x01\x02"
@@ -0,0 +1,107 @@
+import pytest
+
+from chat2rag.core.flow.matcher import CandidateEmbedder, FlowMatcher
+from chat2rag.core.flow.registry import CompiledFlow
+from chat2rag.dataclass.flow_node import Condition, Node
+
+
+class _DisabledEmbedder(CandidateEmbedder):
+    @property
+    def enabled(self) -> bool:
+        return False
+
+
+class _FixedEmbedder(CandidateEmbedder):
+    """所有候选的相似度都为 score"""
+
+    def __init__(self, score: float):
+        super().__init__()
+        self.score = score
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    async def nearest(self, query, texts):
+        return 0, self.score
+
+
+@pytest.fixture
+def matcher():
+    return FlowMatcher(embedder=_DisabledEmbedder())
+
+
+@pytest.fixture
+def node():
+    return Node(
+        id="1",
+        state_name="confirm",
+        conditions=[
+            Condition(id=1, trigger="是", transition_node_state_name="done"),
+            Condition(id=2, trigger="重新填写", transition_node_state_name="fill"),
+        ],
+    )
+
+
+class TestFlowMatcher:
+    @pytest.mark.asyncio
+    async def test_state_verbatim_trigger(self, matcher, node):
+        decision = await matcher.match_state("是。", node)
+        assert decision.confident and decision.value == "done"
+
+    @pytest.mark.asyncio
+    async def test_state_negation_not_matched_locally(self, matcher, node):
+        decision = await matcher.match_state("不是", node)
+        assert decision.value != "done"
+
+    @pytest.mark.asyncio
+    async def test_state_quit_phrase(self, matcher, node):
+        decision = await matcher.match_state("取消", node)
+        assert decision.confident and decision.value == "quit"
+
+    @pytest.mark.asyncio
+    async def test_state_ambiguous_without_embedding(self, matcher, node):
+        decision = await matcher.match_state("我想改一下电话号码", node)
+        assert not decision.confident
+
+    @pytest.mark.asyncio
+    async def test_flow_name_keyword(self, matcher):
+        flows = [CompiledFlow(id=1, name="失物招领", desc="登记丢失物品", version=None)]
+        decision = await matcher.match_flow("我要办理失物招领", flows)
+        assert decision.confident and decision.value == "失物招领"
+
+    @pytest.mark.asyncio
+    async def test_flow_name_with_intent_words(self, matcher):
+        flows = [CompiledFlow(id=1, name="预约", desc="预约参观", version=None)]
+        decision = await matcher.match_flow("帮我预约一下吧", flows)
+        assert decision.confident and decision.value == "预约"
+
+    @pytest.mark.asyncio
+    async def test_negated_or_unrelated_flow_name_not_matched_locally(self, matcher):
+        flows = [CompiledFlow(id=1, name="预约", desc="预约参观", version=None)]
+        for query in ("我不想预约", "预约电话是多少"):
+            decision = await matcher.match_flow(query, flows)
+            assert decision.value != "预约"
+
+        # 否定表达即使向量相似度很高也交给 LLM
+        decision = await FlowMatcher(embedder=_FixedEmbedder(0.95)).match_flow("我不想预约", flows)
+        assert not decision.confident
+
+    @pytest.mark.asyncio
+    async def test_flow_name_fragment_not_matched_locally(self, matcher):
+        flows = [CompiledFlow(id=1, name="预约轮椅", desc="预约轮椅服务", version=None)]
+        decision = await matcher.match_flow("预约", flows)
+        assert decision.value != "预约轮椅"
+
+    @pytest.mark.asyncio
+    async def test_state_low_embedding_left_to_llm(self, node):
+        matcher = FlowMatcher(embedder=_FixedEmbedder(0.1))
+        decision = await matcher.match_state("这事儿我不想弄了", node)
+        assert not decision.confident
+
+    @pytest.mark.asyncio
+    async def test_flow_low_embedding_is_miss(self):
+        matcher = FlowMatcher(embedder=_FixedEmbedder(0.1))
+        flows = [CompiledFlow(id=1, name="失物招领", desc="登记丢失物品", version=None)]
+        decision = await matcher.match_flow("今天天气怎么样", flows)
+        assert decision.confident and decision.value is None
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+
+class FakeVAD:
+    """帧均值为正即判定为语音，记录每次推理的 batch 大小"""
+
+    context_samples = 64
+    state_size = 128
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def infer(self, frames, states, contexts):
+        self.batch_sizes.append(len(frames))
+        probs = (frames.mean(axis=1) > 0).astype(np.float32)
+        return probs, states + 1, frames[:, -self.context_samples :]
+
+
+class FakeASR:
+    """含语音的块识别出一个字，静音块和结束块不再新增文字；记录收到的采样数"""
+
+    stream_chunk_samples = 2048
+
+    def __init__(self):
+        self.samples = 0
+
+    def stream_chunk(self, speech_chunk, cache, is_final=False):
+        self.samples += len(speech_chunk)
+        cache["chunks"] = cache.get("chunks", 0) + 1
+        return "字" if not is_final and speech_chunk.mean() > 0 else ""
+
+    def transcribe(self, audio):
+        return "整句"
+
+
+@pytest.fixture
+def fake_vad() -> FakeVAD:
+    return FakeVAD()
+
+
+@pytest.fixture
+def fake_asr() -> FakeASR:
+    return FakeASR()
@@ -0,0 +1,23 @@
+from chat2rag.utils.client_pool import ClientPool
+from chat2rag.utils.pipeline_cache import _make_hashable_kwargs, _normalize_kwargs
+
+
+def test_pipeline_key_ignores_collection_and_tool_order():
+    first = _normalize_kwargs({"collections": ["b", "a"], "tools": ["t2", "t1"], "model": "m"})
+    second = _normalize_kwargs({"collections": ["a", "b", "a"], "tools": ["t1", "t2"], "model": "m"})
+
+    assert first["collections"] == ["a", "b"]
+    assert _make_hashable_kwargs(**first) == _make_hashable_kwargs(**second)
+
+
+def test_clients_shared_per_endpoint():
+    pool = ClientPool()
+
+    clients = pool.get_openai_clients("http://localhost:8000/v1", "key")
+    assert pool.get_openai_clients("http://localhost:8000/v1", "key") is clients
+    assert pool.get_openai_clients("http://localhost:9000/v1", "key") is not clients
+
+    generator = pool.get_chat_generator("model", "http://localhost:8000/v1", "key", {"temperature": 0.1})
+    assert generator.client is clients[0]
+    assert generator.async_client is clients[1]
+    assert pool.get_chat_generator("model", "http://localhost:8000/v1", "key", {"temperature": 0.1}) is generator
@@ -0,0 +1,92 @@
+from haystack.dataclasses import ChatMessage, ToolCall
+
+from chat2rag.utils.history_window import (
+    ELIDED_TOOL_RESULT,
+    HistoryEntry,
+    build_history_window,
+    estimate_tokens,
+    message_tokens,
+    truncate_to_tokens,
+)
+
+
+def _entries(*messages: ChatMessage) -> list[HistoryEntry]:
+    return [HistoryEntry(message=m, tokens=message_tokens(m)) for m in messages]
+
+
+def _tool_round(query: str, result: str, answer: str) -> list[ChatMessage]:
+    tool_call = ToolCall(tool_name="web_search", arguments={"query": query})
+    return [
+        ChatMessage.from_user(query),
+        ChatMessage.from_assistant(tool_calls=[tool_call]),
+        ChatMessage.from_tool(result, origin=tool_call),
+        ChatMessage.from_assistant(answer),
+    ]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("你好") == 2
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("你好abcde") == 4
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens("你好", 10) == "你好"
+    truncated = truncate_to_tokens("你" * 100, 10)
+    assert truncated.startswith("你" * 10)
+    assert "你" * 11 not in truncated
+
+
+def test_window_respects_rounds():
+    entries = _entries(
+        ChatMessage.from_user("第一轮"),
+        ChatMessage.from_assistant("回答一"),
+        ChatMessage.from_user("第二轮"),
+        ChatMessage.from_assistant("回答二"),
+        ChatMessage.from_user("第三轮"),
+        ChatMessage.from_assistant("回答三"),
+    )
+    window = build_history_window(entries, rounds=2, max_tokens=10_000, tool_result_max_tokens=100)
+
+    assert [m.text for m in window.messages] == ["第二轮", "回答二", "第三轮", "回答三"]
+    assert window.start == 2
+
+
+def test_window_respects_token_budget():
+    entries = _entries(
+        ChatMessage.from_user("很长的问题" * 50),
+        ChatMessage.from_assistant("很长的回答" * 50),
+        ChatMessage.from_user("短问题"),
+        ChatMessage.from_assistant("短回答"),
+    )
+    window = build_history_window(entries, rounds=5, max_tokens=50, tool_result_max_tokens=100)
+
+    assert [m.text for m in window.messages] == ["短问题", "短回答"]
+    assert window.tokens <= 50
+    assert window.start == 2
+
+
+def test_window_shrinks_tool_results():
+    entries = _entries(
+        *_tool_round("旧问题", "旧结果" * 1000, "旧回答"),
+        *_tool_round("新问题", "新结果" * 1000, "新回答"),
+    )
+    window = build_history_window(entries, rounds=2, max_tokens=10_000, tool_result_max_tokens=20)
+
+    results = [m.tool_call_result.result for m in window.messages if m.tool_call_result]
+    assert results[0] == ELIDED_TOOL_RESULT
+    assert results[1].startswith("新结果") and len(results[1]) < 100
+    assert window.start == 0
+
+
+def test_window_skips_leading_orphans():
+    entries = _entries(
+        ChatMessage.from_assistant("上一轮的残留"),
+        ChatMessage.from_user("问题"),
+        ChatMessage.from_assistant("回答"),
+    )
+    window = build_history_window(entries, rounds=5, max_tokens=10_000, tool_result_max_tokens=100)
+
+    assert [m.text for m in window.messages] == ["问题", "回答"]
+    assert window.start == 1
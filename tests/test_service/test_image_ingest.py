@@ -0,0 +1,68 @@
+import base64
+import io
+
+import httpx
+import pytest
+from haystack.dataclasses import ChatMessage
+from PIL import Image
+
+from chat2rag.utils.image_ingest import ImageIngestor, dedupe_images
+
+
+def _png_base64(size=(2000, 1000), color=(255, 0, 0)) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.mark.asyncio
+async def test_ingest_downsizes_and_hashes():
+    ingestor = ImageIngestor()
+    data = _png_base64()
+
+    image = await ingestor.ingest(f"data:image/png;base64,{data}")
+
+    with Image.open(io.BytesIO(base64.b64decode(image.base64_image))) as img:
+        assert max(img.size) == 512
+        assert img.format == "JPEG"
+    assert image.detail == "low"
+    assert image.meta["digest"]
+    assert await ingestor.ingest(data) is image
+
+
+@pytest.mark.asyncio
+async def test_dedupe_repeated_frames():
+    ingestor = ImageIngestor()
+    frame = await ingestor.ingest(_png_base64())
+    other = await ingestor.ingest(_png_base64(color=(0, 0, 255)))
+
+    messages = [
+        ChatMessage.from_system("系统"),
+        ChatMessage.from_user(content_parts=["第一轮", frame]),
+        ChatMessage.from_assistant("回答"),
+        ChatMessage.from_user(content_parts=["第二轮", frame, other]),
+    ]
+    result = dedupe_images(messages)
+
+    assert result[1] is messages[1]
+    assert result[3].images == [other]
+    assert result[3].text.startswith("第二轮")
+    assert frame.meta["digest"][:8] in result[3].text
+
+
+@pytest.mark.asyncio
+async def test_invalid_base64_passes_through():
+    ingestor = ImageIngestor()
+
+    image = await ingestor.ingest("data:image/png;base64,not-base64!")
+
+    assert image.base64_image == "not-base64!"
+    assert image.detail == "low"
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_returns_none():
+    ingestor = ImageIngestor()
+    ingestor._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+
+    assert await ingestor.ingest("https://example.com/missing.png") is None
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+
+from chat2rag.utils.monitoring import LoopMonitor, assert_no_blocking
+
+
+async def test_non_blocking_code_passes():
+    async with assert_no_blocking(100) as monitor:
+        await asyncio.sleep(0.3)
+
+    assert not monitor.events
+
+
+async def test_blocking_call_fails_with_stack():
+    with pytest.raises(AssertionError) as exc_info:
+        async with assert_no_blocking(100):
+            time.sleep(0.4)
+
+    message = str(exc_info.value)
+    assert __name__ in message
+    assert "time.sleep(0.4)" in message
+
+
+async def test_block_duration_and_module():
+    monitor = LoopMonitor(threshold_ms=50, record_metrics=False)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.1)
+
+    time.sleep(0.3)
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert len(monitor.events) == 1
+    event = monitor.events[0]
+    assert event.module == __name__
+    assert 250 <= event.duration_ms <= 450
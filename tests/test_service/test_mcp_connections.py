@@ -0,0 +1,35 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from chat2rag.core.enums import MCPToolType
+from chat2rag.tools import mcp
+from chat2rag.tools.mcp import MCPConnectionManager
+
+
+@pytest.mark.asyncio
+async def test_state_is_connecting_while_toolset_connects(monkeypatch):
+    connected = threading.Event()
+
+    class SlowToolset:
+        """同步建连，直到测试放行"""
+
+        def __init__(self, server_info, eager_connect):
+            connected.wait(timeout=5)
+
+    monkeypatch.setattr(mcp, "MCPToolset", SlowToolset)
+    manager = MCPConnectionManager()
+    server = SimpleNamespace(id=-1, name="slow", mcp_type=MCPToolType.SSE, url="http://localhost:1/sse")
+
+    task = asyncio.create_task(manager.get_toolset(server))
+    try:
+        await asyncio.sleep(0.05)
+        assert manager.get_state_counts()[("connecting",)] == 1
+    finally:
+        connected.set()
+        toolset = await task
+    assert isinstance(toolset, SlowToolset)
+    assert manager.get_state_counts()[("connected",)] >= 1
+    await manager.remove_toolset(server.id)
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from chat2rag.core.enums import RollupGranularity
+from chat2rag.models import MetricRollup
+from chat2rag.schemas.metric import MetricCreate
+from chat2rag.services import metric_rollup_service as module
+from chat2rag.services.metric_rollup_service import (
+    MetricRollupService,
+    RollupAccumulator,
+    accumulate,
+    histogram_percentile,
+    truncate_time,
+)
+
+
+def test_truncate_time():
+    value = datetime(2025, 3, 4, 15, 42, 17, 500)
+
+    assert truncate_time(value, RollupGranularity.MINUTE) == datetime(2025, 3, 4, 15, 42)
+    assert truncate_time(value, RollupGranularity.HOUR) == datetime(2025, 3, 4, 15)
+    assert truncate_time(value, RollupGranularity.DAY) == datetime(2025, 3, 4)
+
+
+def test_accumulate_all_granularities():
+    pending = {}
+    at = datetime(2025, 3, 4, 15, 42, 17)
+    accumulate(pending, at, "faq", "qwen", first_response_ms=200, total_ms=1000, input_tokens=10)
+    accumulate(pending, at, "faq", "qwen", first_response_ms=400, error=True)
+    accumulate(pending, at, None, "qwen", total_ms=500)
+
+    assert len(pending) == 6
+    acc = pending[("hour", datetime(2025, 3, 4, 15), "faq", "qwen")]
+    assert acc.count == 2
+    assert acc.error_count == 1
+    assert acc.input_tokens == 10
+    assert acc.first_response_count == 2
+    assert acc.total_count == 1
+    assert ("day", datetime(2025, 3, 4), "", "qwen") in pending
+
+
+def test_histogram_percentile_within_one_bucket():
+    acc = RollupAccumulator()
+    for ms in range(1, 1001):
+        acc.add(first_response_ms=ms)
+
+    p50 = histogram_percentile(acc.first_response_hist, 0.5)
+    p95 = histogram_percentile(acc.first_response_hist, 0.95)
+    assert 500 / 1.25 <= p50 <= 500 * 1.25
+    assert 950 / 1.25 <= p95 <= 950 * 1.25
+    assert histogram_percentile({}, 0.5) is None
+
+
+def test_merge_and_to_data():
+    first, second = RollupAccumulator(), RollupAccumulator()
+    first.add(first_response_ms=100, total_ms=300, output_tokens=5)
+    second.add(first_response_ms=300, error=True, output_tokens=7)
+    first.merge(second)
+
+    data = first.to_data(model="qwen")
+    assert data.model == "qwen"
+    assert data.count == 2
+    assert data.error_count == 1
+    assert data.output_tokens == 12
+    assert data.avg_first_response_ms == 200
+    assert data.avg_total_ms == 300
+    assert sum(first.first_response_hist.values()) == 2
+
+
+def test_stage_percentiles():
+    acc = RollupAccumulator()
+    acc.add(stage_timings={"embedding": 20, "llm": 800})
+    other = RollupAccumulator()
+    other.add(stage_timings={"embedding": 30})
+    acc.merge(other)
+
+    assert sum(acc.stage_hist["embedding"].values()) == 2
+    data = acc.to_data()
+    assert set(data.stage_p50_ms) == {"embedding", "llm"}
+    assert 800 / 1.25 <= data.stage_p95_ms["llm"] <= 800 * 1.25
+
+
+async def test_rebuild_keeps_metrics_recorded_during_last_page(monkeypatch):
+    from chat2rag.services.metric_service import metric_service
+
+    service = MetricRollupService()
+    scanned = MetricCreate(message_id="m1", question="你好", model="qwen", total_ms=100)
+    at = (await metric_service.create(scanned)).create_time.replace(tzinfo=None)
+    service.record(scanned, at=at)
+
+    # 最后一页读取期间写入的指标不在扫描结果中
+    late = MetricCreate(message_id="m2", question="你好", model="qwen", total_ms=300)
+    real_paginate = module.paginate
+
+    async def paginate_then_record(*args, **kwargs):
+        page = await real_paginate(*args, **kwargs)
+        service.record(late, at=at + timedelta(milliseconds=1))
+        return page
+
+    monkeypatch.setattr(module, "paginate", paginate_then_record)
+
+    assert await service.rebuild(at, at) == 1
+    rollup = await MetricRollup.get(granularity="day", model="qwen")
+    assert rollup.count == 1
+    pending = service._pending[("day", truncate_time(at, RollupGranularity.DAY), "", "qwen")]
+    assert pending.count == 1
+    assert service._rebuild_log is None
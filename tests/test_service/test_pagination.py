@@ -0,0 +1,36 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from chat2rag.core.crud import _keyset_filter, _order_fields, decode_cursor, encode_cursor
+from chat2rag.core.exceptions import ParameterException
+from chat2rag.models import Metric
+
+
+def test_order_fields_append_primary_key():
+    assert _order_fields(Metric, ["-create_time"]) == [("create_time", True), ("message_id", True)]
+    assert _order_fields(Metric, None) == [("message_id", False)]
+
+
+def test_cursor_round_trip():
+    order_fields = _order_fields(Metric, ["-create_time"])
+    row = SimpleNamespace(create_time=datetime(2026, 3, 1, 8, 30, 15, 123456), message_id="m-1")
+
+    cursor = encode_cursor(row, order_fields)
+
+    assert decode_cursor(Metric, cursor, order_fields) == [row.create_time, "m-1"]
+    with pytest.raises(ParameterException):
+        decode_cursor(Metric, "not-a-cursor", order_fields)
+
+
+def test_keyset_filter_expands_each_sort_field():
+    order_fields = _order_fields(Metric, ["-create_time"])
+    created = datetime(2026, 3, 1)
+
+    condition = _keyset_filter(order_fields, [created, "m-1"])
+
+    assert condition.join_type == "OR"
+    first, second = condition.children
+    assert first.filters == {"create_time__lt": created}
+    assert second.filters == {"create_time": created, "message_id__lt": "m-1"}
@@ -0,0 +1,37 @@
+from haystack.dataclasses import ChatMessage
+from haystack.tools import Tool
+
+from chat2rag.utils.prompt_layout import prompt_prefix_fingerprint
+
+
+def _tool(name: str) -> Tool:
+    return Tool(
+        name=name,
+        description=f"{name} tool",
+        parameters={"type": "object", "properties": {}},
+        function=lambda: None,
+    )
+
+
+def test_prefix_ignores_volatile_tail():
+    system = ChatMessage.from_system("你是一个机器人")
+    first = prompt_prefix_fingerprint([system, ChatMessage.from_user("问题一 2025-01-01")])
+    second = prompt_prefix_fingerprint([system, ChatMessage.from_user("问题二 2025-01-02")])
+
+    assert first == second
+    assert first[1] > 0
+
+
+def test_prefix_independent_of_tool_order():
+    messages = [ChatMessage.from_system("你是一个机器人")]
+    a, b = _tool("weather"), _tool("web_search")
+
+    assert prompt_prefix_fingerprint(messages, [a, b]) == prompt_prefix_fingerprint(messages, [b, a])
+    assert prompt_prefix_fingerprint(messages, [a]) != prompt_prefix_fingerprint(messages, [a, b])
+
+
+def test_prefix_changes_with_system_prompt():
+    first = prompt_prefix_fingerprint([ChatMessage.from_system("提示词 v1")])
+    second = prompt_prefix_fingerprint([ChatMessage.from_system("提示词 v2")])
+
+    assert first[0] != second[0]
@@ -0,0 +1,97 @@
+import asyncio
+
+from chat2rag.services.query_rewrite_service import (
+    QueryRewriteService,
+    SynonymTable,
+    canonicalize,
+    normalize_text,
+    query_key,
+)
+
+
+class FakeEmbedder:
+    """记录每次批量编码的输入"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FakeLLM:
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.calls = 0
+
+    async def acall_llm(self, messages, **kwargs):
+        self.calls += 1
+        return self.reply
+
+
+def _service(llm_reply: str = "", synonyms=None):
+    embedder = FakeEmbedder()
+    llm = FakeLLM(llm_reply)
+    service = QueryRewriteService(
+        embedder=embedder,
+        llm_client=llm,
+        synonyms=synonyms or SynonymTable([["厕所", "卫生间", "洗手间"]]),
+    )
+    return service, embedder, llm
+
+
+def test_normalize_and_canonicalize():
+    assert normalize_text("  ＷｉＦｉ　密碼是多少？ ") == "wifi 密码是多少?"
+    assert canonicalize("咋預約輪椅") == "怎么预约轮椅"
+    assert canonicalize("啥时候开门") == "什么时候开门"
+    # 口语与书面问法共用缓存键
+    assert query_key("咋预约？") == query_key("怎么预约")
+
+
+def test_rewrite_variants():
+    service, _, _ = _service()
+
+    variants = service.rewrite("厕所在哪儿？")
+    assert variants[0] == "厕所在哪儿?"
+    assert "厕所在哪里?" in variants
+    assert "卫生间在哪里?" in variants and "洗手间在哪里?" in variants
+    assert len(variants) <= 4
+
+    assert service.rewrite("预约轮椅") == ["预约轮椅"]
+
+
+async def test_expand_embeds_once_and_caches():
+    service, embedder, _ = _service()
+
+    expansion = await service.expand("咋去厕所")
+    assert len(expansion.variants) > 1
+    assert len(expansion.embeddings) == len(expansion.variants)
+    assert embedder.calls == [expansion.variants]
+
+    # 口语与书面问法命中同一缓存
+    assert await service.expand("怎么去厕所？") is expansion
+    assert len(embedder.calls) == 1
+
+    single = await service.expand("咋去厕所", rewrite=False)
+    assert single.variants == ["咋去厕所"]
+    assert len(embedder.calls) == 2
+
+
+async def test_llm_rewrite_only_without_local_variants(monkeypatch):
+    from chat2rag.config import CONFIG
+
+    monkeypatch.setattr(CONFIG, "QUERY_REWRITE_LLM", True)
+    service, embedder, llm = _service(llm_reply="1. 轮椅怎么预约\n预约轮椅\n- 哪里可以借轮椅")
+
+    await service.expand("厕所在哪")
+    assert llm.calls == 0
+
+    expansion = await service.expand("预约轮椅")
+    assert expansion.variants == ["预约轮椅"]
+    await asyncio.gather(*service._llm_tasks.values())
+    assert llm.calls == 1
+
+    expansion = await service.expand("预约轮椅")
+    assert expansion.variants == ["预约轮椅", "轮椅怎么预约", "哪里可以借轮椅"]
+    assert embedder.calls[-1] == ["轮椅怎么预约", "哪里可以借轮椅"]
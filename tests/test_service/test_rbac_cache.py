@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+
+from chat2rag.services import rbac_service as module
+from chat2rag.services.rbac_service import RbacService
+
+
+class FakeUserRole:
+    calls = 0
+    rows = [
+        ("admin", "system:user:list", 1),
+        ("admin", "system:user:delete", 0),
+        ("viewer", "system:user:list", 1),
+        ("empty", None, None),
+    ]
+
+    @classmethod
+    def filter(cls, **kwargs):
+        return cls
+
+    @classmethod
+    async def values_list(cls, *fields):
+        cls.calls += 1
+        return cls.rows
+
+
+@pytest.mark.asyncio
+async def test_resolve_is_cached_until_invalidated(monkeypatch):
+    monkeypatch.setattr(module, "UserRole", FakeUserRole)
+    FakeUserRole.calls = 0
+    service = RbacService()
+    user = SimpleNamespace(id=1, tenant_id=1, is_superuser=False)
+
+    result = await service.resolve(user)
+    assert result.roles == ["admin", "viewer", "empty"]
+    assert result.permissions == ["system:user:list"]
+
+    assert await service.check_permission(user, "system:user:list")
+    assert not await service.check_permission(user, "system:user:delete")
+    assert FakeUserRole.calls == 1
+
+    service.invalidate()
+    await service.resolve(user)
+    assert FakeUserRole.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_superuser_skips_query(monkeypatch):
+    monkeypatch.setattr(module, "UserRole", FakeUserRole)
+    FakeUserRole.calls = 0
+    user = SimpleNamespace(id=1, tenant_id=1, is_superuser=True)
+
+    assert await RbacService().get_user_permissions(user) == ["*"]
+    assert FakeUserRole.calls == 0
@@ -0,0 +1,39 @@
+from chat2rag.core.runtime_metrics import MetricsRegistry
+
+
+def test_render_counter_gauge_histogram():
+    registry = MetricsRegistry(prefix="test")
+    requests = registry.counter("requests_total", "请求数", ["route"])
+    requests.inc(route="/chat")
+    requests.inc(2, route="/chat")
+    registry.gauge("queue_depth", "队列长度", ["queue"], callback=lambda: {("text",): 3, ("audio",): 1})
+    latency = registry.histogram("latency_seconds", "耗时", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5):
+        latency.observe(value)
+
+    text = registry.render()
+
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/chat"} 3' in text
+    assert 'test_queue_depth{queue="audio"} 1' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "test_latency_seconds_count 4" in text
+    assert requests.get(route="/chat") == 3
+
+
+def test_failing_callback_does_not_break_render():
+    registry = MetricsRegistry(prefix="")
+    registry.gauge("broken", "坏掉的回调", callback=lambda: 1 / 0)
+    registry.gauge("ok", "正常", callback=lambda: 1)
+
+    text = registry.render()
+
+    assert "ok 1" in text
+    assert "# TYPE broken" not in text
+
+
+def test_register_is_idempotent():
+    registry = MetricsRegistry()
+    assert registry.counter("a", "a") is registry.counter("a", "a")
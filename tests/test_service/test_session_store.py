@@ -0,0 +1,40 @@
+import pytest
+
+from chat2rag.core.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(ttl=60, maxsize=100)
+    return SQLiteSessionStore(tmp_path / "sessions.db", ttl=60)
+
+
+class TestSessionStore:
+    @pytest.mark.asyncio
+    async def test_key_value(self, store):
+        assert await store.get("flow_state", "chat-1") is None
+        await store.set("flow_state", "chat-1", {"flow_id": 1, "state": "start"})
+        assert await store.get("flow_state", "chat-1") == {"flow_id": 1, "state": "start"}
+
+        await store.delete("flow_state", "chat-1")
+        assert await store.get("flow_state", "chat-1") is None
+
+    @pytest.mark.asyncio
+    async def test_append_list(self, store):
+        await store.append("chat_history", "chat-1", [["u", "你好"], ["a", "你好呀"]])
+        await store.append("chat_history", "chat-1", [["u", "再见"]])
+        assert await store.get_list("chat_history", "chat-1") == [["u", "你好"], ["a", "你好呀"], ["u", "再见"]]
+        assert await store.get_list("chat_history", "chat-2") == []
+
+    @pytest.mark.asyncio
+    async def test_sqlite_shared_between_instances(self, tmp_path):
+        path = tmp_path / "sessions.db"
+        await SQLiteSessionStore(path, ttl=60).append("chat_history", "chat-1", [["u", "你好"]])
+        assert await SQLiteSessionStore(path, ttl=60).get_list("chat_history", "chat-1") == [["u", "你好"]]
+
+    @pytest.mark.asyncio
+    async def test_sqlite_expired(self, tmp_path):
+        store = SQLiteSessionStore(tmp_path / "sessions.db", ttl=-1)
+        await store.set("flow_state", "chat-1", {"state": "start"})
+        assert await store.get("flow_state", "chat-1") is None
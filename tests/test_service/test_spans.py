@@ -0,0 +1,71 @@
+import contextlib
+
+from chat2rag.core.spans import (
+    SpanRecorder,
+    StageTracer,
+    bind_recorder,
+    component_stage,
+    current_recorder,
+    reset_recorder,
+)
+
+
+def test_concurrent_spans_are_not_double_counted():
+    recorder = SpanRecorder("msg", start_ns=0)
+    recorder.record("retrieval", 0, 10_000_000)
+    recorder.record("retrieval", 5_000_000, 12_000_000)
+    recorder.record("tool", 0, 1_000_000)
+    recorder.record("tool", 3_000_000, 4_000_000)
+
+    timings = recorder.timings()
+    assert timings["retrieval"] == 12.0
+    assert timings["tool"] == 2.0
+    assert recorder.elapsed_ms("retrieval", "tool") == 12.0
+    assert recorder.elapsed_ms("rerank") is None
+
+
+def test_mark_only_first():
+    recorder = SpanRecorder("msg")
+    assert recorder.mark("llm_first_token")
+    first = recorder.marks["llm_first_token"]
+    assert not recorder.mark("llm_first_token")
+    assert recorder.timings()["llm_first_token"] == first
+
+
+def test_component_stage():
+    assert component_stage("retriever_1") == "retrieval"
+    assert component_stage("chat_generator") == "llm"
+    assert component_stage("builder") is None
+
+
+class FakeTracer:
+    def __init__(self):
+        self.operations = []
+
+    @contextlib.contextmanager
+    def trace(self, operation_name, tags=None, parent_span=None):
+        self.operations.append(operation_name)
+        yield None
+
+    def current_span(self):
+        return None
+
+
+def test_stage_tracer_records_components():
+    inner = FakeTracer()
+    tracer = StageTracer(inner)
+    recorder = SpanRecorder("msg")
+    token = bind_recorder(recorder)
+    try:
+        with tracer.trace("haystack.component.run", tags={"haystack.component.name": "embedder"}):
+            pass
+        with tracer.trace("haystack.component.run", tags={"haystack.component.name": "builder"}):
+            pass
+        with tracer.trace("haystack.pipeline.run"):
+            pass
+    finally:
+        reset_recorder(token)
+    assert current_recorder() is None
+
+    assert inner.operations == ["haystack.component.run"] * 2 + ["haystack.pipeline.run"]
+    assert [span.name for span in recorder.spans] == ["embedding"]
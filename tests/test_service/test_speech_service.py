@@ -0,0 +1,65 @@
+import asyncio
+
+import numpy as np
+
+from chat2rag.core.enums import SpeechEventType
+from chat2rag.services.speech_service import VAD_FRAME_SAMPLES, FrameReader, SpeechService, VADStream
+
+
+def _pcm(value: int, frames: int) -> bytes:
+    return np.full(frames * VAD_FRAME_SAMPLES, value, dtype=np.int16).tobytes()
+
+
+def test_frame_reader_views_and_carry():
+    reader = FrameReader(4)
+    data = np.arange(10, dtype=np.int16).tobytes()
+
+    frames = reader.feed(data)
+    assert [frame.tolist() for frame in frames] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    # 整包内的帧是对原始字节的只读视图
+    assert not frames[0].flags.owndata and not frames[0].flags.writeable
+
+    frames = reader.feed(np.arange(10, 12, dtype=np.int16).tobytes())
+    assert [frame.tolist() for frame in frames] == [[8, 9, 10, 11]]
+
+
+def test_vad_stream_start_and_end():
+    stream = VADStream(threshold=0.5, min_silence_ms=64, speech_pad_ms=0)
+
+    assert stream.update(0.1) is None
+    assert stream.update(0.9) == {"start": VAD_FRAME_SAMPLES}
+    assert stream.update(0.9) is None
+    # 静音不足 min_silence_ms 时不结束
+    assert stream.update(0.1) is None
+    assert stream.update(0.1) is None
+    assert stream.update(0.1) == {"end": 3 * VAD_FRAME_SAMPLES}
+    assert not stream.triggered
+
+
+async def test_vad_batches_across_sessions(fake_vad, fake_asr):
+    service = SpeechService(vad_factory=lambda: fake_vad, asr_factory=lambda: fake_asr, batch_size=8, batch_wait_ms=20)
+    sessions = [service.create_session() for _ in range(4)]
+
+    await asyncio.gather(*(session.feed(_pcm(-1, 1)) for session in sessions))
+
+    assert fake_vad.batch_sizes == [4]
+    assert all(session.vad.state[0, 0] == 1 for session in sessions)
+    service.shutdown()
+
+
+async def test_session_streams_partial_and_final_text(fake_vad, fake_asr):
+    service = SpeechService(vad_factory=lambda: fake_vad, asr_factory=lambda: fake_asr, batch_wait_ms=1)
+    session = service.create_session()
+
+    events = await session.feed(_pcm(-1, 2))
+    events += await session.feed(_pcm(1000, 8))
+    events += await session.feed(_pcm(-1000, 20))
+
+    types = [event.type for event in events]
+    assert types[0] == SpeechEventType.SPEECH_START
+    assert SpeechEventType.PARTIAL in types
+    assert events[-1].type == SpeechEventType.FINAL
+    assert events[-1].text.startswith("字")
+    assert session.asr is None
+    assert service.in_flight == 0
+    service.shutdown()
@@ -0,0 +1,59 @@
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from chat2rag.core import telemetry
+from chat2rag.core.telemetry import create_tracer_provider
+
+MS = 1_000_000
+
+
+def _emit(tracer, name, duration_ms, error=False):
+    root = tracer.start_span(name, start_time=0)
+    child = tracer.start_span(f"{name}.child", context=trace.set_span_in_context(root), start_time=0)
+    child.end(end_time=MS)
+    if error:
+        root.set_status(Status(StatusCode.ERROR))
+    root.end(end_time=duration_ms * MS)
+
+
+@pytest.fixture
+def make_provider(monkeypatch):
+    """创建的 provider 在测试结束后关闭，并恢复模块级的采样处理器"""
+    monkeypatch.setattr(telemetry, "_sampling_processor", telemetry._sampling_processor)
+    providers = []
+
+    def make(exporter, **kwargs):
+        providers.append(create_tracer_provider(exporter, **kwargs))
+        return providers[-1]
+
+    yield make
+    for provider in providers:
+        provider.shutdown()
+
+
+def test_only_slow_or_failed_traces_exported_without_rate_sampling(make_provider):
+    exporter = InMemorySpanExporter()
+    provider = make_provider(exporter, sample_rate=0.0, slow_ms=100)
+    tracer = provider.get_tracer(__name__)
+
+    _emit(tracer, "fast", 10)
+    _emit(tracer, "slow", 500)
+    _emit(tracer, "failed", 10, error=True)
+    provider.force_flush()
+
+    names = sorted(span.name for span in exporter.get_finished_spans())
+    assert names == ["failed", "failed.child", "slow", "slow.child"]
+
+
+def test_full_rate_exports_everything(make_provider):
+    exporter = InMemorySpanExporter()
+    provider = make_provider(exporter, sample_rate=1.0, slow_ms=100)
+    tracer = provider.get_tracer(__name__)
+
+    for index in range(5):
+        _emit(tracer, f"request-{index}", 10)
+    provider.force_flush()
+
+    assert len(exporter.get_finished_spans()) == 10
@@ -0,0 +1,56 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from chat2rag.services.timetable_service import Timetable, TimetableService, TimetableUnavailable
+
+
+def _write_timetable(path, rows):
+    df = pd.DataFrame(rows, columns=["序号", "车次", "开车时刻", "检票口"])
+    df.to_excel(path, header=False, index=False)
+    schema = {
+        "header_rows": 0,
+        "data_start_row": 1,
+        "columns": {"车次": {"col_index": 1}, "开车时刻": {"col_index": 2}, "检票口": {"col_index": 3}},
+    }
+    (path.parent / "schema.json").write_text(json.dumps(schema), encoding="utf-8")
+
+
+def test_timetable_indexes():
+    df = pd.DataFrame(
+        {
+            "车次": ["G1670★", "D3308", "C3308", None, "G1670"],
+            "开车时刻": ["10:05", "08:30", "09:00", "11:00", "12:00"],
+            "检票口": ["A1、A2", None, "B3", "B4", "B5"],
+        }
+    )
+    table = Timetable.from_dataframe(df)
+
+    assert len(table) == 4
+    assert table.find("G1670") == [0]
+    assert table.gates[table.find("D3308")[0]] == ""
+    assert [table.train_numbers[r] for r in table.find("3308")] == ["D3308", "C3308"]
+    assert table.find("9999") == []
+    assert [table.train_numbers[r] for r in table.rows_between(8 * 60, 10 * 60)] == ["D3308", "C3308"]
+
+
+def test_service_reloads_on_change(tmp_path):
+    excel_file = tmp_path / "timetable.xlsx"
+    service = TimetableService(excel_file)
+
+    with pytest.raises(TimetableUnavailable):
+        service.get()
+
+    _write_timetable(excel_file, [[1, "G1670", "10:05", "A1"]])
+    first = service.get()
+    assert service.get() is first
+    assert first.find("G1670") == [0]
+
+    _write_timetable(excel_file, [[1, "D3308", "08:30", "B2"]])
+    stat = excel_file.stat()
+    os.utime(excel_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = service.get()
+    assert second is not first
+    assert second.find("D3308") == [0]
@@ -0,0 +1,160 @@
+"""
+全双工语音会话测试：本地假 ASR / TTS，按实时速度送入音频，测量说完到听到回复的延迟
+"""
+
+import asyncio
+import json
+
+import numpy as np
+
+from chat2rag.schemas.chat import VoiceSessionRequest
+from chat2rag.services.speech_service import VAD_FRAME_SAMPLES, SpeechService
+from chat2rag.services.voice_service import VoiceSession
+
+FRAME_SEC = VAD_FRAME_SAMPLES / 16000
+# 每个包 4 帧（128ms）
+PACKET_FRAMES = 4
+
+
+class FakeHandler:
+    def __init__(self):
+        self.commit_gate = None
+
+
+class FakeProcessor:
+    """模拟 ChatProcessor：首 token 和每段 TTS 音频各需 delay 秒"""
+
+    def __init__(self, request, delay=0.1, audio_chunks=1):
+        self.request = request
+        self.handler = FakeHandler()
+        self.delay = delay
+        self.audio_chunks = audio_chunks
+        self.saved = False
+        self.cancelled = False
+
+    async def process(self):
+        try:
+            await asyncio.sleep(self.delay)
+            yield json.dumps({"object": "message", "content": {"text": self.request.content.text}})
+            for _ in range(self.audio_chunks):
+                await asyncio.sleep(self.delay)
+                yield b"audio"
+            if self.handler.commit_gate is not None:
+                await self.handler.commit_gate.wait()
+            self.saved = True
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class FailingProcessor(FakeProcessor):
+    async def process(self):
+        await asyncio.sleep(self.delay)
+        raise RuntimeError("pipeline failed")
+        yield
+
+
+class Harness:
+    def __init__(
+        self,
+        vad,
+        asr,
+        speculative: bool,
+        delay: float = 0.1,
+        audio_chunks: int = 1,
+        processor_class: type = FakeProcessor,
+    ):
+        self.sent = []
+        self.processors = []
+        # 每块 256ms，与实际流式 ASR 的增量结果间隔相当
+        asr.stream_chunk_samples = 4096
+        service = SpeechService(vad_factory=lambda: vad, asr_factory=lambda: asr, batch_wait_ms=1)
+
+        def factory(request):
+            processor = processor_class(request, delay=delay, audio_chunks=audio_chunks)
+            self.processors.append(processor)
+            return processor
+
+        async def send(frame):
+            self.sent.append(frame)
+
+        self.session = VoiceSession(
+            VoiceSessionRequest(),
+            send,
+            speech=service.create_session(),
+            processor_factory=factory,
+            speculative=speculative,
+        )
+
+    async def speak(self, seconds: float, value: int = 1000):
+        """按实时速度送入音频：value > 0 为说话，< 0 为静音"""
+        packets = int(seconds / (FRAME_SEC * PACKET_FRAMES))
+        packet = np.full(VAD_FRAME_SAMPLES * PACKET_FRAMES, value, dtype=np.int16).tobytes()
+        for _ in range(packets):
+            await self.session.feed(packet)
+            await asyncio.sleep(FRAME_SEC * PACKET_FRAMES)
+
+    def objects(self):
+        return [json.loads(frame)["object"] for frame in self.sent if isinstance(frame, str)]
+
+    def partials(self):
+        frames = [json.loads(frame) for frame in self.sent if isinstance(frame, str)]
+        return [frame for frame in frames if frame["object"] == "transcript" and not frame["final"]]
+
+
+async def test_mouth_to_ear_latency(fake_vad, fake_asr):
+    harness = Harness(fake_vad, fake_asr, speculative=False)
+    await harness.speak(0.2, -1000)
+    await harness.speak(1.0)
+    await harness.speak(0.8, -1000)
+    await harness.session.wait_reply()
+
+    assert len(harness.session.latencies) == 1
+    latency = harness.session.latencies[0]
+    assert latency.text == "字" * len(latency.text) and latency.text
+    # 至少包含静音判定时长与两次模拟延迟，不应有额外的排队等待
+    assert 400 <= latency.mouth_to_ear_ms < 1200
+    assert harness.processors[-1].saved
+
+
+async def test_speculative_reply_released_on_matching_final(fake_vad, fake_asr):
+    harness = Harness(fake_vad, fake_asr, speculative=True, delay=0.05)
+    await harness.speak(0.2, -1000)
+    await harness.speak(1.0)
+    await harness.speak(0.8, -1000)
+    await harness.session.wait_reply()
+
+    latency = harness.session.latencies[0]
+    assert latency.speculative
+    # 增量结果持续变化时不会每次都重新推测
+    assert len(harness.processors) < len(harness.partials())
+    # 被放弃的推测不产生副作用
+    assert sum(processor.saved for processor in harness.processors) == 1
+    assert all(processor.cancelled for processor in harness.processors[:-1])
+
+
+async def test_barge_in_cancels_reply(fake_vad, fake_asr):
+    harness = Harness(fake_vad, fake_asr, speculative=False, delay=0.1, audio_chunks=50)
+    await harness.speak(0.2, -1000)
+    await harness.speak(0.6)
+    await harness.speak(0.8, -1000)
+    # 回复播放过程中用户再次开口
+    await harness.speak(0.3)
+
+    reply = harness.processors[0]
+    assert reply.cancelled and not reply.saved
+    assert "interrupt" in harness.objects()
+    await harness.session.close()
+
+
+async def test_failed_reply_does_not_break_session(fake_vad, fake_asr):
+    harness = Harness(fake_vad, fake_asr, speculative=False, processor_class=FailingProcessor)
+    await harness.speak(0.2, -1000)
+    await harness.speak(0.6)
+    await harness.speak(0.8, -1000)
+    await harness.session.wait_reply()
+
+    # 异常在回复任务内记录，不会作为未取回的任务异常泄漏
+    assert harness.session._reply.task.exception() is None
+    await harness.session.feed(np.zeros(VAD_FRAME_SAMPLES, dtype=np.int16).tobytes())
+    await harness.session.close()
@@ -0,0 +1,61 @@
+import pytest
+
+from chat2rag.config import CONFIG
+from chat2rag.services import warmup_service as module
+from chat2rag.services.warmup_service import PipelineProfile, WarmupService
+
+
+@pytest.mark.asyncio
+async def test_profiles_merge_reordered_configurations(monkeypatch):
+    rows = [
+        {"model": "qwen", "collections": "b,a", "tools": "", "count": 3},
+        {"model": "qwen", "collections": "a,b", "tools": None, "count": 2},
+        {"model": "qwen", "collections": None, "tools": "weather", "count": 4},
+        {"model": "glm", "collections": "a", "tools": "", "count": 1},
+    ]
+
+    async def fake_top_configurations(start_time, limit=20):
+        return rows
+
+    monkeypatch.setattr(module.metric_service, "get_top_configurations", fake_top_configurations)
+
+    profiles = await WarmupService().get_profiles(limit=2, lookback_days=7)
+
+    assert profiles == [
+        PipelineProfile(model="qwen", collections=("a", "b")),
+        PipelineProfile(model="qwen", tools=("weather",)),
+    ]
+    assert profiles[0].count == 5
+
+
+@pytest.mark.asyncio
+async def test_warm_pipeline_uses_request_default_kwargs(monkeypatch):
+    calls = []
+
+    async def fake_create_agent_pipeline(**kwargs):
+        calls.append(kwargs)
+
+    monkeypatch.setattr(module, "create_agent_pipeline", fake_create_agent_pipeline)
+
+    await WarmupService().warm_pipeline(PipelineProfile(model="qwen", collections=("a",)))
+
+    assert calls[0]["generation_kwargs"] == CONFIG.GENERATION_KWARGS
+
+
+@pytest.mark.asyncio
+async def test_prime_tts_closes_provider(monkeypatch):
+    class FakeTTS:
+        closed = False
+
+        async def warm_up(self):
+            raise RuntimeError("connect failed")
+
+        async def close(self):
+            self.closed = True
+
+    tts = FakeTTS()
+    monkeypatch.setattr(module.TTSFactory, "create", lambda audio_config: tts)
+
+    with pytest.raises(RuntimeError):
+        await WarmupService().prime_tts()
+    assert tts.closed
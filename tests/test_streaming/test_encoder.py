@@ -0,0 +1,81 @@
+import json
+
+from chat2rag.schemas.chat import (
+    AudioContent,
+    BehaviorSchema,
+    ContentSchema,
+    SourceItem,
+    SourceSchema,
+    SourceType,
+    StreamChunkV2,
+    ToolSchema,
+)
+from chat2rag.streaming.encoder import AUDIO_FRAME_HEADER, StreamFrameEncoder
+
+
+def _expected(**kwargs) -> dict:
+    return json.loads(json.dumps(StreamChunkV2(**kwargs).model_dump(by_alias=True), ensure_ascii=False, default=str))
+
+
+class TestStreamFrameEncoder:
+    def test_plain_text_matches_schema(self):
+        encoder = StreamFrameEncoder("msg-1", model="qwen")
+        payload = encoder.encode(text=" 你好 ", status=1)
+        expected = _expected(
+            content=ContentSchema(text="你好"),
+            model="qwen",
+            status=1,
+            behavior=BehaviorSchema(),
+            tool={},
+            source=SourceSchema(items=[]),
+            document={},
+            message_id="msg-1",
+        )
+        assert json.loads(payload) == expected
+
+    def test_full_frame_matches_schema(self):
+        encoder = StreamFrameEncoder("msg-2")
+        encoder.set_model("qwen")
+        audio = AudioContent(text="你好", audio_base64="AAAA", format="mp3", sample_rate=22050)
+        items = [SourceItem(type=SourceType.TOOL, display="查询车次")]
+        documents = {"doc": [{"content": "a", "score": 0.9}]}
+        payload = encoder.encode(
+            text="好的",
+            status=2,
+            audio=audio,
+            emoji="smile",
+            action="wave",
+            tool="get_train_info",
+            tool_type="tool",
+            arguments={"train": "G1"},
+            tool_result="ok",
+            source_items=items,
+            documents=documents,
+            query={"text": "G1"},
+        )
+        expected = _expected(
+            input={"text": "G1"},
+            content=ContentSchema(text="好的", audio=audio),
+            model="qwen",
+            status=2,
+            behavior=BehaviorSchema(emoji="smile", action="wave"),
+            tool=ToolSchema(tool_name="get_train_info", tool_type="tool", arguments={"train": "G1"}, tool_result="ok"),
+            source=SourceSchema(items=items),
+            document=documents,
+            message_id="msg-2",
+        )
+        assert json.loads(payload) == expected
+
+    def test_source_only_on_finish(self):
+        encoder = StreamFrameEncoder("msg-3")
+        items = [SourceItem(type=SourceType.TOOL, display="查询车次")]
+        assert json.loads(encoder.encode(status=1, source_items=items))["source"] == {"items": []}
+
+    def test_to_sse(self):
+        assert StreamFrameEncoder.to_sse(b'{"a":1}') == 'data: {"a":1}\n\n'
+
+    def test_audio_frame_header(self):
+        frame = StreamFrameEncoder.encode_audio_frame(7, b"\x00\x01")
+        magic, version, _, seq = AUDIO_FRAME_HEADER.unpack(frame[: AUDIO_FRAME_HEADER.size])
+        assert (magic, version, seq) == (b"AU", 1, 7)
+        assert frame[AUDIO_FRAME_HEADER.size :] == b"\x00\x01"
@@ -0,0 +1,41 @@
+from chat2rag.streaming.segmenter import SentenceSegmenter
+
+
+def _segment(chunks: list[str]) -> list[str]:
+    segmenter = SentenceSegmenter()
+    sentences = [s for chunk in chunks for s in segmenter.feed(chunk)]
+    rest = segmenter.flush()
+    return sentences + ([rest] if rest else [])
+
+
+class TestSentenceSegmenter:
+    def test_strips_behavior_tags_across_chunks(self):
+        assert _segment(["[EMO", "JI:smile]你好，", "我是笨笨同学。[ACTION:w", "ave]"]) == ["你好，", "我是笨笨同学。"]
+
+    def test_keeps_non_behavior_brackets(self):
+        assert _segment(["电话[n1]123"]) == ["电话[n1]123"]
+
+    def test_chunking_does_not_change_result(self):
+        text = "[EMOJI:smile]你好，我是笨笨同学。今天天气很好，适合出去玩耍哦！欢迎[x]再来"
+        assert _segment([text]) == _segment(list(text))
+
+    def test_short_clause_merged(self):
+        assert _segment(["嗯，好的。今天，天气晴朗。"]) == ["嗯，好的。", "今天，天气晴朗。"]
+
+    def test_first_segment_forced_flush(self):
+        segmenter = SentenceSegmenter(first_max_chars=5)
+        assert segmenter.feed("一二三四五六七") == ["一二三四五"]
+
+    def test_max_chars_without_punctuation(self):
+        segmenter = SentenceSegmenter(first_max_chars=2, max_chars=4)
+        assert segmenter.feed("一二三四五六") == ["一二", "三四五六"]
+
+    def test_max_chars_keeps_latin_words(self):
+        segmenter = SentenceSegmenter(first_max_chars=8, max_chars=8)
+        assert segmenter.feed("see you tomorrow ") == ["see you", "tomorrow"]
+        assert segmenter.feed("你好hello") == []
+        assert segmenter.flush() == "你好hello"
+
+    def test_single_long_word_still_split(self):
+        segmenter = SentenceSegmenter(first_max_chars=4)
+        assert segmenter.feed("abcdefg") == ["abcd"]
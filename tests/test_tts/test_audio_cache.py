@@ -0,0 +1,39 @@
+import pytest
+
+from chat2rag.providers.tts.audio_cache import TTSAudioCache
+from chat2rag.schemas.chat import Audio
+
+
+class TestTTSAudioCache:
+    @pytest.mark.asyncio
+    async def test_memory_hit(self, tmp_path):
+        cache = TTSAudioCache(cache_dir=tmp_path, memory_bytes=1024)
+        audio_config = Audio()
+
+        assert await cache.get(audio_config, "你好。") is None
+        await cache.put(audio_config, "你好。", b"wav-bytes")
+        assert await cache.get(audio_config, "你好。") == b"wav-bytes"
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        audio_config = Audio()
+        await TTSAudioCache(cache_dir=tmp_path, memory_bytes=1024).put(audio_config, "欢迎光临。", b"abc", persist=True)
+
+        cache = TTSAudioCache(cache_dir=tmp_path, memory_bytes=1024)
+        assert await cache.get(audio_config, "欢迎光临。") == b"abc"
+        assert cache.stats()["disk_hits"] == 1
+        assert cache.get_memory(audio_config, "欢迎光临。") == b"abc"
+
+    def test_key_depends_on_voice(self):
+        text = "你好。"
+        assert TTSAudioCache.make_key(Audio(voice="a"), text) != TTSAudioCache.make_key(Audio(voice="b"), text)
+        assert TTSAudioCache.make_key(Audio(), text) == TTSAudioCache.make_key(Audio(), f" {text} ")
+
+    @pytest.mark.asyncio
+    async def test_oversized_audio_kept_on_disk_only(self, tmp_path):
+        cache = TTSAudioCache(cache_dir=tmp_path, memory_bytes=4)
+        audio_config = Audio()
+        await cache.put(audio_config, "长句子。", b"0123456789", persist=True)
+        assert cache.get_memory(audio_config, "长句子。") is None
+        assert await cache.get(audio_config, "长句子。") == b"0123456789"
@@ -0,0 +1,46 @@
+import pytest
+
+from chat2rag.providers.tts.audio_cache import TTSAudioCache
+from chat2rag.schemas.chat import Audio
+from chat2rag.services import tts_cache_service
+from chat2rag.services.tts_cache_service import TTSCacheWarmer
+
+
+class RecordingTTS:
+    def __init__(self, audio_config: Audio):
+        self.voice = audio_config.voice
+        self.spoken = []
+        self.closed = False
+
+    async def speak_sentence(self, text: str) -> bytes:
+        self.spoken.append(text)
+        return f"{self.voice}:{text}".encode()
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def providers(tmp_path, monkeypatch):
+    created = []
+
+    def create(audio_config):
+        created.append(RecordingTTS(audio_config))
+        return created[-1]
+
+    monkeypatch.setattr(tts_cache_service, "tts_audio_cache", TTSAudioCache(cache_dir=tmp_path, memory_bytes=1024))
+    monkeypatch.setattr(tts_cache_service.TTSFactory, "create", create)
+    return created
+
+
+@pytest.mark.asyncio
+async def test_warm_texts_covers_each_voice(providers):
+    warmer = TTSCacheWarmer([Audio(voice="Cherry"), Audio(voice="Ethan")])
+
+    assert await warmer.warm_texts(["欢迎光临。请问需要什么帮助？"]) == 4
+    assert [p.voice for p in providers] == ["Cherry", "Ethan"]
+    assert all(p.closed for p in providers)
+
+    # 已缓存的话术不再创建合成连接
+    assert await warmer.warm_texts(["欢迎光临。"]) == 0
+    assert len(providers) == 2
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+from chat2rag.providers.tts.pool import TTSSessionPool
+
+
+class FakeSession:
+    def __init__(self):
+        self.alive = True
+        self.resets = 0
+        self.closed = threading.Event()
+        self.thread = threading.current_thread()
+
+    def is_alive(self) -> bool:
+        return self.alive and not self.closed.is_set()
+
+    def reset(self) -> bool:
+        self.resets += 1
+        return self.alive
+
+    def close(self):
+        self.closed.set()
+
+
+class TestTTSSessionPool:
+    @pytest.mark.asyncio
+    async def test_prefill_and_acquire(self):
+        pool = TTSSessionPool(size=2)
+        built = []
+
+        def builder():
+            built.append(FakeSession())
+            return built[-1]
+
+        await pool.prefill("key", builder)
+        assert len(built) == 2
+        # 建连在线程中执行，不阻塞事件循环
+        assert all(session.thread is not threading.main_thread() for session in built)
+
+        session = await pool.acquire("key", builder)
+        assert session in built
+        assert pool.stats()["hits"] == 1
+
+        # 取用后在后台补齐
+        await asyncio.sleep(0.05)
+        assert pool.stats()["idle"] == 2
+
+    @pytest.mark.asyncio
+    async def test_acquire_builds_when_empty(self):
+        pool = TTSSessionPool(size=0)
+        session = await pool.acquire("key", FakeSession)
+        assert isinstance(session, FakeSession)
+        assert pool.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_release_reuses_connection(self):
+        pool = TTSSessionPool(size=1)
+        session = await pool.acquire("key", FakeSession)
+        await asyncio.sleep(0.05)
+        refilled = pool.stats()["idle"]
+
+        await pool.release("key", session)
+        # 池已满时归还的会话被关闭
+        assert refilled == 1
+        await asyncio.sleep(0.05)
+        assert session.closed.is_set()
+
+        reused = await pool.acquire("key", FakeSession)
+        await pool.release("key", reused)
+        assert reused.resets == 1
+        assert await pool.acquire("key", FakeSession) is reused
+
+    @pytest.mark.asyncio
+    async def test_dead_and_stale_sessions_discarded(self):
+        pool = TTSSessionPool(size=2, max_idle_sec=0.01)
+        dead, stale = FakeSession(), FakeSession()
+        pool._put("key", dead)
+        pool._put("key", stale)
+        dead.alive = False
+        await asyncio.sleep(0.02)
+
+        fresh = await pool.acquire("key", FakeSession)
+        assert fresh not in (dead, stale)
+        await asyncio.sleep(0.05)
+        assert dead.closed.is_set() and stale.closed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_slot_limits_concurrency(self):
+        pool = TTSSessionPool(size=0, max_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with pool.slot("key"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(5)))
+        assert peak == 2
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from chat2rag.providers.tts.audio_cache import TTSAudioCache
+from chat2rag.schemas.chat import Audio
+from chat2rag.streaming import tts_processor
+from chat2rag.streaming.tts_processor import TTSProcessor
+
+
+class SlowFirstTTS:
+    """越靠前的句子合成越慢，记录完成顺序"""
+
+    def __init__(self, delays: dict):
+        self.delays = delays
+        self.finished = []
+
+    async def speak_sentence(self, text: str) -> bytes:
+        await asyncio.sleep(self.delays[text])
+        self.finished.append(text)
+        return text.encode()
+
+
+@pytest.fixture(autouse=True)
+def audio_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_processor, "tts_audio_cache", TTSAudioCache(cache_dir=tmp_path, memory_bytes=1024))
+
+
+class TestTTSProcessor:
+    @pytest.mark.asyncio
+    async def test_audio_emitted_in_submission_order(self):
+        sentences = ["第一句。", "第二句。", "第三句。"]
+        provider = SlowFirstTTS({"第一句。": 0.15, "第二句。": 0.05, "第三句。": 0.01})
+        processor = TTSProcessor(provider, Audio())
+        await processor.start_worker()
+
+        for sentence in sentences:
+            await processor._submit_sentence(sentence)
+        await processor.stop_worker()
+
+        # 后面的句子先合成完，发送顺序仍与提交顺序一致
+        assert provider.finished == list(reversed(sentences))
+        emitted = []
+        while not processor._audio_queue.empty():
+            emitted.append(processor._audio_queue.get_nowait())
+        assert [item[1] for item in emitted] == sentences
+        assert [item[2] for item in emitted] == [sentence.encode() for sentence in sentences]